@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:56
+
+import envents_project.content_addressed
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_image_metadata'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='profile_picture',
+            field=models.ImageField(blank=True, null=True, upload_to=envents_project.content_addressed.ContentAddressedUploadTo('profile_pictures/', 'profile_picture')),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser, Group, Permission
 from django.utils.translation import gettext_lazy as _
+from envents_project.content_addressed import ContentAddressedUploadTo
 
 class User(AbstractUser):
     USER_TYPE_CHOICES = (
@@ -12,7 +13,16 @@ class User(AbstractUser):
     
     user_type = models.CharField(max_length=20, choices=USER_TYPE_CHOICES, default='customer')
     phone_number = models.CharField(max_length=15, blank=True, null=True)
-    profile_picture = models.ImageField(upload_to='profile_pictures/', blank=True, null=True)
+    profile_picture = models.ImageField(
+        upload_to=ContentAddressedUploadTo('profile_pictures/', 'profile_picture'), blank=True, null=True
+    )
+    # Captured at upload time (envents_project.media_metadata) so size and
+    # dimensions never need a storage round trip
+    profile_picture_size = models.PositiveBigIntegerField(null=True, blank=True, editable=False)
+    profile_picture_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    profile_picture_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    profile_picture_sha256 = models.CharField(max_length=64, blank=True, editable=False)
+    profile_picture_mime_type = models.CharField(max_length=50, blank=True, editable=False)
     bio = models.TextField(blank=True)
     
     # Custom fields for service providers
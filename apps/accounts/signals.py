@@ -0,0 +1,17 @@
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+from envents_project.media_metadata import capture_on_upload, remember_in_storage
+from .models import User
+
+
+@receiver(pre_save, sender=User)
+def capture_profile_picture_metadata(sender, instance, raw=False, **kwargs):
+    """Record size, dimensions, hash and MIME type of a newly uploaded picture."""
+    if not raw:
+        capture_on_upload(instance, 'profile_picture', 'profile_picture')
+
+
+@receiver(post_save, sender=User)
+def remember_profile_picture(sender, instance, raw=False, **kwargs):
+    if not raw:
+        remember_in_storage(instance, 'profile_picture', 'profile_picture')
@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import HourlyPageView
+
+@admin.register(HourlyPageView)
+class HourlyPageViewAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'object_id', 'hour', 'views')
+    list_filter = ('kind',)
+    date_hierarchy = 'hour'
+    readonly_fields = ('kind', 'object_id', 'hour', 'views')
@@ -0,0 +1,154 @@
+"""
+Buffered page-view counting for venue and service detail pages.
+
+``record_view`` only increments an in-memory counter keyed by
+(kind, object id, hour). A single background thread per process drains the
+buffer every ``PAGE_VIEW_FLUSH_INTERVAL`` seconds, or as soon as
+``PAGE_VIEW_FLUSH_EVENTS`` views are pending, with one multi-row
+``INSERT ... ON CONFLICT DO UPDATE`` into ``HourlyPageView``. Requests never
+wait on a database write for analytics.
+"""
+import atexit
+import logging
+import os
+import re
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .models import HourlyPageView
+
+logger = logging.getLogger(__name__)
+
+BOT_USER_AGENT = re.compile(
+    r'bot|crawl|spider|slurp|preview|facebookexternalhit|headless|lighthouse|'
+    r'curl|wget|python-requests|httpx|aiohttp|go-http-client|java/',
+    re.IGNORECASE,
+)
+
+# Rows per INSERT statement when flushing
+UPSERT_BATCH_SIZE = 500
+
+# Rows kept for a retry after a failed flush; past this they are dropped, so
+# the buffer can't grow without bound while the database is down
+MAX_RETAINED_ROWS = 50000
+
+
+def is_bot(request):
+    """Crawlers, link previews, scripts and browser prefetches don't count."""
+    user_agent = request.META.get('HTTP_USER_AGENT', '')
+    if not user_agent or BOT_USER_AGENT.search(user_agent):
+        return True
+    purpose = request.META.get('HTTP_SEC_PURPOSE') or request.META.get('HTTP_PURPOSE', '')
+    return 'prefetch' in purpose.lower()
+
+
+class ViewCounterBuffer:
+    def __init__(self, flush_interval, flush_events):
+        self.flush_interval = flush_interval
+        self.flush_events = flush_events
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._counts = Counter()
+        self._pending = 0
+        self._worker = None
+        self._pid = None
+
+    def add(self, kind, object_id, when=None):
+        hour = (when or timezone.now()).replace(minute=0, second=0, microsecond=0)
+        with self._lock:
+            self._ensure_worker()
+            self._counts[(kind, object_id, hour)] += 1
+            self._pending += 1
+            if self._pending >= self.flush_events:
+                self._wakeup.set()
+
+    def _ensure_worker(self):
+        # Started lazily (and again after a fork) so gunicorn's preloading
+        # master never owns the thread; only the workers do.
+        if self._pid == os.getpid() and self._worker.is_alive():
+            return
+        if self._pid != os.getpid():
+            self._counts.clear()
+            self._pending = 0
+        self._pid = os.getpid()
+        self._worker = threading.Thread(target=self._run, name='page-view-flusher', daemon=True)
+        self._worker.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Flushing page view counters failed")
+            finally:
+                # This thread holds its own DB connection; don't keep it open
+                # between flushes.
+                connection.close()
+
+    def drain(self):
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+            self._pending = 0
+        return counts
+
+    def flush(self):
+        """Upsert all buffered counts. Returns the number of rows written."""
+        with self._flush_lock:
+            counts = self.drain()
+            if not counts:
+                return 0
+            try:
+                _upsert(counts)
+            except Exception:
+                # Put the counts back so a transient DB error doesn't lose them
+                with self._lock:
+                    if len(self._counts) + len(counts) > MAX_RETAINED_ROWS:
+                        logger.error(f"Dropping {sum(counts.values())} page views after a failed flush")
+                    else:
+                        self._counts.update(counts)
+                        self._pending += sum(counts.values())
+                raise
+            return len(counts)
+
+
+def _upsert(counts):
+    table = connection.ops.quote_name(HourlyPageView._meta.db_table)
+    rows = [(kind, object_id, hour, views) for (kind, object_id, hour), views in counts.items()]
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+            batch = rows[start:start + UPSERT_BATCH_SIZE]
+            placeholders = ', '.join(['(%s, %s, %s, %s)'] * len(batch))
+            cursor.execute(
+                f"INSERT INTO {table} (kind, object_id, hour, views) VALUES {placeholders} "
+                f"ON CONFLICT (kind, object_id, hour) "
+                f"DO UPDATE SET views = {table}.views + EXCLUDED.views",
+                [value for row in batch for value in row],
+            )
+
+
+view_counter = ViewCounterBuffer(
+    flush_interval=getattr(settings, 'PAGE_VIEW_FLUSH_INTERVAL', 30),
+    flush_events=getattr(settings, 'PAGE_VIEW_FLUSH_EVENTS', 500),
+)
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        view_counter.flush()
+    except Exception:
+        logger.exception("Flushing page view counters at exit failed")
+
+
+def record_view(request, kind, object_id):
+    """Count one human GET of a detail page. Never touches the database."""
+    if request.method != 'GET' or is_bot(request):
+        return
+    view_counter.add(kind, object_id)
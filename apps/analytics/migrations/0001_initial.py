@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HourlyPageView',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('venue', 'Venue'), ('service', 'Service')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('hour', models.DateTimeField()),
+                ('views', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-hour'],
+                'indexes': [models.Index(fields=['hour'], name='analytics_h_hour_e511ee_idx')],
+                'unique_together': {('kind', 'object_id', 'hour')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import models
+
+class HourlyPageView(models.Model):
+    """
+    Detail page views per catalogue item per hour.
+
+    Rows are never written from the request path: views are buffered in
+    memory by ``apps.analytics.counters`` and upserted here in batches.
+    """
+    KIND_CHOICES = (
+        ('venue', 'Venue'),
+        ('service', 'Service'),
+    )
+    
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    hour = models.DateTimeField()
+    views = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['-hour']
+        unique_together = ('kind', 'object_id', 'hour')
+        indexes = [
+            models.Index(fields=['hour']),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} #{self.object_id} @ {self.hour:%Y-%m-%d %H:00}: {self.views}"
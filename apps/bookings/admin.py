@@ -6,10 +6,16 @@ class BookingServiceInline(admin.TabularInline):
     model = BookingService
     extra = 1
     raw_id_fields = ('service',)
+    
+    def get_queryset(self, request):
+        # Each row's label (BookingService.__str__) shows the service name
+        return super().get_queryset(request).select_related('service')
 
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
     list_display = ('id', 'get_booking_link', 'user', 'venue', 'event_date', 'phone_number', 'status', 'payment_status', 'total_cost', 'quoted_price')
+    # venue is nullable, so the admin's automatic select_related() would skip it
+    list_select_related = ('user', 'venue')
     list_filter = ('status', 'payment_status', 'event_date')
     search_fields = ('venue__name', 'user__username', 'user__email', 'event_type')
     date_hierarchy = 'event_date'
@@ -170,6 +176,8 @@ class BookingAdmin(admin.ModelAdmin):
 @admin.register(BookingService)
 class BookingServiceAdmin(admin.ModelAdmin):
     list_display = ('booking', 'service', 'quantity', 'price')
+    # Booking.__str__ shows the venue name
+    list_select_related = ('booking__venue', 'service')
     list_filter = ('booking__status',)
     search_fields = ('booking__id', 'service__name')
     raw_id_fields = ('booking', 'service')
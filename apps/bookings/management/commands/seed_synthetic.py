@@ -0,0 +1,48 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.bookings.synthetic import DEFAULT_VOLUMES, SyntheticDataGenerator, scaled_volumes
+
+
+class Command(BaseCommand):
+    help = (
+        "Populate the database with deterministic synthetic users, venues, services, photos, reviews, "
+        "favorites and bookings for load and scale testing. Adds to existing rows; use a scratch database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0,
+                            help='Multiplier for the default volumes (1.0 = 100k venues, 1M bookings, 2M reviews)')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed gives the same rows')
+        parser.add_argument('--batch-size', type=int, default=50_000, help='Rows per COPY/INSERT batch')
+        parser.add_argument('--database', default='default', help='Database alias to write to')
+        parser.add_argument('--force', action='store_true', help='Run even when DEBUG is off')
+        for name, count in DEFAULT_VOLUMES.items():
+            parser.add_argument(f"--{name.replace('_', '-')}", type=int, dest=name,
+                                help=f'Number of {name.replace("_", " ")} (default {count:,} x scale)')
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError("Refusing to add synthetic rows with DEBUG off; pass --force if this is a scratch database")
+        volumes = scaled_volumes(options['scale'], **{name: options[name] for name in DEFAULT_VOLUMES})
+        self.stdout.write(f"Seed {options['seed']}: " + ", ".join(f"{name} {count:,}" for name, count in volumes.items()))
+
+        def progress(timing):
+            self.stdout.write(
+                f"  {timing.table:<32} {timing.rows:>10,} rows {timing.seconds:>7.1f}s {timing.rows_per_second:>10,.0f} rows/s"
+            )
+
+        started = time.monotonic()
+        timings = SyntheticDataGenerator(
+            volumes, seed=options['seed'], batch_size=options['batch_size'],
+            using=options['database'], progress=progress,
+        ).run()
+        elapsed = time.monotonic() - started
+        rows = sum(timing.rows for timing in timings)
+        written = sum(timing.seconds for timing in timings)
+        self.stdout.write(self.style.SUCCESS(
+            f"Inserted {rows:,} rows in {elapsed:.1f}s ({written:.1f}s writing, "
+            f"{elapsed - written:.1f}s generating; {rows / elapsed:,.0f} rows/s)"
+        ))
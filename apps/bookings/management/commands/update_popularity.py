@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.bookings.popularity import update_popularity_scores
+
+
+class Command(BaseCommand):
+    help = "Recompute the time-decayed popularity score of venues and services (run periodically, e.g. hourly)"
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        updated = update_popularity_scores()
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated {updated['venues']} venues and {updated['services']} services "
+            f"in {time.monotonic() - started:.1f}s"
+        ))
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0011_add_quotation_fields'),
+        ('services', '0008_related_service'),
+        ('venues', '0013_related_venue_kind'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ServiceAffinity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('booking_count', models.PositiveIntegerField(default=0)),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='services.service')),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='service_affinities', to='services.service')),
+            ],
+            options={
+                'ordering': ['service', 'rank'],
+                'unique_together': {('service', 'rank')},
+            },
+        ),
+        migrations.CreateModel(
+            name='VenueServiceAffinity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('booking_count', models.PositiveIntegerField(default=0)),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='services.service')),
+                ('venue', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='service_affinities', to='venues.venue')),
+            ],
+            options={
+                'ordering': ['venue', 'rank'],
+                'unique_together': {('venue', 'rank')},
+            },
+        ),
+    ]
@@ -130,8 +130,46 @@ class BookingService(models.Model):
         unique_together = ('booking', 'service')
     
     def __str__(self):
-        return f"{self.service.name} for Booking #{self.booking.id}"
+        return f"{self.service.name} for Booking #{self.booking_id}"
     
     @property
     def total_price(self):
         return self.quantity * self.price
+
+class VenueServiceAffinity(models.Model):
+    """
+    Services most often booked together with a venue.
+
+    Rebuilt offline by ``manage.py build_co_booking_recommendations`` and read
+    by the "frequently booked together" panel in ``add_services``.
+    """
+    venue = models.ForeignKey(Venue, on_delete=models.CASCADE, related_name='service_affinities')
+    service = models.ForeignKey(Service, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    booking_count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['venue', 'rank']
+        unique_together = ('venue', 'rank')
+    
+    def __str__(self):
+        return f"{self.venue_id} + {self.service_id} (#{self.rank})"
+
+class ServiceAffinity(models.Model):
+    """
+    Services most often booked together with another service, used for
+    service-only bookings. Rebuilt alongside ``VenueServiceAffinity``.
+    """
+    service = models.ForeignKey(Service, on_delete=models.CASCADE, related_name='service_affinities')
+    related = models.ForeignKey(Service, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    booking_count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['service', 'rank']
+        unique_together = ('service', 'rank')
+    
+    def __str__(self):
+        return f"{self.service_id} + {self.related_id} (#{self.rank})"
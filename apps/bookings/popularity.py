@@ -0,0 +1,122 @@
+"""
+Time-decayed popularity scores for venues and services.
+
+Each signal (bookings, favorites, reviews, page views) is pre-aggregated
+per item per day with one GROUP BY in the database, so only
+``items x active days`` rows leave Postgres. The exponential decay and the
+weighted sum per item are then done with NumPy, and only scores that
+actually changed are written back to the indexed ``popularity_score``
+column with ``bulk_update``.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from envents_project.similarity import fetch_columns, index_positions
+from apps.analytics.models import HourlyPageView
+from apps.venues.models import Venue, FavoriteVenue, VenueReview
+from apps.services.models import Service, FavoriteService, ServiceReview
+from .models import Booking, BookingService
+
+# An event loses half its weight every HALF_LIFE_DAYS days
+HALF_LIFE_DAYS = 30
+
+
+@dataclass(frozen=True)
+class Signal:
+    """One source of popularity events for a catalogue model."""
+    name: str
+    queryset: object
+    item_field: str
+    time_field: str
+    weight: float
+    value: object = None  # aggregate per item/day, defaults to Count('pk')
+
+    def daily_totals(self, chunk_size=20000):
+        """Yield ``(item_id, day, total)`` rows aggregated in the database."""
+        return (
+            self.queryset
+            .annotate(day=TruncDate(self.time_field))
+            .values_list(self.item_field, 'day')
+            .annotate(total=self.value or Count('pk'))
+            .order_by()
+            .iterator(chunk_size=chunk_size)
+        )
+
+
+def venue_signals():
+    return [
+        Signal('bookings', Booking.objects.exclude(status='cancelled').filter(venue__isnull=False),
+               'venue_id', 'created_at', weight=5.0),
+        Signal('favorites', FavoriteVenue.objects.all(), 'venue_id', 'created_at', weight=3.0),
+        # Reviews count per rating point, so a 5-star review outweighs a 1-star one
+        Signal('reviews', VenueReview.objects.all(), 'venue_id', 'created_at', weight=1.0,
+               value=Sum('rating')),
+        Signal('views', HourlyPageView.objects.filter(kind='venue'), 'object_id', 'hour', weight=0.05,
+               value=Sum('views')),
+    ]
+
+
+def service_signals():
+    return [
+        Signal('bookings', BookingService.objects.exclude(booking__status='cancelled'),
+               'service_id', 'booking__created_at', weight=5.0),
+        Signal('favorites', FavoriteService.objects.all(), 'service_id', 'created_at', weight=3.0),
+        Signal('reviews', ServiceReview.objects.all(), 'service_id', 'created_at', weight=1.0,
+               value=Sum('rating')),
+        Signal('views', HourlyPageView.objects.filter(kind='service'), 'object_id', 'hour', weight=0.05,
+               value=Sum('views')),
+    ]
+
+
+def compute_scores(ids, signals, today=None):
+    """Decayed, weighted event totals for the sorted primary keys in ``ids``."""
+    today = (today or timezone.localdate()).toordinal()
+    scores = np.zeros(ids.size, dtype=np.float64)
+
+    for signal in signals:
+        item_ids, days, totals = [], [], []
+        for item_id, day, total in signal.daily_totals():
+            item_ids.append(item_id)
+            days.append(day.toordinal())
+            totals.append(total or 0)
+        if not item_ids:
+            continue
+
+        age = np.maximum(today - np.asarray(days, dtype=np.float64), 0)
+        contribution = signal.weight * np.asarray(totals, dtype=np.float64) * 0.5 ** (age / HALF_LIFE_DAYS)
+        positions, present = index_positions(ids, item_ids)
+        scores += np.bincount(positions[present], weights=contribution[present], minlength=ids.size)
+
+    return np.round(scores, 4)
+
+
+def _update_model(model, signals):
+    ids, current = fetch_columns(model.objects.order_by('id'), 'id', 'popularity_score', dtype=np.float64)
+    ids = ids.astype(np.int64)
+    scores = compute_scores(ids, signals)
+
+    changed = np.flatnonzero(np.abs(scores - current) > 1e-4)
+    with transaction.atomic():
+        model.objects.bulk_update(
+            [model(id=int(ids[i]), popularity_score=float(scores[i])) for i in changed],
+            ['popularity_score'],
+            batch_size=1000,
+        )
+    return int(changed.size)
+
+
+def update_popularity_scores():
+    """
+    Recompute ``popularity_score`` for all venues and services.
+
+    Returns the number of rows updated per model.
+    """
+    return {
+        'venues': _update_model(Venue, venue_signals()),
+        'services': _update_model(Service, service_signals()),
+    }
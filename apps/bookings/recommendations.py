@@ -0,0 +1,85 @@
+"""
+Collaborative "frequently booked together" recommendations.
+
+``manage.py build_co_booking_recommendations`` (see recommendations_build)
+stores the top-N co-booked neighbours of every venue and service.
+``add_services`` then reads one cached list per venue/service.
+"""
+from django.core.cache import cache
+
+from apps.services.models import Service
+from .models import VenueServiceAffinity, ServiceAffinity
+
+AFFINITY_TOP_N = 10
+AFFINITY_CACHE_TIMEOUT = 3600
+AFFINITY_VERSION_KEY = 'booking_affinity_version'
+
+
+def _cached_neighbours(prefix, model, source_field, target_field, source_ids):
+    """
+    Ranked ``(target_id, booking_count)`` lists for each source id, read from
+    the cache and filled with a single indexed query for the misses.
+    """
+    version = cache.get(AFFINITY_VERSION_KEY, 0)
+    keys = {source_id: f'{prefix}:{version}:{source_id}' for source_id in source_ids}
+    found = cache.get_many(keys.values())
+    result = {source_id: found[key] for source_id, key in keys.items() if key in found}
+
+    missing = [source_id for source_id in source_ids if source_id not in result]
+    if missing:
+        for source_id in missing:
+            result[source_id] = []
+        rows = (
+            model.objects
+            .filter(**{f'{source_field}__in': missing})
+            .order_by(source_field, 'rank')
+            .values_list(source_field, target_field, 'booking_count')
+        )
+        for source_id, target_id, booking_count in rows:
+            result[source_id].append((target_id, booking_count))
+        cache.set_many(
+            {keys[source_id]: result[source_id] for source_id in missing},
+            AFFINITY_CACHE_TIMEOUT,
+        )
+    return result
+
+
+def get_frequently_booked_services(booking, exclude_ids=(), exclude_category_name=None, limit=4):
+    """
+    Services frequently booked together with this booking's venue, or with
+    the services already on a service-only booking. Each returned service
+    carries a ``co_booking_count`` attribute for display.
+    """
+    if booking.venue_id:
+        neighbours = _cached_neighbours(
+            'venue_service_affinity', VenueServiceAffinity, 'venue_id', 'service_id', [booking.venue_id]
+        )[booking.venue_id]
+    else:
+        merged = {}
+        by_service = _cached_neighbours(
+            'service_affinity', ServiceAffinity, 'service_id', 'related_id', list(exclude_ids)
+        )
+        for entries in by_service.values():
+            for service_id, booking_count in entries:
+                merged[service_id] = merged.get(service_id, 0) + booking_count
+        neighbours = sorted(merged.items(), key=lambda item: -item[1])
+
+    counts = {service_id: booking_count for service_id, booking_count in neighbours
+              if service_id not in exclude_ids}
+    if not counts:
+        return []
+
+    services = Service.objects.filter(
+        id__in=list(counts)[:limit * 2], status='approved'
+    ).select_related('category').prefetch_related('photos')
+    if exclude_category_name:
+        services = services.exclude(category__name=exclude_category_name)
+    services = services.in_bulk()
+
+    recommended = []
+    for service_id, booking_count in counts.items():
+        if service_id in services:
+            service = services[service_id]
+            service.co_booking_count = booking_count
+            recommended.append(service)
+    return recommended[:limit]
@@ -0,0 +1,151 @@
+"""
+Offline build of the co-booking and co-favorite neighbour tables.
+
+``build_co_booking_recommendations`` streams booking, booking-service and
+favorite rows through ``values_list`` iterators into NumPy arrays, builds
+sparse co-occurrence matrices (venue x service and service x service from
+bookings, venue x venue from favorites) and stores the top-N neighbours of
+every item.
+"""
+import numpy as np
+from django.core.cache import cache
+from django.db import transaction
+
+from envents_project.similarity import (
+    co_occurrence, fetch_columns, index_positions, pair_counts, sparse_top_k,
+)
+from apps.venues.models import Venue, RelatedVenue
+from apps.venues.recommendations_build import co_favorite_matrix
+from apps.services.models import Service
+from .models import Booking, BookingService, VenueServiceAffinity, ServiceAffinity
+from .recommendations import AFFINITY_TOP_N, AFFINITY_VERSION_KEY
+
+def _approved_ids(model):
+    (ids,) = fetch_columns(model.objects.filter(status='approved').order_by('id'), 'id')
+    return ids
+
+
+def _cosine(left, right, counts, left_totals, right_totals):
+    return counts / np.sqrt(left_totals[left].astype(np.float64) * right_totals[right])
+
+
+def _bulk_store(model, rows, batch_size=5000):
+    """Insert ``rows`` (dicts of field values) in fixed-size batches."""
+    batch = []
+    for row in rows:
+        batch.append(model(**row))
+        if len(batch) >= batch_size:
+            model.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch)
+
+
+def build_co_booking_recommendations(top_n=AFFINITY_TOP_N, chunk_size=20000):
+    """
+    Recompute the co-booking and co-favorite neighbour tables.
+
+    Cancelled bookings are ignored. Scores are cosine-normalised counts so a
+    service that appears in every booking doesn't top every list. Returns a
+    dict with the number of rows stored per table.
+    """
+    venue_ids = _approved_ids(Venue)
+    service_ids = _approved_ids(Service)
+
+    booking_ids, booking_venues = fetch_columns(
+        Booking.objects.exclude(status='cancelled').filter(venue__isnull=False).order_by('id'),
+        'id', 'venue_id', chunk_size=chunk_size,
+    )
+    line_bookings, line_services = fetch_columns(
+        BookingService.objects.exclude(booking__status='cancelled'),
+        'booking_id', 'service_id', chunk_size=chunk_size,
+    )
+
+    # Booking lines -> (booking, service position), approved services only
+    service_pos, approved = index_positions(service_ids, line_services)
+    line_bookings, service_pos = line_bookings[approved], service_pos[approved]
+    service_totals = np.bincount(service_pos, minlength=service_ids.size)
+
+    # venue x service: join every line to its booking's venue
+    booking_pos, has_venue = index_positions(booking_ids, line_bookings)
+    line_venues = booking_venues[booking_pos] if booking_ids.size else booking_pos
+    venue_pos, venue_approved = index_positions(venue_ids, line_venues)
+    joined = has_venue & venue_approved
+    booking_venue_pos, booking_venue_ok = index_positions(venue_ids, booking_venues)
+    venue_totals = np.bincount(booking_venue_pos[booking_venue_ok], minlength=venue_ids.size)
+
+    venue_service_counts = pair_counts(venue_pos[joined], service_pos[joined], service_ids.size)
+    left, right, counts = venue_service_counts
+    venue_service = sparse_top_k(
+        left, right, _cosine(left, right, counts, venue_totals, service_totals), top_n
+    )
+
+    # service x service: services that share a booking
+    service_service_counts = co_occurrence(line_bookings, service_pos, service_ids.size)
+    left, right, counts = service_service_counts
+    service_service = sparse_top_k(
+        left, right, _cosine(left, right, counts, service_totals, service_totals), top_n
+    )
+
+    # venue x venue: venues favorited by the same users
+    venue_venue = sparse_top_k(*co_favorite_matrix(venue_ids), top_n)
+
+    with transaction.atomic():
+        VenueServiceAffinity.objects.all().delete()
+        ServiceAffinity.objects.all().delete()
+        RelatedVenue.objects.filter(kind='co_favorite').delete()
+
+        _bulk_store(VenueServiceAffinity, (
+            {
+                'venue_id': int(venue_ids[v]),
+                'service_id': int(service_ids[s]),
+                'rank': int(rank),
+                'score': float(score),
+                'booking_count': count,
+            }
+            for v, s, score, rank, count in zip(
+                *venue_service, _lookup_counts(venue_service, venue_service_counts, service_ids.size)
+            )
+        ))
+        _bulk_store(ServiceAffinity, (
+            {
+                'service_id': int(service_ids[a]),
+                'related_id': int(service_ids[b]),
+                'rank': int(rank),
+                'score': float(score),
+                'booking_count': count,
+            }
+            for a, b, score, rank, count in zip(
+                *service_service, _lookup_counts(service_service, service_service_counts, service_ids.size)
+            )
+        ))
+        _bulk_store(RelatedVenue, (
+            {
+                'venue_id': int(venue_ids[a]),
+                'related_id': int(venue_ids[b]),
+                'kind': 'co_favorite',
+                'rank': int(rank),
+                'score': float(score),
+            }
+            for a, b, score, rank in zip(*venue_venue)
+        ))
+
+    try:
+        cache.incr(AFFINITY_VERSION_KEY)
+    except ValueError:
+        cache.set(AFFINITY_VERSION_KEY, 1, None)
+
+    return {
+        'venue_service': int(venue_service[0].size),
+        'service_service': int(service_service[0].size),
+        'venue_venue': int(venue_venue[0].size),
+    }
+
+
+def _lookup_counts(top, pairs, n_right):
+    """Raw co-occurrence counts for the kept ``top`` entries."""
+    left, right = top[0], top[1]
+    pair_left, pair_right, counts = pairs
+    keys = pair_left * n_right + pair_right
+    positions = np.searchsorted(keys, left * n_right + right)
+    return (int(count) for count in counts[positions])
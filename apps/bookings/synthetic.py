@@ -0,0 +1,448 @@
+"""
+Synthetic catalogue and booking data for load and scale testing.
+
+Generates users, venues, services, photos, reviews, favorites, bookings and
+booking services at production-like volumes (``DEFAULT_VOLUMES``, scaled
+with ``scale``). Popularity is skewed: each venue and service gets a Zipf
+weight (``ZIPF_EXPONENT``) in a random order, and photos, reviews, favorites
+and bookings are drawn by that weight, so a few listings carry much of the
+traffic and the long tail has little, as in production.
+
+On an empty database the output depends only on the seed and the volumes
+(ids, and the names built from them, continue after existing rows). Rows
+are generated with NumPy and written with explicit ids in batches, using
+PostgreSQL ``COPY`` (psycopg 3) and ``executemany`` on other backends.
+Model ``save()`` methods and signals are bypassed, so denormalized fields
+(slug, geohash, total_cost) are filled here. Sequences are reset afterwards,
+so normal inserts continue after the synthetic ids.
+"""
+import datetime
+import time
+from dataclasses import dataclass
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connections
+from django.db.models import Max
+
+from apps.services.models import FavoriteService, Service, ServiceCategory, ServicePhoto, ServiceReview
+from apps.venues.geo import encode_geohash
+from apps.venues.models import Amenity, FavoriteVenue, Venue, VenueCategory, VenuePhoto, VenueReview
+from .models import Booking, BookingService
+
+DEFAULT_VOLUMES = {
+    'users': 200_000,
+    'venues': 100_000,
+    'services': 20_000,
+    'venue_photos': 300_000,
+    'service_photos': 50_000,
+    'venue_reviews': 1_600_000,
+    'service_reviews': 400_000,
+    'favorite_venues': 400_000,
+    'favorite_services': 80_000,
+    'bookings': 1_000_000,
+}
+
+# Weight of the listing ranked r is r ** -ZIPF_EXPONENT; at 0.8 the top 1% of
+# 100k venues draw about a fifth of the bookings
+ZIPF_EXPONENT = 0.8
+
+# Data covers the three years before this date; events run up to six months past it.
+# Fixed rather than today, so a seed always produces the same rows
+EPOCH = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+HISTORY_DAYS = 3 * 365
+
+# (city, share of listings, latitude, longitude)
+CITIES = (
+    ('Dhaka', 0.55, 23.8103, 90.4125),
+    ('Chittagong', 0.18, 22.3569, 91.7832),
+    ('Sylhet', 0.08, 24.8949, 91.8687),
+    ('Khulna', 0.07, 22.8456, 89.5403),
+    ('Rajshahi', 0.06, 24.3745, 88.6042),
+    ('Cox\'s Bazar', 0.06, 21.4272, 92.0058),
+)
+VENUE_CATEGORIES = ('Banquet Halls', 'Rooftops', 'Gardens', 'Convention Centers', 'Restaurants')
+SERVICE_CATEGORIES = ('Catering', 'Decoration', 'Photography', 'Music', 'Lighting')
+AMENITIES = ('Parking', 'Wi-Fi', 'Air Conditioning', 'Stage', 'Generator', 'Bridal Room', 'Projector')
+VENUE_NAMES = ('Grand', 'Royal', 'Garden', 'Lakeview', 'Skyline', 'Heritage', 'Palm', 'Crystal')
+VENUE_KINDS = ('Hall', 'Pavilion', 'Terrace', 'Courtyard', 'Ballroom', 'Lounge')
+SERVICE_KINDS = ('Caterers', 'Decor', 'Studio', 'Band', 'Lights')
+FIRST_NAMES = ('Ayesha', 'Rahim', 'Nadia', 'Karim', 'Farhana', 'Tanvir', 'Sadia', 'Imran')
+LAST_NAMES = ('Ahmed', 'Hossain', 'Rahman', 'Chowdhury', 'Islam', 'Khan', 'Sarker')
+EVENT_TYPES = ('Wedding', 'Holud', 'Birthday', 'Corporate', 'Reception', 'Conference')
+COMMENTS = ('Great place.', 'Lovely staff, would book again.', 'Good value.', 'A bit crowded.', 'Excellent!')
+# Every synthetic user (username synthetic<id>) logs in with this password
+PASSWORD = 'synthetic'
+# Ratings 1..5, skewed positive like most review sites
+RATING_WEIGHTS = (0.04, 0.06, 0.15, 0.35, 0.40)
+BOOKING_STATUSES = (('completed', 0.45), ('confirmed', 0.2), ('pending', 0.1), ('quotation', 0.15), ('cancelled', 0.1))
+PAYMENT_STATUSES = (('paid', 0.55), ('partial', 0.15), ('unpaid', 0.27), ('refunded', 0.03))
+
+
+def scaled_volumes(scale=1.0, **overrides):
+    volumes = {name: max(1, round(count * scale)) for name, count in DEFAULT_VOLUMES.items()}
+    volumes.update({name: count for name, count in overrides.items() if count is not None})
+    return volumes
+
+
+@dataclass
+class TableTiming:
+    table: str
+    rows: int
+    seconds: float
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+class _Table:
+    """
+    Writes rows of ``columns`` (attnames) to ``model``'s table; every other
+    column gets its field default, as the model would.
+    """
+
+    def __init__(self, model, columns, connection):
+        self.model = model
+        self.connection = connection
+        supplied = [model._meta.get_field(name) for name in columns]
+        defaults = [
+            field for field in model._meta.concrete_fields
+            if field not in supplied and not field.primary_key
+        ]
+        self.defaults = tuple(field.get_db_prep_save(field.get_default(), connection) for field in defaults)
+        quote = connection.ops.quote_name
+        names = ', '.join(quote(field.column) for field in supplied + defaults)
+        self.copy_sql = f'COPY {quote(model._meta.db_table)} ({names}) FROM STDIN'
+        placeholders = ', '.join(['%s'] * (len(supplied) + len(defaults)))
+        self.insert_sql = f'INSERT INTO {quote(model._meta.db_table)} ({names}) VALUES ({placeholders})'
+
+    def write(self, rows):
+        """Write an iterable of row tuples; returns how many were written."""
+        defaults, count = self.defaults, 0
+        with self.connection.cursor() as cursor:
+            raw = cursor.cursor
+            if self.connection.vendor == 'postgresql' and hasattr(raw, 'copy'):
+                with raw.copy(self.copy_sql) as copy:
+                    for row in rows:
+                        copy.write_row(row + defaults)
+                        count += 1
+            else:
+                batch = [row + defaults for row in rows]
+                cursor.executemany(self.insert_sql, batch)
+                count = len(batch)
+        return count
+
+
+class SyntheticDataGenerator:
+    def __init__(self, volumes, seed=0, batch_size=50_000, using='default', progress=None):
+        self.volumes = volumes
+        self.rng = np.random.default_rng(seed)
+        self.batch_size = batch_size
+        self.connection = connections[using]
+        self.progress = progress or (lambda timing: None)
+        self.timings = []
+        self._written = set()
+
+    def run(self):
+        try:
+            self.users()
+            self.venues()
+            self.services()
+            self.photos(VenuePhoto, 'venue_id', self.venue_ids, self.venue_weights, self.volumes['venue_photos'], 'venues')
+            self.photos(ServicePhoto, 'service_id', self.service_ids, self.service_weights, self.volumes['service_photos'], 'services')
+            self.reviews(VenueReview, 'venue_id', self.venue_ids, self.venue_weights, self.volumes['venue_reviews'])
+            self.reviews(ServiceReview, 'service_id', self.service_ids, self.service_weights, self.volumes['service_reviews'])
+            self.favorites(FavoriteVenue, 'venue_id', self.venue_ids, self.venue_weights, self.volumes['favorite_venues'])
+            self.favorites(FavoriteService, 'service_id', self.service_ids, self.service_weights, self.volumes['favorite_services'])
+            self.bookings()
+        finally:
+            self._reset_sequences()
+        return self.timings
+
+    # Helpers
+
+    def _table(self, model, columns):
+        self._written.add(model)
+        return _Table(model, columns, self.connection)
+
+    def _write(self, model, columns, rows):
+        """Write ``rows`` in batches, timing the whole table."""
+        table = self._table(model, columns)
+        started, written = time.perf_counter(), 0
+        for start in range(0, len(rows), self.batch_size):
+            written += table.write(rows[start:start + self.batch_size])
+        self._record(model._meta.db_table, written, time.perf_counter() - started)
+
+    def _record(self, table, rows, seconds):
+        timing = TableTiming(table, rows, seconds)
+        self.timings.append(timing)
+        self.progress(timing)
+
+    def _first_id(self, model):
+        return (model.objects.using(self.connection.alias).aggregate(top=Max('pk'))['top'] or 0) + 1
+
+    def _zipf_weights(self, count):
+        ranks = self.rng.permutation(count) + 1
+        weights = ranks ** -ZIPF_EXPONENT
+        return weights / weights.sum()
+
+    def _timestamps(self, count, days=HISTORY_DAYS):
+        """``count`` sorted datetimes spread over the ``days`` before EPOCH."""
+        seconds = np.sort(self.rng.integers(0, days * 86400, size=count))
+        start = EPOCH - datetime.timedelta(days=days)
+        return [start + datetime.timedelta(seconds=second) for second in seconds.tolist()]
+
+    def _pick(self, options, count):
+        names, shares = zip(*options)
+        return np.array(names, dtype=object)[self.rng.choice(len(names), size=count, p=shares)]
+
+    def _unique_pairs(self, item_ids, weights, count):
+        """``count`` distinct (item, user) pairs: items by weight, users uniformly."""
+        users = len(self.user_ids)
+        # Oversample so dropping duplicates still leaves enough pairs
+        draw = int(count * 1.3) + 16
+        items = self.rng.choice(len(item_ids), size=draw, p=weights)
+        keys = np.unique(items.astype(np.int64) * users + self.rng.integers(users, size=draw))
+        keys = self.rng.permutation(keys)[:count]
+        return item_ids[keys // users], self.user_ids[keys % users]
+
+    def _lookup_ids(self, model, names):
+        # Reuse the categories/amenities that exist; create the defaults on an empty database
+        manager = model.objects.using(self.connection.alias)
+        ids = list(manager.order_by('pk').values_list('pk', flat=True))
+        if not ids:
+            has_slug = any(field.name == 'slug' for field in model._meta.fields)
+            ids = [
+                manager.create(name=name, **({'slug': name.lower().replace(' ', '-')} if has_slug else {})).pk
+                for name in names
+            ]
+        return np.array(ids)
+
+    def _reset_sequences(self):
+        if not self._written:
+            return
+        statements = self.connection.ops.sequence_reset_sql(no_style(), sorted(self._written, key=str))
+        with self.connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+    # Tables
+
+    def users(self):
+        User = get_user_model()
+        count = self.volumes['users']
+        first = self._first_id(User)
+        self.user_ids = np.arange(first, first + count)
+        # 3% venue owners, 2% service providers, the rest customers
+        kinds = np.full(count, 'customer', dtype=object)
+        owners, providers = max(1, count * 3 // 100), max(1, count * 2 // 100)
+        kinds[:owners] = 'venue_owner'
+        kinds[owners:owners + providers] = 'service_provider'
+        self.owner_ids = self.user_ids[:owners]
+        self.provider_ids = self.user_ids[owners:owners + providers]
+        password = make_password(PASSWORD, salt='synthetic')
+        first_names = self.rng.choice(FIRST_NAMES, size=count).tolist()
+        last_names = self.rng.choice(LAST_NAMES, size=count).tolist()
+        rows = [
+            (user_id, f'synthetic{user_id}', f'synthetic{user_id}@example.com', password,
+             first_name, last_name, kind, joined)
+            for user_id, first_name, last_name, kind, joined in zip(
+                self.user_ids.tolist(), first_names, last_names, kinds.tolist(), self._timestamps(count),
+            )
+        ]
+        self._write(User, ('id', 'username', 'email', 'password', 'first_name', 'last_name', 'user_type', 'date_joined'), rows)
+
+    def venues(self):
+        count = self.volumes['venues']
+        first = self._first_id(Venue)
+        self.venue_ids = np.arange(first, first + count)
+        self.venue_weights = self._zipf_weights(count)
+        rng = self.rng
+
+        city_index = rng.choice(len(CITIES), size=count, p=[city[1] for city in CITIES])
+        latitudes = np.array([city[2] for city in CITIES])[city_index] + rng.normal(0, 0.04, count)
+        longitudes = np.array([city[3] for city in CITIES])[city_index] + rng.normal(0, 0.04, count)
+        capacities = np.clip(rng.lognormal(5.3, 0.6, count), 20, 3000).astype(int)
+        hourly = rng.random(count) < 0.8
+        prices = np.round(rng.lognormal(8.5, 0.5, count), -2).astype(int)
+        statuses = self._pick((('approved', 0.92), ('pending', 0.05), ('rejected', 0.03)), count)
+        self.venue_approved = statuses == 'approved'
+        featured = self.venue_approved & (rng.random(count) < 0.002)
+        owners = self.owner_ids[rng.choice(len(self.owner_ids), size=count, p=self._zipf_weights(len(self.owner_ids)))]
+        names = zip(rng.choice(VENUE_NAMES, size=count).tolist(), rng.choice(VENUE_KINDS, size=count).tolist())
+        # Booking generation needs these per venue
+        self.venue_capacities = capacities
+        self.venue_hourly = np.where(hourly, prices, 0)
+        self.venue_flat = np.where(hourly, 0, prices * 6)
+
+        rows = []
+        for venue_id, (adjective, kind), city, lat, lng, capacity, is_hourly, price, status, is_featured, owner, created in zip(
+            self.venue_ids.tolist(), names, city_index.tolist(), latitudes.tolist(), longitudes.tolist(),
+            capacities.tolist(), hourly.tolist(), prices.tolist(), statuses.tolist(), featured.tolist(),
+            owners.tolist(), self._timestamps(count),
+        ):
+            name = f'{adjective} {kind} {venue_id}'
+            rows.append((
+                venue_id, name, f'{adjective}-{kind}-{venue_id}'.lower(), f'{name} is a synthetic venue.',
+                CITIES[city][0], CITIES[city][0], f'{venue_id % 200 + 1} Road {venue_id % 40 + 1}',
+                lat, lng, encode_geohash(lat, lng), capacity,
+                'HOURLY' if is_hourly else 'FLAT', price if is_hourly else None, None if is_hourly else price * 6,
+                status, is_featured, owner, created, created,
+            ))
+        self._write(Venue, (
+            'id', 'name', 'slug', 'description', 'location', 'city', 'address', 'latitude', 'longitude', 'geohash',
+            'capacity', 'pricing_type', 'hourly_price', 'flat_price', 'status', 'is_featured', 'owner_id',
+            'created_at', 'updated_at',
+        ), rows)
+
+        categories = self._lookup_ids(VenueCategory, VENUE_CATEGORIES)
+        amenities = self._lookup_ids(Amenity, AMENITIES)
+        self._memberships(Venue.category.through, 'venuecategory_id', categories, 1, min(2, len(categories)))
+        self._memberships(Venue.amenities.through, 'amenity_id', amenities, min(2, len(amenities)), min(6, len(amenities)))
+
+    def _memberships(self, through, column, choices, low, high):
+        """Between ``low`` and ``high`` distinct ``choices`` per venue."""
+        rows = []
+        for venue_id, size in zip(self.venue_ids.tolist(), self.rng.integers(low, high + 1, len(self.venue_ids)).tolist()):
+            rows.extend((venue_id, choice) for choice in self.rng.choice(choices, size=size, replace=False).tolist())
+        self._write(through, ('venue_id', column), rows)
+
+    def services(self):
+        count = self.volumes['services']
+        first = self._first_id(Service)
+        self.service_ids = np.arange(first, first + count)
+        self.service_weights = self._zipf_weights(count)
+        rng = self.rng
+
+        categories = self._lookup_ids(ServiceCategory, SERVICE_CATEGORIES)
+        hourly = rng.random(count) < 0.5
+        prices = np.round(rng.lognormal(8.0, 0.6, count), -2).astype(int)
+        statuses = self._pick((('approved', 0.9), ('pending', 0.07), ('rejected', 0.03)), count)
+        self.service_price = np.where(hourly, prices * 4, prices * 5)  # charged per booking
+        providers = self.provider_ids[rng.choice(
+            len(self.provider_ids), size=count, p=self._zipf_weights(len(self.provider_ids)),
+        )]
+        rows = []
+        for service_id, kind, category, is_hourly, price, status, featured, provider, created in zip(
+            self.service_ids.tolist(), rng.choice(SERVICE_KINDS, size=count).tolist(),
+            rng.choice(categories, size=count).tolist(), hourly.tolist(), prices.tolist(), statuses.tolist(),
+            (rng.random(count) < 0.005).tolist(), providers.tolist(), self._timestamps(count),
+        ):
+            rows.append((
+                service_id, f'{kind} {service_id}', f'{kind}-{service_id}'.lower(), f'{kind} {service_id} is a synthetic service.',
+                category, 'HOURLY' if is_hourly else 'FLAT', price if is_hourly else None,
+                None if is_hourly else price * 5, status, featured and status == 'approved', provider, created, created,
+            ))
+        self._write(Service, (
+            'id', 'name', 'slug', 'description', 'category_id', 'pricing_type', 'hourly_price', 'flat_price',
+            'status', 'is_featured', 'provider_id', 'created_at', 'updated_at',
+        ), rows)
+
+    def photos(self, model, column, item_ids, weights, count, folder):
+        """One primary photo per item, the rest spread by popularity."""
+        extra = self.rng.choice(len(item_ids), size=max(0, count - len(item_ids)), p=weights)
+        per_item = np.bincount(extra, minlength=len(item_ids)) + 1
+        first = self._first_id(model)
+        rows, photo_id = [], first
+        uploaded = self._timestamps(int(per_item.sum()))
+        for item_id, photos in zip(item_ids.tolist(), per_item.tolist()):
+            for number in range(photos):
+                rows.append((
+                    photo_id, item_id, f'synthetic/{folder}/{item_id}-{number}.jpg',
+                    number == 0, uploaded[photo_id - first],
+                ))
+                photo_id += 1
+        self._write(model, ('id', column, 'image', 'is_primary', 'uploaded_at'), rows)
+
+    def reviews(self, model, column, item_ids, weights, count):
+        items, users = self._unique_pairs(item_ids, weights, count)
+        ratings = self.rng.choice(5, size=len(items), p=RATING_WEIGHTS) + 1
+        comments = self.rng.choice(COMMENTS, size=len(items)).tolist()
+        first = self._first_id(model)
+        rows = [
+            (first + index, item, user, rating, comment, created, created)
+            for index, (item, user, rating, comment, created) in enumerate(zip(
+                items.tolist(), users.tolist(), ratings.tolist(), comments, self._timestamps(len(items)),
+            ))
+        ]
+        self._write(model, ('id', column, 'user_id', 'rating', 'comment', 'created_at', 'updated_at'), rows)
+
+    def favorites(self, model, column, item_ids, weights, count):
+        items, users = self._unique_pairs(item_ids, weights, count)
+        first = self._first_id(model)
+        rows = [
+            (first + index, item, user, created)
+            for index, (item, user, created) in enumerate(zip(
+                items.tolist(), users.tolist(), self._timestamps(len(items)),
+            ))
+        ]
+        self._write(model, ('id', column, 'user_id', 'created_at'), rows)
+
+    def bookings(self):
+        """Bookings of approved venues by popularity; a third also book 1-3 services."""
+        rng, count = self.rng, self.volumes['bookings']
+        approved = np.flatnonzero(self.venue_approved)
+        venue_weights = self.venue_weights[approved] / self.venue_weights[approved].sum()
+        customers = self.user_ids[len(self.owner_ids) + len(self.provider_ids):]
+        if not len(customers):
+            customers = self.user_ids
+        bookings = self._table(Booking, (
+            'id', 'user_id', 'venue_id', 'booking_type', 'event_date', 'start_time', 'end_time', 'guest_count',
+            'event_type', 'status', 'payment_status', 'venue_cost', 'services_cost', 'total_cost',
+            'created_at', 'updated_at',
+        ))
+        booking_services = self._table(BookingService, ('id', 'booking_id', 'service_id', 'quantity', 'price'))
+        booking_id, service_row_id = self._first_id(Booking), self._first_id(BookingService)
+        booking_seconds = service_seconds = 0.0
+        booking_rows_written = service_rows_written = 0
+
+        for start in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - start)
+            venues = approved[rng.choice(len(approved), size=size, p=venue_weights)]
+            service_only = rng.random(size) < 0.05
+            created = self._timestamps(size)
+            lead_days = rng.integers(7, 180, size).tolist()
+            start_hours = rng.integers(10, 18, size)  # ends by 23:00
+            hours = rng.integers(3, 7, size)
+            guests = np.maximum(10, (self.venue_capacities[venues] * rng.uniform(0.3, 1.0, size)).astype(int))
+            venue_costs = np.where(self.venue_hourly[venues] > 0, self.venue_hourly[venues] * hours, self.venue_flat[venues])
+            venue_costs = np.where(service_only, 0, venue_costs)
+            # Number of services booked alongside: 0 for most, up to 3
+            service_counts = np.where(service_only, 1, rng.choice(4, size=size, p=(0.65, 0.2, 0.1, 0.05)))
+            picked = self.rng.choice(len(self.service_ids), size=int(service_counts.sum()), p=self.service_weights)
+
+            booking_rows, service_rows, offset = [], [], 0
+            for index, (venue, only, made, lead, hour, length, guest_count, venue_cost, services, user, event_type, status, payment) in enumerate(zip(
+                venues.tolist(), service_only.tolist(), created, lead_days, start_hours.tolist(), hours.tolist(),
+                guests.tolist(), venue_costs.tolist(), service_counts.tolist(),
+                customers[rng.integers(len(customers), size=size)].tolist(),
+                rng.choice(EVENT_TYPES, size=size).tolist(),
+                self._pick(BOOKING_STATUSES, size).tolist(), self._pick(PAYMENT_STATUSES, size).tolist(),
+            )):
+                services_cost = 0
+                for service in dict.fromkeys(picked[offset:offset + services].tolist()):
+                    price = int(self.service_price[service])
+                    service_rows.append((service_row_id, booking_id, int(self.service_ids[service]), 1, price))
+                    services_cost += price
+                    service_row_id += 1
+                offset += services
+                booking_rows.append((
+                    booking_id, user, None if only else int(self.venue_ids[venue]),
+                    'service_only' if only else 'venue', (made + datetime.timedelta(days=lead)).date(),
+                    datetime.time(hour), datetime.time(hour + length), guest_count, event_type, status, payment,
+                    venue_cost, services_cost, venue_cost + services_cost, made, made,
+                ))
+                booking_id += 1
+
+            started = time.perf_counter()
+            booking_rows_written += bookings.write(booking_rows)
+            booking_seconds += time.perf_counter() - started
+            started = time.perf_counter()
+            service_rows_written += booking_services.write(service_rows)
+            service_seconds += time.perf_counter() - started
+
+        self._record(Booking._meta.db_table, booking_rows_written, booking_seconds)
+        self._record(BookingService._meta.db_table, service_rows_written, service_seconds)
@@ -10,6 +10,7 @@ from .models import Booking, BookingService
 from apps.venues.models import Venue
 from apps.services.models import Service
 from .forms import BookingForm, BookingServiceForm
+from .recommendations import get_frequently_booked_services
 
 @login_required
 def booking_list(request):
@@ -17,7 +18,7 @@ def booking_list(request):
     # Get all bookings for the current user with related objects in a single query
     bookings = Booking.objects.filter(user=request.user).select_related(
         'venue', 'venue_catering_package'
-    ).prefetch_related('booking_services', 'booking_services__service')
+    ).prefetch_related('venue__photos', 'booking_services', 'booking_services__service')
     
     # Filter by status if specified
     status = request.GET.get('status')
@@ -133,7 +134,7 @@ def add_services(request, booking_id):
     exclude_catering = booking.uses_venue_catering
     
     # Get all available services with prefetch_related for packages to avoid N+1 queries
-    services = Service.objects.filter(status='approved').prefetch_related('packages').select_related('category')
+    services = Service.objects.filter(status='approved').prefetch_related('packages', 'photos').select_related('category')
     
     if request.method == 'POST':
         service_id = request.POST.get('service_id')
@@ -203,6 +204,13 @@ def add_services(request, booking_id):
     # Get current booking services with related data
     booking_services = booking.booking_services.select_related('service', 'package').all()
     
+    # "Frequently booked together" panel, read from the precomputed affinity tables
+    frequently_booked = get_frequently_booked_services(
+        booking,
+        exclude_ids={bs.service_id for bs in booking_services},
+        exclude_category_name='Catering' if exclude_catering else None,
+    )
+    
     # If venue catering is selected, create a form that excludes catering services
     form = BookingServiceForm(exclude_catering=exclude_catering)
     
@@ -223,6 +231,7 @@ def add_services(request, booking_id):
         'booking': booking,
         'services': services,
         'booking_services': booking_services,
+        'frequently_booked': frequently_booked,
         'form': form,
         'exclude_catering': exclude_catering,
         'categories': categories,
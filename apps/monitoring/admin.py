@@ -0,0 +1,70 @@
+from django.contrib import admin
+from django.db.models import Count
+from django.utils.html import format_html
+from .models import QueryPlan, SlowQuery
+
+class QueryPlanInline(admin.StackedInline):
+    model = QueryPlan
+    extra = 0
+    can_delete = False
+    fields = ('captured_at', 'duration_ms', 'view', 'call_site', 'database', 'analyzed', 'formatted_plan')
+    readonly_fields = fields
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_view_permission(self, request, obj=None):
+        return request.user.is_superuser
+
+    def formatted_plan(self, obj):
+        return format_html('<pre style="white-space: pre; overflow-x: auto">{}</pre>', obj.plan)
+    formatted_plan.short_description = 'Plan'
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ('short_sql', 'view', 'calls', 'avg_ms_display', 'max_ms_display', 'plan_count', 'last_seen')
+    list_filter = ('view',)
+    search_fields = ('sql', 'view', 'call_site')
+    date_hierarchy = 'last_seen'
+    readonly_fields = ('fingerprint', 'formatted_sql', 'calls', 'total_ms', 'max_ms', 'view', 'call_site',
+                       'first_seen', 'last_seen')
+    exclude = ('sql',)
+    inlines = [QueryPlanInline]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(plan_count=Count('plans'))
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    # Plans show the literal values queries ran with
+    def has_module_permission(self, request):
+        return request.user.is_superuser
+
+    def has_view_permission(self, request, obj=None):
+        return request.user.is_superuser
+
+    def short_sql(self, obj):
+        return obj.sql[:120]
+    short_sql.short_description = 'Query'
+
+    def formatted_sql(self, obj):
+        return format_html('<pre style="white-space: pre-wrap">{}</pre>', obj.sql)
+    formatted_sql.short_description = 'Query'
+
+    def avg_ms_display(self, obj):
+        return round(obj.avg_ms, 1)
+    avg_ms_display.short_description = 'Avg ms'
+
+    def max_ms_display(self, obj):
+        return round(obj.max_ms, 1)
+    max_ms_display.short_description = 'Max ms'
+    max_ms_display.admin_order_field = 'max_ms'
+
+    def plan_count(self, obj):
+        return obj.plan_count
+    plan_count.short_description = 'Plans'
+    plan_count.admin_order_field = 'plan_count'
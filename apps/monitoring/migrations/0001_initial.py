@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=40, unique=True)),
+                ('sql', models.TextField()),
+                ('calls', models.PositiveIntegerField(default=0)),
+                ('total_ms', models.FloatField(default=0)),
+                ('max_ms', models.FloatField(default=0)),
+                ('view', models.CharField(blank=True, max_length=200)),
+                ('call_site', models.CharField(blank=True, max_length=300)),
+                ('first_seen', models.DateTimeField()),
+                ('last_seen', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name_plural': 'slow queries',
+                'ordering': ['-total_ms'],
+            },
+        ),
+        migrations.CreateModel(
+            name='QueryPlan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('captured_at', models.DateTimeField()),
+                ('duration_ms', models.FloatField(help_text='Time the query took in the request')),
+                ('view', models.CharField(blank=True, max_length=200)),
+                ('call_site', models.CharField(blank=True, max_length=300)),
+                ('database', models.CharField(max_length=50)),
+                ('analyzed', models.BooleanField(default=True)),
+                ('plan', models.TextField()),
+                ('query', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='plans', to='monitoring.slowquery')),
+            ],
+            options={
+                'ordering': ['-captured_at'],
+            },
+        ),
+    ]
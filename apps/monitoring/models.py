@@ -0,0 +1,51 @@
+from django.db import models
+
+class SlowQuery(models.Model):
+    """
+    Queries that took longer than ``SLOW_QUERY_THRESHOLD_MS``, one row per
+    normalized SQL. Written in batches by ``apps.monitoring.slow_queries``.
+    """
+    fingerprint = models.CharField(max_length=40, unique=True)
+    sql = models.TextField()
+    calls = models.PositiveIntegerField(default=0)
+    total_ms = models.FloatField(default=0)
+    max_ms = models.FloatField(default=0)
+    # Where it last ran; earlier views and call sites are on its plans
+    view = models.CharField(max_length=200, blank=True)
+    call_site = models.CharField(max_length=300, blank=True)
+    first_seen = models.DateTimeField()
+    last_seen = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-total_ms']
+        verbose_name_plural = 'slow queries'
+
+    def __str__(self):
+        return self.sql[:80]
+
+    @property
+    def avg_ms(self):
+        return self.total_ms / self.calls if self.calls else 0
+
+
+class QueryPlan(models.Model):
+    """
+    A sampled ``EXPLAIN (ANALYZE, BUFFERS)`` of a slow query, run after the
+    request by the flushing thread. Only the newest ``SLOW_QUERY_PLANS_KEPT``
+    are kept per query.
+    """
+    query = models.ForeignKey(SlowQuery, on_delete=models.CASCADE, related_name='plans')
+    captured_at = models.DateTimeField()
+    duration_ms = models.FloatField(help_text="Time the query took in the request")
+    view = models.CharField(max_length=200, blank=True)
+    call_site = models.CharField(max_length=300, blank=True)
+    database = models.CharField(max_length=50)
+    # False when ANALYZE hit the timeout and the plan holds estimates only
+    analyzed = models.BooleanField(default=True)
+    plan = models.TextField()
+
+    class Meta:
+        ordering = ['-captured_at']
+
+    def __str__(self):
+        return f"Plan of {self.query_id} @ {self.captured_at:%Y-%m-%d %H:%M:%S}"
@@ -0,0 +1,305 @@
+"""
+Slow-query capture with sampled EXPLAIN ANALYZE.
+
+``SlowQueryMiddleware`` times each query a request runs (an execute wrapper
+on every connection, as for the request metrics). Queries slower than
+``SLOW_QUERY_THRESHOLD_MS`` are noted in memory with the view and the
+project line that ran them; for a ``SLOW_QUERY_EXPLAIN_RATE`` fraction of
+the plain SELECTs the parameters are kept too, so they can be explained.
+
+A background thread per process drains the notes every
+``SLOW_QUERY_FLUSH_INTERVAL`` seconds. It upserts totals per fingerprint
+(the normalized SQL, see envents_project.nplusone) into ``SlowQuery`` and,
+at most once per fingerprint and flush, runs ``EXPLAIN (ANALYZE, BUFFERS)``
+on the database that ran the query, in a transaction it rolls back, keeping
+the newest ``SLOW_QUERY_PLANS_KEPT`` plans per query. Requests never wait on
+any of it. Staff browse the queries and their plans in the admin.
+
+ANALYZE runs the query again, so it is cut off after
+``SLOW_QUERY_EXPLAIN_TIMEOUT`` seconds and the plain EXPLAIN's estimates are
+stored instead. Plans show the query's literal values, so queries on the
+session and account tables (``PRIVATE_APPS``) are never explained nor their
+parameters kept, and only superusers see the queries in the admin.
+"""
+import atexit
+import hashlib
+import logging
+import os
+import random
+import threading
+import re
+import time
+from collections import deque, namedtuple
+from contextvars import ContextVar
+from functools import lru_cache
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import OperationalError, connection, connections, transaction
+from django.db.backends.signals import connection_created
+from django.utils import timezone
+
+from envents_project.nplusone import call_site, ignore_in_call_sites, normalize_sql
+
+from .models import QueryPlan, SlowQuery
+
+logger = logging.getLogger(__name__)
+
+# Slow queries held between flushes; past this the oldest are dropped
+BUFFER_SIZE = 1000
+
+# Apps whose tables hold session keys, emails and password hashes, which
+# their plans would show
+PRIVATE_APPS = ('sessions', 'auth', 'accounts')
+
+_current = ContextVar('slow_queries', default=None)
+
+ignore_in_call_sites(__file__)
+
+Capture = namedtuple('Capture', 'sql params explain database duration_ms view call_site at')
+
+
+class _RequestState:
+    __slots__ = ('request', 'threshold', 'explain_rate')
+
+    def __init__(self, request, threshold, explain_rate):
+        self.request = request
+        self.threshold = threshold
+        self.explain_rate = explain_rate
+
+
+def fingerprint(sql):
+    return hashlib.sha1(normalize_sql(sql).encode()).hexdigest()
+
+
+@lru_cache(maxsize=1)
+def _private_tables():
+    tables = {
+        model._meta.db_table
+        for config in apps.get_app_configs() if config.label in PRIVATE_APPS
+        for model in config.get_models(include_auto_created=True)
+    }
+    return re.compile(r'\b(?:%s)\b' % '|'.join(map(re.escape, sorted(tables))))
+
+
+def _explainable(sql):
+    # EXPLAIN ANALYZE executes the statement; only re-run reads, and none that
+    # would put private values in a plan
+    upper = sql.lstrip().upper()
+    return upper.startswith('SELECT') and ' FOR UPDATE' not in upper and not _private_tables().search(sql)
+
+
+def _time_query(execute, sql, params, many, context):
+    state = _current.get()
+    if state is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration_ms = (time.perf_counter() - started) * 1000
+        if duration_ms >= state.threshold:
+            _capture(state, sql, params, many, context['connection'].alias, duration_ms)
+
+
+def _capture(state, sql, params, many, database, duration_ms):
+    explain = not many and random.random() < state.explain_rate and _explainable(sql)
+    match = state.request.resolver_match
+    slow_query_log.add(Capture(
+        sql=sql, params=params if explain else None, explain=explain, database=database,
+        duration_ms=duration_ms, view=match.view_name if match else '<unresolved>',
+        call_site=call_site(), at=timezone.now(),
+    ))
+
+
+def _install_timer(sender, connection, **kwargs):
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+class SlowQueryLog:
+    def __init__(self, flush_interval):
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._captured = deque(maxlen=BUFFER_SIZE)
+        self._worker = None
+        self._pid = None
+
+    def add(self, capture):
+        with self._lock:
+            self._ensure_worker()
+            self._captured.append(capture)
+
+    def _ensure_worker(self):
+        # Started lazily (and again after a fork) so only gunicorn's workers
+        # run the thread, as for the page view counters
+        if self._pid == os.getpid() and self._worker.is_alive():
+            return
+        if self._pid != os.getpid():
+            self._captured.clear()
+        self._pid = os.getpid()
+        self._worker = threading.Thread(target=self._run, name='slow-query-flusher', daemon=True)
+        self._worker.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Recording slow queries failed")
+            finally:
+                # Connections opened by this thread, including the replicas'
+                connections.close_all()
+
+    def drain(self):
+        with self._lock:
+            captured = list(self._captured)
+            self._captured.clear()
+        return captured
+
+    def flush(self, explain=True):
+        """Record the captured queries and explain the sampled ones. Returns the number recorded."""
+        with self._flush_lock:
+            captured = self.drain()
+            if not captured:
+                return 0
+            query_ids = _record(captured)
+            if explain:
+                samples = {}
+                for capture in captured:
+                    if capture.explain:
+                        samples.setdefault(fingerprint(capture.sql), capture)
+                _store_plans(query_ids, samples)
+            return len(captured)
+
+
+def _record(captured):
+    """Upsert the per-fingerprint totals; returns {fingerprint: SlowQuery id}."""
+    totals = {}
+    for capture in captured:
+        key = fingerprint(capture.sql)
+        row = totals.get(key)
+        if row is None:
+            row = totals[key] = {
+                'sql': normalize_sql(capture.sql), 'calls': 0, 'total_ms': 0, 'max_ms': 0, 'first_seen': capture.at,
+            }
+        row['calls'] += 1
+        row['total_ms'] += capture.duration_ms
+        row['max_ms'] = max(row['max_ms'], capture.duration_ms)
+        row.update(view=capture.view, call_site=capture.call_site, last_seen=capture.at)
+
+    table = connection.ops.quote_name(SlowQuery._meta.db_table)
+    columns = ('fingerprint', 'sql', 'calls', 'total_ms', 'max_ms', 'view', 'call_site', 'first_seen', 'last_seen')
+    placeholders = ', '.join(['(%s)' % ', '.join(['%s'] * len(columns))] * len(totals))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES {placeholders} "
+            f"ON CONFLICT (fingerprint) DO UPDATE SET "
+            f"calls = {table}.calls + EXCLUDED.calls, total_ms = {table}.total_ms + EXCLUDED.total_ms, "
+            f"max_ms = GREATEST({table}.max_ms, EXCLUDED.max_ms), view = EXCLUDED.view, "
+            f"call_site = EXCLUDED.call_site, last_seen = EXCLUDED.last_seen "
+            f"RETURNING fingerprint, id",
+            [key if column == 'fingerprint' else row[column] for key, row in totals.items() for column in columns],
+        )
+        return dict(cursor.fetchall())
+
+
+def explain_query(sql, params, database):
+    """
+    ``(plan, analyzed)`` for the query on ``database``, run in a transaction
+    that is rolled back; None on databases other than PostgreSQL.
+    """
+    target = connections[database]
+    if target.vendor != 'postgresql':
+        return None
+    timeout_ms = int(getattr(settings, 'SLOW_QUERY_EXPLAIN_TIMEOUT', 30) * 1000)
+    for analyze in (True, False):
+        try:
+            with transaction.atomic(using=database):
+                with target.cursor() as cursor:
+                    cursor.execute("SELECT set_config('statement_timeout', %s, true)", [str(timeout_ms)])
+                    prefix = target.ops.explain_query_prefix(analyze=True, buffers=True) if analyze else 'EXPLAIN'
+                    cursor.execute(f'{prefix} {sql}', params)
+                    plan = '\n'.join(row[0] for row in cursor.fetchall())
+                transaction.set_rollback(True, using=database)
+            return plan, analyze
+        except OperationalError:
+            # Cancelled by the timeout: fall back to the estimates
+            if not analyze:
+                raise
+
+
+def _store_plans(query_ids, samples):
+    plans = []
+    for key, capture in samples.items():
+        try:
+            result = explain_query(capture.sql, capture.params, capture.database)
+        except Exception:
+            logger.exception(f"Explaining slow query from {capture.call_site} failed")
+            continue
+        if result is not None:
+            plans.append(QueryPlan(
+                query_id=query_ids[key], captured_at=capture.at, duration_ms=capture.duration_ms,
+                view=capture.view, call_site=capture.call_site, database=capture.database,
+                plan=result[0], analyzed=result[1],
+            ))
+    QueryPlan.objects.bulk_create(plans)
+    kept = getattr(settings, 'SLOW_QUERY_PLANS_KEPT', 5)
+    for query_id in {plan.query_id for plan in plans}:
+        stale = QueryPlan.objects.filter(query_id=query_id).values_list('pk', flat=True)[kept:]
+        QueryPlan.objects.filter(pk__in=list(stale)).delete()
+
+
+slow_query_log = SlowQueryLog(flush_interval=getattr(settings, 'SLOW_QUERY_FLUSH_INTERVAL', 10))
+
+
+@atexit.register
+def _flush_on_exit():
+    # Totals only: explaining could hold up the shutdown
+    try:
+        slow_query_log.flush(explain=False)
+    except Exception:
+        logger.exception("Recording slow queries at exit failed")
+
+
+class SlowQueryMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', None) is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        connection_created.connect(_install_timer, dispatch_uid='slow-queries')
+        # Connections this thread opened before the middleware was loaded
+        for existing in connections.all(initialized_only=True):
+            _install_timer(None, existing)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _current.set(self._state(request))
+        try:
+            return self.get_response(request)
+        finally:
+            _current.reset(token)
+
+    async def __acall__(self, request):
+        token = _current.set(self._state(request))
+        try:
+            return await self.get_response(request)
+        finally:
+            _current.reset(token)
+
+    def _state(self, request):
+        threshold = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', None)
+        return _RequestState(
+            request, float('inf') if threshold is None else threshold,
+            getattr(settings, 'SLOW_QUERY_EXPLAIN_RATE', 0),
+        )
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ServicesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.services'
+    
+    def ready(self):
+        import apps.services.signals  # Queue photo derivatives on upload
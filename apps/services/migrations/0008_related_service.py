@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0007_add_dynamic_pricing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedService',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='services.service')),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_entries', to='services.service')),
+            ],
+            options={
+                'ordering': ['service', 'rank'],
+                'unique_together': {('service', 'rank')},
+            },
+        ),
+    ]
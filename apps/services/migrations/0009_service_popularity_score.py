@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0008_related_service'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='service',
+            name='popularity_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['status', '-popularity_score'], name='services_se_status_04a28f_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:56
+
+import envents_project.content_addressed
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0011_image_metadata'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='servicephoto',
+            name='image',
+            field=models.ImageField(upload_to=envents_project.content_addressed.ContentAddressedUploadTo('services/photos/', 'image')),
+        ),
+    ]
@@ -3,6 +3,7 @@ from django.urls import reverse
 from django.conf import settings
 from django.utils.text import slugify
 from django.core.validators import MinValueValidator, MaxValueValidator
+from envents_project.content_addressed import ContentAddressedUploadTo
 
 class ServiceCategory(models.Model):
     name = models.CharField(max_length=100)
@@ -47,6 +48,9 @@ class Service(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     is_featured = models.BooleanField(default=False)
     
+    # Time-decayed popularity, recomputed in batch by `manage.py update_popularity`
+    popularity_score = models.FloatField(default=0, editable=False)
+    
     # Provider field links to User model
     provider = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -63,6 +67,7 @@ class Service(models.Model):
         indexes = [
             models.Index(fields=['status']),
             models.Index(fields=['category']),
+            models.Index(fields=['status', '-popularity_score']),  # sort=popular
         ]
     
     def __str__(self):
@@ -78,7 +83,10 @@ class Service(models.Model):
     
     @property
     def main_photo(self):
-        return self.photos.filter(is_primary=True).first() or self.photos.first()
+        # Photos are ordered primary-first, so the first photo is the main one.
+        # Unlike filtering on is_primary, this reads prefetch_related('photos')
+        # instead of querying once per card
+        return self.photos.first()
     
     @property
     def display_price(self):
@@ -103,7 +111,17 @@ class Service(models.Model):
 
 class ServicePhoto(models.Model):
     service = models.ForeignKey(Service, on_delete=models.CASCADE, related_name='photos')
-    image = models.ImageField(upload_to='services/photos/')
+    image = models.ImageField(upload_to=ContentAddressedUploadTo('services/photos/', 'image'))
+    # Resized variants written by envents_project.image_derivatives:
+    # {variant: {'width', 'height', 'webp', 'jpeg'}}
+    derivatives = models.JSONField(default=dict, blank=True, editable=False)
+    # Captured at upload time (envents_project.media_metadata) so size and
+    # dimensions never need a storage round trip
+    image_size = models.PositiveBigIntegerField(null=True, blank=True, editable=False)
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_sha256 = models.CharField(max_length=64, blank=True, editable=False)
+    image_mime_type = models.CharField(max_length=50, blank=True, editable=False)
     caption = models.CharField(max_length=255, blank=True)
     is_primary = models.BooleanField(default=False)
     uploaded_at = models.DateTimeField(auto_now_add=True)
@@ -168,3 +186,22 @@ class ServicePackage(models.Model):
     
     def __str__(self):
         return f"{self.service.name}: {self.name}"
+
+class RelatedService(models.Model):
+    """
+    Precomputed "related services" for the detail page.
+
+    Rebuilt offline by ``manage.py build_related_services``; the detail view
+    only reads the ranked ids for one service through the (service, rank) index.
+    """
+    service = models.ForeignKey(Service, on_delete=models.CASCADE, related_name='related_entries')
+    related = models.ForeignKey(Service, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    
+    class Meta:
+        ordering = ['service', 'rank']
+        unique_together = ('service', 'rank')
+    
+    def __str__(self):
+        return f"{self.service_id} -> {self.related_id} (#{self.rank})"
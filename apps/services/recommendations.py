@@ -0,0 +1,49 @@
+"""
+"Related services" for the detail page.
+
+Same approach as ``apps.venues.recommendations``: ``manage.py
+build_related_services`` (see recommendations_build) stores the ranked
+top-N in ``RelatedService`` so the detail page reads ids instead of
+querying.
+"""
+from django.core.cache import cache
+
+from .models import Service, RelatedService
+
+RELATED_TOP_N = 12
+RELATED_CACHE_TIMEOUT = 3600
+RELATED_VERSION_KEY = 'related_services_version'
+
+
+def get_related_service_ids(service_id):
+    """Ranked related service ids, served from the cache when possible."""
+    version = cache.get(RELATED_VERSION_KEY, 0)
+    cache_key = f'related_services:{version}:{service_id}'
+    related_ids = cache.get(cache_key)
+    if related_ids is None:
+        related_ids = list(
+            RelatedService.objects
+            .filter(service_id=service_id)
+            .order_by('rank')
+            .values_list('related_id', flat=True)
+        )
+        cache.set(cache_key, related_ids, RELATED_CACHE_TIMEOUT)
+    return related_ids
+
+
+def get_related_services(service, limit=3):
+    """
+    Related services for the detail page, best match first.
+
+    Falls back to same-category services until the batch job has covered
+    this service.
+    """
+    related_ids = get_related_service_ids(service.id)
+    queryset = Service.objects.filter(status='approved').select_related(
+        'category', 'provider'
+    ).prefetch_related('photos')
+    if not related_ids:
+        return list(queryset.filter(category=service.category_id).exclude(id=service.id)[:limit])
+
+    services = queryset.filter(id__in=related_ids[:limit * 2]).in_bulk()
+    return [services[pk] for pk in related_ids if pk in services][:limit]
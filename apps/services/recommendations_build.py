@@ -0,0 +1,124 @@
+"""
+Offline build of the "related services" table.
+
+Same approach as ``apps.venues.recommendations_build``:
+``build_related_services`` scores approved services against each other from
+a NumPy feature matrix (category, price proximity, co-favorites) and stores
+the ranked top-N in ``RelatedService``.
+"""
+import math
+
+import numpy as np
+from django.core.cache import cache
+from django.db import transaction
+
+from envents_project.similarity import (
+    co_occurrence, fetch_columns, index_positions, rows_slice, top_k,
+)
+from .models import Service, FavoriteService, RelatedService
+from .recommendations import RELATED_TOP_N, RELATED_VERSION_KEY
+
+WEIGHTS = {
+    'category': 0.6,
+    'price': 0.2,
+    'co_favorite': 0.2,
+}
+
+
+def _load_features():
+    """Read the approved catalogue into flat NumPy arrays."""
+    rows = (
+        Service.objects
+        .filter(status='approved')
+        .order_by('id')
+        .values_list('id', 'category_id', 'pricing_type', 'hourly_price', 'flat_price')
+        .iterator(chunk_size=5000)
+    )
+    ids, categories, price = [], [], []
+    for service_id, category_id, pricing_type, hourly_price, flat_price in rows:
+        ids.append(service_id)
+        categories.append(category_id)
+        effective = hourly_price if pricing_type == 'HOURLY' else flat_price
+        price.append(math.log1p(float(effective)) if effective else np.nan)
+
+    return {
+        'ids': np.asarray(ids, dtype=np.int64),
+        'category': np.asarray(categories, dtype=np.int64),
+        'price': np.asarray(price, dtype=np.float32),
+    }
+
+
+def _load_co_favorites(ids):
+    """Co-favorite cosine between services as a row-sorted sparse matrix."""
+    user_ids, service_ids = fetch_columns(
+        FavoriteService.objects.filter(service__status='approved'), 'user_id', 'service_id'
+    )
+    positions, present = index_positions(ids, service_ids)
+    left, right, counts = co_occurrence(user_ids[present], positions[present], ids.size)
+    popularity = np.bincount(positions[present], minlength=ids.size).astype(np.float32)
+    weights = counts / np.sqrt(popularity[left] * popularity[right])
+    return left, right, weights.astype(np.float32)
+
+
+def _score_block(features, co_favorites, start, stop):
+    w = WEIGHTS
+    block = slice(start, stop)
+
+    scores = w['category'] * (
+        features['category'][block, None] == features['category'][None, :]
+    ).astype(np.float32)
+    price_similarity = np.exp(-np.abs(features['price'][block, None] - features['price'][None, :]))
+    scores += w['price'] * np.nan_to_num(price_similarity, nan=0.0)
+
+    left, right, weights = co_favorites
+    nnz = rows_slice(left, start, stop)
+    scores[left[nnz] - start, right[nnz]] += w['co_favorite'] * weights[nnz]
+
+    rows = np.arange(stop - start)
+    scores[rows, rows + start] = -np.inf
+    return scores
+
+
+def build_related_services(top_n=RELATED_TOP_N, block_size=256):
+    """
+    Recompute ``RelatedService`` for every approved service.
+
+    Returns the number of stored rows; see ``build_related_venues`` for the
+    blocking and cache invalidation strategy.
+    """
+    features = _load_features()
+    ids = features['ids']
+    co_favorites = _load_co_favorites(ids)
+    stored = 0
+
+    with transaction.atomic():
+        RelatedService.objects.all().delete()
+        for start in range(0, ids.size, block_size):
+            stop = min(start + block_size, ids.size)
+            scores = _score_block(features, co_favorites, start, stop)
+            best = top_k(scores, top_n)
+            best_scores = np.take_along_axis(scores, best, axis=1)
+
+            entries = [
+                RelatedService(
+                    service_id=int(ids[start + row]),
+                    related_id=int(ids[col]),
+                    rank=rank,
+                    score=float(score),
+                )
+                for row in range(stop - start)
+                for rank, (col, score) in enumerate(zip(best[row], best_scores[row]))
+                if np.isfinite(score)
+            ]
+            RelatedService.objects.bulk_create(entries, batch_size=5000)
+            stored += len(entries)
+
+    _bump_version()
+    return stored
+
+
+def _bump_version():
+    try:
+        cache.incr(RELATED_VERSION_KEY)
+    except ValueError:
+        cache.set(RELATED_VERSION_KEY, 1, None)
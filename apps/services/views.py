@@ -3,8 +3,22 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Q, Avg, Count
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from apps.analytics.counters import record_view
 from .models import Service, ServiceCategory, ServiceReview, FavoriteService
 from .forms import ServiceReviewForm
+from .recommendations import get_related_services
+
+def _add_ratings(services):
+    """Set avg_rating and review_count on a page of services, with one query."""
+    ratings = {
+        row['pk']: row for row in
+        Service.objects.filter(pk__in=[service.pk for service in services]).values('pk').annotate(
+            avg_rating=Avg('reviews__rating'), review_count=Count('reviews'),
+        )
+    }
+    for service in services:
+        service.avg_rating = ratings[service.pk]['avg_rating']
+        service.review_count = ratings[service.pk]['review_count']
 
 def service_list(request):
     """Display list of services with filtering options"""
@@ -35,16 +49,20 @@ def service_list(request):
             Q(pricing_type='FLAT', flat_price__lte=max_price)
         )
     
+    sort = request.GET.get('sort', 'name')
+
     # ⚡ PERFORMANCE OPTIMIZATION: Apply annotations AFTER filtering
     # This way we only calculate avg_rating and review_count for filtered results
     # Instead of ALL services, then filtering (which wastes CPU on filtered-out rows)
-    services = services.annotate(
-        avg_rating=Avg('reviews__rating'),
-        review_count=Count('reviews')
-    )
+    # sort=popular adds them to the page's services only (below): their GROUP BY
+    # would keep the (status, -popularity_score) index from serving the ORDER BY
+    if sort != 'popular':
+        services = services.annotate(
+            avg_rating=Avg('reviews__rating'),
+            review_count=Count('reviews')
+        )
     
     # Sorting (handles both hourly and flat pricing)
-    sort = request.GET.get('sort', 'name')
     if sort == 'price_asc':
         from django.db.models import Case, When, F
         services = services.annotate(
@@ -65,6 +83,10 @@ def service_list(request):
         ).order_by('-effective_price')
     elif sort == 'rating':
         services = services.order_by('-avg_rating')  # avg_rating already annotated above
+    elif sort == 'popular':
+        # Precomputed by `manage.py update_popularity`; the page is read off the
+        # (status, -popularity_score) index
+        services = services.order_by('-popularity_score', 'id')
     else:
         services = services.order_by('name')
     
@@ -77,6 +99,8 @@ def service_list(request):
         services = paginator.page(1)
     except EmptyPage:
         services = paginator.page(paginator.num_pages)
+    if sort == 'popular':
+        _add_ratings(services)
     
     return render(request, 'services/service_list.html', {
         'services': services,
@@ -101,12 +125,11 @@ def service_detail(request, slug):
     # Get service packages with efficient querying
     packages = service.packages.filter(is_active=True).order_by('order', 'name')
     
-    # Get related services with optimization
-    related_services = Service.objects.filter(
-        category=service.category, status='approved'
-    ).select_related('category', 'provider').prefetch_related(
-        'photos'
-    ).exclude(id=service.id)[:3]
+    # Buffered in memory and flushed in batches - no write on the request path
+    record_view(request, 'service', service.id)
+    
+    # Related services come from the precomputed recommendation table (cached)
+    related_services = get_related_services(service, limit=3)
     
     # Check if favorited
     is_favorite = False
@@ -1,3 +1,5 @@
+import logging
+
 from django.contrib import admin
 from .models import (
     Amenity, 
@@ -10,10 +12,13 @@ from .models import (
     VenueCateringPackage
 )
 
+logger = logging.getLogger(__name__)
+
 class VenuePhotoInline(admin.TabularInline):
     model = VenuePhoto
     extra = 1
-    fields = ('image', 'caption', 'is_primary')
+    fields = ('image', 'caption', 'is_primary', 'image_width', 'image_height', 'image_size')
+    readonly_fields = ('image_width', 'image_height', 'image_size')
     
     def save_model(self, request, obj, form, change):
         """Override to add debugging for inline saves"""
@@ -66,7 +71,7 @@ class VenueAdmin(admin.ModelAdmin):
             'fields': ('name', 'slug', 'description', 'category', 'owner')
         }),
         ('Location', {
-            'fields': ('location', 'city', 'address')
+            'fields': ('location', 'city', 'address', ('latitude', 'longitude'))
         }),
         ('Capacity & Pricing', {
             'fields': ('capacity', 'pricing_type', 'hourly_price', 'flat_price'),
@@ -92,25 +97,28 @@ class VenueAdmin(admin.ModelAdmin):
         """
         Override to ensure inline forms are saved properly, especially VenuePhoto
         """
-        print(f"VenueAdmin.save_formset called for model: {formset.model.__name__}")
+        logger.debug("VenueAdmin.save_formset called for model: %s", formset.model.__name__)
         
         # Special handling for VenuePhoto formset
         if formset.model == VenuePhoto:
             instances = formset.save(commit=False)
             for obj in formset.deleted_objects:
-                print(f"Deleting VenuePhoto: {obj}")
+                logger.debug("Deleting VenuePhoto: %s", obj)
                 obj.delete()
             for instance in instances:
-                print(f"Processing VenuePhoto instance in VenueAdmin: {instance}")
-                if hasattr(instance, 'image') and instance.image:
-                    print(f"Image file: {instance.image.name}, size: {instance.image.size}")
+                logger.debug("Processing VenuePhoto instance in VenueAdmin: %s", instance)
                 instance.save()
-                print(f"VenuePhoto saved with ID: {instance.id}")
+                # image_size is captured on upload; image.size would HEAD the object on S3
+                logger.debug("Saved VenuePhoto %s: %s, %s bytes", instance.id, instance.image.name, instance.image_size)
             formset.save_m2m()
         else:
             # For other inline models, use default behavior
             super().save_formset(request, form, formset, change)
     
+    def get_queryset(self, request):
+        # get_categories reads the prefetched categories instead of a query per row
+        return super().get_queryset(request).prefetch_related('category')
+    
     def get_categories(self, obj):
         return ", ".join([cat.name for cat in obj.category.all()])
     get_categories.short_description = "Categories"
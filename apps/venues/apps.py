@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class VenuesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.venues'
+    
+    def ready(self):
+        import apps.venues.signals  # Queue photo derivatives on upload
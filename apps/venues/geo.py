@@ -0,0 +1,158 @@
+"""
+Radius search for venues without PostGIS.
+
+Every venue with coordinates stores its geohash in an indexed ``geohash``
+column. A ``near`` search first narrows the table to the handful of geohash
+cells that cover the search circle's bounding box (prefix matches on a btree
+index) plus a plain latitude/longitude range check, and only then computes
+the exact haversine distance in SQL for the surviving rows.
+"""
+import math
+
+from django.db.models import F, Q, FloatField
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0088
+GEOHASH_PRECISION = 9  # ~5 m cells, plenty for a venue pin
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+DEFAULT_RADIUS_KM = 10
+MAX_RADIUS_KM = 100
+
+# Cell size (height, width) in degrees for each geohash length
+_CELL_SIZES = {
+    length: (180 / 2 ** (5 * length // 2), 360 / 2 ** (5 * length - 5 * length // 2))
+    for length in range(1, GEOHASH_PRECISION + 1)
+}
+
+# The prefilter never scans more than this many cells
+MAX_CELLS = 16
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        value, bounds = (longitude, lng_range) if even else (latitude, lat_range)
+        mid = (bounds[0] + bounds[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            bounds[0] = mid
+        else:
+            bounds[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits, bit_count = 0, 0
+    return ''.join(chars)
+
+
+def parse_point(value):
+    """Parse ``"lat,lng"`` into floats, or return None if it isn't a valid point."""
+    try:
+        latitude, longitude = (float(part) for part in value.split(','))
+    except (AttributeError, ValueError):
+        return None
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None
+    return latitude, longitude
+
+
+def parse_radius(value):
+    try:
+        radius = float(value)
+    except (TypeError, ValueError):
+        return DEFAULT_RADIUS_KM
+    if not math.isfinite(radius) or radius <= 0:
+        return DEFAULT_RADIUS_KM
+    return min(radius, MAX_RADIUS_KM)
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """``(min_lat, max_lat, min_lng, max_lng)`` enclosing the search circle."""
+    delta_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = latitude - delta_lat, latitude + delta_lat
+    if min_lat <= -90 or max_lat >= 90:
+        # The circle reaches a pole: every longitude is in range
+        return max(min_lat, -90.0), min(max_lat, 90.0), -180.0, 180.0
+    delta_lng = math.degrees(radius_km / (EARTH_RADIUS_KM * math.cos(math.radians(latitude))))
+    return min_lat, max_lat, longitude - delta_lng, longitude + delta_lng
+
+
+def covering_cells(box):
+    """
+    Geohash prefixes whose cells cover ``box``, using the longest prefix
+    length that keeps the number of cells under ``MAX_CELLS``.
+    """
+    min_lat, max_lat, min_lng, max_lng = box
+    if max_lng - min_lng >= 360 or min_lng < -180 or max_lng > 180:
+        # Wrapping the antimeridian: fall back to the latitude range check
+        return []
+
+    for length in range(GEOHASH_PRECISION, 0, -1):
+        height, width = _CELL_SIZES[length]
+        rows = math.floor((max_lat + 90) / height) - math.floor((min_lat + 90) / height) + 1
+        cols = math.floor((max_lng + 180) / width) - math.floor((min_lng + 180) / width) + 1
+        if rows * cols <= MAX_CELLS:
+            break
+    else:
+        return []
+
+    cells = set()
+    lat_start = math.floor((min_lat + 90) / height)
+    lng_start = math.floor((min_lng + 180) / width)
+    for row in range(rows):
+        for col in range(cols):
+            # Encode the centre of each cell so float edges can't spill over
+            cell_lat = min(-90 + (lat_start + row + 0.5) * height, 90.0)
+            cell_lng = min(-180 + (lng_start + col + 0.5) * width, 180.0)
+            cells.add(encode_geohash(cell_lat, cell_lng, length))
+    return sorted(cells)
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points, in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def haversine_expression(latitude, longitude):
+    """The same distance as :func:`haversine_km`, as a database expression."""
+    phi1 = math.radians(latitude)
+    phi2 = Radians(F('latitude'))
+    a = (
+        Power(Sin((phi2 - phi1) / 2), 2)
+        + math.cos(phi1) * Cos(phi2) * Power(Sin((Radians(F('longitude')) - math.radians(longitude)) / 2), 2)
+    )
+    return 2 * EARTH_RADIUS_KM * ASin(Least(Sqrt(a), 1.0, output_field=FloatField()), output_field=FloatField())
+
+
+def filter_near(queryset, latitude, longitude, radius_km):
+    """
+    Venues within ``radius_km`` of the point, annotated with ``distance_km``.
+    """
+    box = bounding_box(latitude, longitude, radius_km)
+    min_lat, max_lat, min_lng, max_lng = box
+
+    prefilter = Q(latitude__range=(min_lat, max_lat))
+    if -180 <= min_lng and max_lng <= 180:
+        # Near the antimeridian the longitude range wraps; the distance filter covers it
+        prefilter &= Q(longitude__range=(min_lng, max_lng))
+    cells = covering_cells(box)
+    if cells:
+        in_cells = Q()
+        for cell in cells:
+            in_cells |= Q(geohash__startswith=cell)
+        prefilter &= in_cells
+
+    return (
+        queryset
+        .filter(prefilter)
+        .annotate(distance_km=haversine_expression(latitude, longitude))
+        .filter(distance_km__lte=radius_km)
+    )
@@ -0,0 +1,70 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.accounts.models import User
+from apps.services.models import ServicePhoto
+from apps.venues.models import VenuePhoto
+from envents_project.media_metadata import METADATA_SUFFIXES, apply_metadata, read_image_metadata
+
+# (model, file field, metadata field prefix)
+TARGETS = (
+    (VenuePhoto, 'image', 'image'),
+    (ServicePhoto, 'image', 'image'),
+    (User, 'profile_picture', 'profile_picture'),
+)
+
+
+def _read(instance, field_name):
+    with getattr(instance, field_name).open('rb') as file:
+        return read_image_metadata(file)
+
+
+class Command(BaseCommand):
+    help = "Store size, dimensions, SHA-256 and MIME type for media uploaded before they were captured"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8,
+                            help='Files downloaded concurrently')
+        parser.add_argument('--batch-size', type=int, default=200,
+                            help='Rows read and updated per batch')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            for model, field_name, prefix in TARGETS:
+                updated = failed = 0
+                pending = (
+                    model.objects
+                    .exclude(**{f'{field_name}__isnull': True})
+                    .exclude(**{field_name: ''})
+                    .filter(**{f'{prefix}_sha256': ''})
+                    .only('pk', field_name)
+                    .order_by('pk')
+                )
+                last_pk = 0
+                while True:
+                    batch = list(pending.filter(pk__gt=last_pk)[:options['batch_size']])
+                    if not batch:
+                        break
+                    last_pk = batch[-1].pk
+
+                    futures = [pool.submit(_read, instance, field_name) for instance in batch]
+                    done = []
+                    for instance, future in zip(batch, futures):
+                        try:
+                            apply_metadata(instance, prefix, future.result())
+                            done.append(instance)
+                        except Exception as exc:
+                            failed += 1
+                            self.stderr.write(f"{model.__name__} {instance.pk}: {exc}")
+
+                    with transaction.atomic():
+                        model.objects.bulk_update(done, [f'{prefix}_{suffix}' for suffix in METADATA_SUFFIXES])
+                    updated += len(done)
+
+                self.stdout.write(f"{model.__name__}: {updated} updated, {failed} failed")
+
+        self.stdout.write(self.style.SUCCESS(f"Done in {time.monotonic() - started:.1f}s"))
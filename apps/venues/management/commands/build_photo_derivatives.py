@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.services.models import ServicePhoto
+from apps.venues.models import VenuePhoto
+from envents_project.image_derivatives import generate_derivatives, needs_derivatives
+
+
+class Command(BaseCommand):
+    help = "Generate thumb/card/hero derivatives for venue and service photos that don't have them yet"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help='Regenerate and overwrite derivatives for every photo')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        generated = failed = 0
+        for model in (VenuePhoto, ServicePhoto):
+            for photo in model.objects.exclude(image='').order_by('id').iterator(chunk_size=500):
+                if not options['force'] and not needs_derivatives(photo):
+                    continue
+                try:
+                    generate_derivatives(photo, overwrite=options['force'])
+                    generated += 1
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f"{model.__name__} {photo.pk}: {exc}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated derivatives for {generated} photos ({failed} failed) in {time.monotonic() - started:.1f}s"
+        ))
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.venues.recommendations_build import build_related_venues, RELATED_TOP_N
+
+
+class Command(BaseCommand):
+    help = "Rebuild the precomputed similar-venue recommendations (run periodically, e.g. nightly)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=RELATED_TOP_N,
+                            help='Number of related venues stored per venue')
+        parser.add_argument('--block-size', type=int, default=256,
+                            help='Venues scored per NumPy block (bounds peak memory)')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        stored = build_related_venues(top_n=options['top'], block_size=options['block_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {stored} related venue rows in {time.monotonic() - started:.1f}s"
+        ))
@@ -0,0 +1,117 @@
+import re
+import time
+from datetime import timedelta
+
+from botocore.exceptions import ClientError
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from storages.utils import safe_join
+
+from apps.accounts.models import User
+from apps.services.models import ServicePhoto
+from apps.venues.models import VenuePhoto
+
+# Media prefixes owned by these models; anything else in the bucket is left alone
+PREFIXES = ('venues/photos/', 'services/photos/', 'profile_pictures/')
+FILE_FIELDS = ((VenuePhoto, 'image'), (ServicePhoto, 'image'), (User, 'profile_picture'))
+# envents_project.image_derivatives.derivative_name
+_DERIVATIVE = re.compile(r'^(?P<directory>.*)/derivatives/(?P<stem>[^/]+)_(?:thumb|card|hero)\.[a-z0-9]+$')
+
+
+def _walk(storage, prefix):
+    """Yield ``(name, modified)`` for every object below ``prefix``."""
+    if hasattr(storage, 'bucket'):
+        # One paginated LIST instead of a HEAD per object
+        key_prefix = safe_join(storage.location, prefix)
+        location = key_prefix[:-len(prefix)]
+        for obj in storage.bucket.objects.filter(Prefix=key_prefix):
+            yield obj.key[len(location):], obj.last_modified
+        return
+
+    if not storage.exists(prefix):
+        return
+    directories, files = storage.listdir(prefix)
+    for filename in files:
+        name = f"{prefix}{filename}"
+        yield name, storage.get_modified_time(name)
+    for directory in directories:
+        yield from _walk(storage, f"{prefix}{directory}/")
+
+
+def _referenced_names():
+    names = set()
+    for model, field_name in FILE_FIELDS:
+        names.update(
+            model.objects.exclude(**{f'{field_name}__isnull': True}).values_list(field_name, flat=True).iterator()
+        )
+    for model in (VenuePhoto, ServicePhoto):
+        for derivatives in model.objects.exclude(derivatives={}).values_list('derivatives', flat=True).iterator():
+            for entry in derivatives.values():
+                names.update(value for value in entry.values() if isinstance(value, str))
+    names.discard('')
+    return names
+
+
+def _still_referenced(name):
+    """Fresh check for one candidate, whose row may be newer than the snapshot."""
+    match = _DERIVATIVE.match(name)
+    if match:
+        original = f"{match['directory']}/{match['stem']}."
+        return any(model.objects.filter(image__startswith=original).exists() for model in (VenuePhoto, ServicePhoto))
+    return any(model.objects.filter(**{field_name: name}).exists() for model, field_name in FILE_FIELDS)
+
+
+def _modified_since(storage, name, cutoff):
+    """
+    Whether the blob was saved again after it was listed. An upload that
+    dedups onto it, or reuses its derivatives, skips the PUT but copies the
+    object onto itself (see ContentAddressedMixin.refresh), and its row may
+    not be committed yet. A blob that is already gone counts as modified.
+    """
+    try:
+        modified = storage.get_modified_time(name)
+    except (FileNotFoundError, ClientError):
+        return True
+    if timezone.is_naive(modified):
+        modified = timezone.make_aware(modified)
+    return modified > cutoff
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete photo blobs (originals and derivatives) that no row references; content-addressed "
+        "files can be shared between rows, so they are collected here rather than deleted with a row"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-age-hours', type=float, default=48,
+                            help='Keep blobs younger than this (uploads that are not attached yet)')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='List what would be deleted without deleting it')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        cutoff = timezone.now() - timedelta(hours=options['min_age_hours'])
+        referenced = _referenced_names()
+
+        scanned = deleted = 0
+        for prefix in PREFIXES:
+            for name, modified in _walk(default_storage, prefix):
+                scanned += 1
+                if name in referenced:
+                    continue
+                if timezone.is_naive(modified):
+                    modified = timezone.make_aware(modified)
+                if modified > cutoff or _still_referenced(name) or _modified_since(default_storage, name, cutoff):
+                    continue
+                if options['dry_run']:
+                    self.stdout.write(f"Would delete {name}")
+                else:
+                    default_storage.delete(name)
+                deleted += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Would delete' if options['dry_run'] else 'Deleted'} {deleted} of {scanned} blobs "
+            f"({len(referenced)} referenced) in {time.monotonic() - started:.1f}s"
+        ))
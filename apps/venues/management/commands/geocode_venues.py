@@ -0,0 +1,85 @@
+import csv
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.venues.geo import encode_geohash
+from apps.venues.models import Venue
+
+
+def _normalise(value):
+    return ' '.join((value or '').lower().split())
+
+
+class Command(BaseCommand):
+    help = (
+        "Set venue coordinates offline from a CSV of city/area centroids "
+        "(columns: city, area, latitude, longitude; leave area empty for a city centroid)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path', help='Path to the centroids CSV')
+        parser.add_argument('--overwrite', action='store_true',
+                            help='Also re-geocode venues that already have coordinates')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report matches without saving them')
+
+    def _load_centroids(self, path):
+        cities, areas = {}, defaultdict(list)
+        try:
+            with open(path, newline='', encoding='utf-8-sig') as handle:
+                for line, row in enumerate(csv.DictReader(handle), start=2):
+                    try:
+                        point = (float(row['latitude']), float(row['longitude']))
+                    except (KeyError, TypeError, ValueError):
+                        raise CommandError(f"{path}:{line}: expected numeric latitude and longitude")
+                    city, area = _normalise(row.get('city')), _normalise(row.get('area'))
+                    if not city:
+                        continue
+                    if area:
+                        areas[city].append((area, point))
+                    else:
+                        cities[city] = point
+        except OSError as exc:
+            raise CommandError(f"Cannot read {path}: {exc}")
+
+        # Longest area names first, so "north gulshan" wins over "gulshan"
+        for entries in areas.values():
+            entries.sort(key=lambda entry: -len(entry[0]))
+        return cities, areas
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        cities, areas = self._load_centroids(options['csv_path'])
+
+        venues = Venue.objects.only('id', 'city', 'location', 'address', 'latitude', 'longitude', 'geohash')
+        if not options['overwrite']:
+            venues = venues.filter(latitude__isnull=True)
+
+        updated, by_area, unmatched = [], 0, 0
+        for venue in venues.iterator(chunk_size=2000):
+            city = _normalise(venue.city)
+            text = f"{_normalise(venue.location)} {_normalise(venue.address)}"
+            point = next((point for area, point in areas.get(city, ()) if area in text), None)
+            if point:
+                by_area += 1
+            else:
+                point = cities.get(city)
+            if point is None:
+                unmatched += 1
+                continue
+            venue.latitude, venue.longitude = point
+            venue.geohash = encode_geohash(*point)
+            updated.append(venue)
+
+        if not options['dry_run']:
+            with transaction.atomic():
+                Venue.objects.bulk_update(updated, ['latitude', 'longitude', 'geohash'], batch_size=1000)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Would geocode' if options['dry_run'] else 'Geocoded'} {len(updated)} venues "
+            f"({by_area} by area, {len(updated) - by_area} by city), "
+            f"{unmatched} unmatched in {time.monotonic() - started:.1f}s"
+        ))
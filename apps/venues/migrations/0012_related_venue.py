@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('venues', '0011_add_performance_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedVenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='venues.venue')),
+                ('venue', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_entries', to='venues.venue')),
+            ],
+            options={
+                'ordering': ['venue', 'rank'],
+                'unique_together': {('venue', 'rank')},
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('venues', '0012_related_venue'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='relatedvenue',
+            options={'ordering': ['venue', 'kind', 'rank']},
+        ),
+        migrations.AlterUniqueTogether(
+            name='relatedvenue',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='relatedvenue',
+            name='kind',
+            field=models.CharField(choices=[('similar', 'Similar venue'), ('co_favorite', 'Favorited together')], default='similar', max_length=20),
+        ),
+        migrations.AlterUniqueTogether(
+            name='relatedvenue',
+            unique_together={('venue', 'kind', 'rank')},
+        ),
+    ]
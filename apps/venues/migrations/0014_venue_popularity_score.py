@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('venues', '0013_related_venue_kind'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='venue',
+            name='popularity_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='venue',
+            index=models.Index(fields=['status', '-popularity_score'], name='venues_venu_status_41e1d7_idx'),
+        ),
+    ]
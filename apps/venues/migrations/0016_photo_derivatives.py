@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('venues', '0015_venue_coordinates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='venuephoto',
+            name='derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -3,6 +3,7 @@ from django.urls import reverse
 from django.conf import settings
 from django.utils.text import slugify
 from django.core.validators import MinValueValidator, MaxValueValidator
+from envents_project.content_addressed import ContentAddressedUploadTo
 
 class Amenity(models.Model):
     name = models.CharField(max_length=100)
@@ -46,6 +47,10 @@ class Venue(models.Model):
     location = models.CharField(max_length=255)
     city = models.CharField(max_length=100, db_index=True)
     address = models.TextField()
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    # Derived from latitude/longitude on save; prefix-indexed for radius search
+    geohash = models.CharField(max_length=12, blank=True, db_index=True, editable=False)
     capacity = models.PositiveIntegerField(help_text="Maximum number of guests")
     
     # Dynamic pricing fields - unified structure with services
@@ -63,6 +68,9 @@ class Venue(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     is_featured = models.BooleanField(default=False)
     
+    # Time-decayed popularity, recomputed in batch by `manage.py update_popularity`
+    popularity_score = models.FloatField(default=0, editable=False)
+    
     # Owner field links to User model 
     owner = models.ForeignKey(
         settings.AUTH_USER_MODEL, 
@@ -80,6 +88,7 @@ class Venue(models.Model):
             models.Index(fields=['status']),
             models.Index(fields=['is_featured', 'status']),  # Optimize homepage featured query
             models.Index(fields=['-created_at']),  # Optimize ordering
+            models.Index(fields=['status', '-popularity_score']),  # sort=popular
         ]
     
     def __str__(self):
@@ -89,6 +98,12 @@ class Venue(models.Model):
         if not self.slug:
             self.slug = slugify(self.name)
         
+        if self.latitude is not None and self.longitude is not None:
+            from .geo import encode_geohash
+            self.geohash = encode_geohash(self.latitude, self.longitude)
+        else:
+            self.geohash = ''
+        
         # Invalidate cities cache if city changed or status changed
         if self.pk:  # Only for updates
             try:
@@ -109,7 +124,10 @@ class Venue(models.Model):
     
     @property
     def main_photo(self):
-        return self.photos.filter(is_primary=True).first() or self.photos.first()
+        # Photos are ordered primary-first, so the first photo is the main one.
+        # Unlike filtering on is_primary, this reads prefetch_related('photos')
+        # instead of querying once per card
+        return self.photos.first()
     
     @property
     def display_price(self):
@@ -134,7 +152,17 @@ class Venue(models.Model):
 
 class VenuePhoto(models.Model):
     venue = models.ForeignKey(Venue, on_delete=models.CASCADE, related_name='photos')
-    image = models.ImageField(upload_to='venues/photos/')
+    image = models.ImageField(upload_to=ContentAddressedUploadTo('venues/photos/', 'image'))
+    # Resized variants written by envents_project.image_derivatives:
+    # {variant: {'width', 'height', 'webp', 'jpeg'}}
+    derivatives = models.JSONField(default=dict, blank=True, editable=False)
+    # Captured at upload time (envents_project.media_metadata) so size and
+    # dimensions never need a storage round trip
+    image_size = models.PositiveBigIntegerField(null=True, blank=True, editable=False)
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_sha256 = models.CharField(max_length=64, blank=True, editable=False)
+    image_mime_type = models.CharField(max_length=50, blank=True, editable=False)
     caption = models.CharField(max_length=255, blank=True)
     is_primary = models.BooleanField(default=False)
     uploaded_at = models.DateTimeField(auto_now_add=True)
@@ -219,3 +247,30 @@ class VenueCateringPackage(models.Model):
     
     def __str__(self):
         return f"{self.venue.name}: {self.name}"
+
+class RelatedVenue(models.Model):
+    """
+    Precomputed venue -> venue neighbours.
+
+    ``similar`` rows are rebuilt by ``manage.py build_related_venues`` and
+    feed the detail page; ``co_favorite`` rows come from
+    ``manage.py build_co_booking_recommendations``. Readers fetch the ranked
+    ids for one venue through the (venue, kind, rank) index.
+    """
+    KIND_CHOICES = (
+        ('similar', 'Similar venue'),
+        ('co_favorite', 'Favorited together'),
+    )
+    
+    venue = models.ForeignKey(Venue, on_delete=models.CASCADE, related_name='related_entries')
+    related = models.ForeignKey(Venue, on_delete=models.CASCADE, related_name='+')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='similar')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    
+    class Meta:
+        ordering = ['venue', 'kind', 'rank']
+        unique_together = ('venue', 'kind', 'rank')
+    
+    def __str__(self):
+        return f"{self.venue_id} -> {self.related_id} ({self.kind} #{self.rank})"
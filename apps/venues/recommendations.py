@@ -0,0 +1,54 @@
+"""
+"Similar venues" for the detail page.
+
+``manage.py build_related_venues`` (see recommendations_build) stores every
+approved venue's ranked neighbours in ``RelatedVenue``. The detail page then
+reads a handful of ids through one indexed lookup, or straight from the
+cache, instead of running a DISTINCT over the category M2M on every request.
+"""
+from django.core.cache import cache
+
+from .models import Venue, RelatedVenue
+
+# How many neighbours are stored per venue; detail pages show fewer, the
+# spare ones cover venues that get unapproved between rebuilds.
+RELATED_TOP_N = 12
+RELATED_CACHE_TIMEOUT = 3600
+RELATED_VERSION_KEY = 'related_venues_version'
+
+
+def get_related_venue_ids(venue_id):
+    """Ranked related venue ids, served from the cache when possible."""
+    version = cache.get(RELATED_VERSION_KEY, 0)
+    cache_key = f'related_venues:{version}:{venue_id}'
+    related_ids = cache.get(cache_key)
+    if related_ids is None:
+        related_ids = list(
+            RelatedVenue.objects
+            .filter(venue_id=venue_id, kind='similar')
+            .order_by('rank')
+            .values_list('related_id', flat=True)
+        )
+        cache.set(cache_key, related_ids, RELATED_CACHE_TIMEOUT)
+    return related_ids
+
+
+def get_related_venues(venue, limit=3):
+    """
+    Related venues for the detail page, best match first.
+
+    Falls back to the old category-overlap query for venues that have not
+    been through a batch run yet (e.g. approved since the last rebuild).
+    """
+    related_ids = get_related_venue_ids(venue.id)
+    if not related_ids:
+        return list(
+            Venue.objects.filter(
+                category__in=venue.category.all(), status='approved'
+            ).prefetch_related('photos').exclude(id=venue.id).distinct()[:limit]
+        )
+
+    venues = Venue.objects.filter(
+        id__in=related_ids[:limit * 2], status='approved'
+    ).prefetch_related('photos').in_bulk()
+    return [venues[pk] for pk in related_ids if pk in venues][:limit]
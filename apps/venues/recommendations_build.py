@@ -0,0 +1,154 @@
+"""
+Offline build of the "similar venues" table.
+
+``build_related_venues`` scores every approved venue against every other
+one from a NumPy feature matrix (category overlap, city, capacity and price
+proximity, co-favorites) and stores the ranked top-N in ``RelatedVenue``.
+Kept apart from the read helpers in ``recommendations`` so that web workers
+never import NumPy.
+"""
+import math
+
+import numpy as np
+from django.core.cache import cache
+from django.db import transaction
+
+from envents_project.similarity import (
+    co_occurrence, fetch_columns, index_positions, rows_slice, top_k,
+)
+from .models import Venue, FavoriteVenue, RelatedVenue
+from .recommendations import RELATED_TOP_N, RELATED_VERSION_KEY
+
+WEIGHTS = {
+    'category': 0.45,
+    'city': 0.2,
+    'capacity': 0.1,
+    'price': 0.1,
+    'co_favorite': 0.15,
+}
+
+
+def _load_features():
+    """Read the approved catalogue into flat NumPy arrays."""
+    rows = (
+        Venue.objects
+        .filter(status='approved')
+        .order_by('id')
+        .values_list('id', 'city', 'capacity', 'pricing_type', 'hourly_price', 'flat_price')
+        .iterator(chunk_size=5000)
+    )
+    ids, cities, capacity, price = [], [], [], []
+    city_codes = {}
+    for venue_id, city, cap, pricing_type, hourly_price, flat_price in rows:
+        ids.append(venue_id)
+        cities.append(city_codes.setdefault((city or '').strip().lower(), len(city_codes)))
+        capacity.append(math.log1p(cap or 0))
+        effective = hourly_price if pricing_type == 'HOURLY' else flat_price
+        price.append(math.log1p(float(effective)) if effective else np.nan)
+
+    ids = np.asarray(ids, dtype=np.int64)
+
+    # Row-normalised category indicator matrix -> cosine via a dot product
+    venue_ids, category_ids = fetch_columns(
+        Venue.category.through.objects.filter(venue__status='approved'),
+        'venue_id', 'venuecategory_id',
+    )
+    rows_idx, present = index_positions(ids, venue_ids)
+    category_ids = category_ids[present]
+    _, category_cols = np.unique(category_ids, return_inverse=True)
+    categories = np.zeros((ids.size, int(category_cols.max()) + 1 if category_cols.size else 1), dtype=np.float32)
+    categories[rows_idx[present], category_cols] = 1.0
+    norms = np.linalg.norm(categories, axis=1, keepdims=True)
+    np.divide(categories, norms, out=categories, where=norms > 0)
+
+    return {
+        'ids': ids,
+        'categories': categories,
+        'city': np.asarray(cities, dtype=np.int64),
+        'capacity': np.asarray(capacity, dtype=np.float32),
+        'price': np.asarray(price, dtype=np.float32),
+    }
+
+
+def co_favorite_matrix(ids):
+    """
+    Co-favorite cosine between the venues in ``ids`` (sorted primary keys),
+    as a row-sorted sparse ``(left, right, weights)`` matrix of positions.
+    """
+    user_ids, venue_ids = fetch_columns(
+        FavoriteVenue.objects.filter(venue__status='approved'), 'user_id', 'venue_id'
+    )
+    positions, present = index_positions(ids, venue_ids)
+    left, right, counts = co_occurrence(user_ids[present], positions[present], ids.size)
+    popularity = np.bincount(positions[present], minlength=ids.size).astype(np.float32)
+    weights = counts / np.sqrt(popularity[left] * popularity[right])
+    return left, right, weights.astype(np.float32)
+
+
+def _score_block(features, co_favorites, start, stop):
+    w = WEIGHTS
+    block = slice(start, stop)
+
+    scores = w['category'] * (features['categories'][block] @ features['categories'].T)
+    scores += w['city'] * (features['city'][block, None] == features['city'][None, :])
+    scores += w['capacity'] * np.exp(
+        -np.abs(features['capacity'][block, None] - features['capacity'][None, :])
+    )
+    price_similarity = np.exp(-np.abs(features['price'][block, None] - features['price'][None, :]))
+    scores += w['price'] * np.nan_to_num(price_similarity, nan=0.0)
+
+    left, right, weights = co_favorites
+    nnz = rows_slice(left, start, stop)
+    scores[left[nnz] - start, right[nnz]] += w['co_favorite'] * weights[nnz]
+
+    # A venue is never its own recommendation
+    rows = np.arange(stop - start)
+    scores[rows, rows + start] = -np.inf
+    return scores
+
+
+def build_related_venues(top_n=RELATED_TOP_N, block_size=256):
+    """
+    Recompute the ``similar`` ``RelatedVenue`` rows for every approved venue.
+
+    Similarities are computed ``block_size`` rows at a time so memory stays
+    at ``block_size x venues`` floats even for very large catalogues. The
+    table is swapped in a single transaction and cached ids are invalidated
+    by bumping a version key. Returns the number of stored rows.
+    """
+    features = _load_features()
+    ids = features['ids']
+    co_favorites = co_favorite_matrix(ids)
+    stored = 0
+
+    with transaction.atomic():
+        RelatedVenue.objects.filter(kind='similar').delete()
+        for start in range(0, ids.size, block_size):
+            stop = min(start + block_size, ids.size)
+            scores = _score_block(features, co_favorites, start, stop)
+            best = top_k(scores, top_n)
+            best_scores = np.take_along_axis(scores, best, axis=1)
+
+            entries = [
+                RelatedVenue(
+                    venue_id=int(ids[start + row]),
+                    related_id=int(ids[col]),
+                    rank=rank,
+                    score=float(score),
+                )
+                for row in range(stop - start)
+                for rank, (col, score) in enumerate(zip(best[row], best_scores[row]))
+                if np.isfinite(score)
+            ]
+            RelatedVenue.objects.bulk_create(entries, batch_size=5000)
+            stored += len(entries)
+
+    _bump_version()
+    return stored
+
+
+def _bump_version():
+    try:
+        cache.incr(RELATED_VERSION_KEY)
+    except ValueError:
+        cache.set(RELATED_VERSION_KEY, 1, None)
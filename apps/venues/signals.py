@@ -0,0 +1,26 @@
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+from envents_project.image_derivatives import needs_derivatives, schedule_derivatives
+from envents_project.media_metadata import capture_on_upload, remember_in_storage
+from .models import VenuePhoto
+
+
+@receiver(pre_save, sender=VenuePhoto)
+def capture_photo_metadata(sender, instance, raw=False, **kwargs):
+    """Record size, dimensions, hash and MIME type while the upload is in memory."""
+    if not raw:
+        capture_on_upload(instance, 'image', 'image')
+
+
+@receiver(post_save, sender=VenuePhoto)
+def queue_photo_derivatives(sender, instance, raw=False, **kwargs):
+    """
+    Prime the storage's metadata cache, and render thumb/card/hero variants
+    in the background for new or replaced images; caption or is_primary
+    edits keep the existing derivatives.
+    """
+    if raw:
+        return
+    remember_in_storage(instance, 'image', 'image')
+    if needs_derivatives(instance):
+        schedule_derivatives(instance)
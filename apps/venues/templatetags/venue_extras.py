@@ -1,6 +1,9 @@
 from django import template
+from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 
+from envents_project.image_derivatives import MIME_TYPES, enabled_formats, photo_srcset
+
 register = template.Library()
 
 @register.simple_tag(takes_context=True)
@@ -19,4 +22,36 @@ def split(value, arg):
     """
     Split a string on a delimiter.
     """
-    return value.split(arg)
\ No newline at end of file
+    return value.split(arg)
+
+@register.filter
+def srcset(photo, fmt='jpeg'):
+    """
+    ``srcset`` attribute value for a VenuePhoto/ServicePhoto's cropped card
+    variants, e.g. ``<img srcset="{{ photo|srcset:'webp' }}">``.
+    """
+    return photo_srcset(photo, fmt) if photo and photo.derivatives else ''
+
+@register.simple_tag
+def responsive_photo(photo, variant='card', alt='', css_class='', sizes='100vw'):
+    """
+    Render a photo as ``<picture>`` with modern formats first and a JPEG
+    ``<img>`` fallback, falling back to the original upload until its
+    derivatives have been generated.
+    """
+    entry = photo.derivatives.get(variant) if photo.derivatives else None
+    if not entry:
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" loading="lazy">', photo.image.url, alt, css_class
+        )
+
+    sources = [
+        format_html('<source type="{}" srcset="{}" sizes="{}">', MIME_TYPES[fmt], photo_srcset(photo, fmt, variant), sizes)
+        for fmt in enabled_formats() if fmt != 'jpeg' and fmt in entry
+    ]
+    img = format_html(
+        '<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" class="{}" loading="lazy">',
+        photo.image.storage.url(entry['jpeg']), photo_srcset(photo, 'jpeg', variant), sizes,
+        entry['width'], entry['height'], alt, css_class,
+    )
+    return mark_safe(f"<picture>{''.join(sources)}{img}</picture>")
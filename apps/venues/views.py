@@ -1,11 +1,21 @@
-from django.shortcuts import render, get_object_or_404, redirect
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, get_object_or_404, aget_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q, Avg, Count
+from django.db.models import Q, Avg, Count, prefetch_related_objects
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.core.cache import cache
+from apps.analytics.counters import record_view
+from envents_project.async_queries import gather_queries
 from .models import Venue, VenueCategory, VenueReview, FavoriteVenue, Amenity
 from .forms import VenueReviewForm
+from .geo import filter_near, parse_point, parse_radius
+from .recommendations import get_related_venues
+
+# Radius options (km) offered by the distance filter
+RADIUS_CHOICES = [2, 5, 10, 25, 50]
 
 
 def get_cached_cities():
@@ -37,6 +47,18 @@ def get_cached_cities():
     
     return cities
 
+def _add_ratings(venues):
+    """Set average_rating and review_count on a page of venues, with one query."""
+    ratings = {
+        row['pk']: row for row in
+        Venue.objects.filter(pk__in=[venue.pk for venue in venues]).values('pk').annotate(
+            average_rating=Avg('reviews__rating'), review_count=Count('reviews'),
+        )
+    }
+    for venue in venues:
+        venue.average_rating = ratings[venue.pk]['average_rating']
+        venue.review_count = ratings[venue.pk]['review_count']
+
 def venue_list(request):
     # Start with base queryset - NO annotations yet (performance optimization)
     # Annotations are expensive, so we apply them AFTER filtering to reduce rows
@@ -85,6 +107,15 @@ def venue_list(request):
     if city:
         venues_queryset = venues_queryset.filter(city__iexact=city)
     
+    # Filter by distance: near=lat,lng&radius=km (geohash prefilter + haversine)
+    near = request.GET.get('near')
+    point = parse_point(near)
+    radius = parse_radius(request.GET.get('radius'))
+    if point:
+        venues_queryset = filter_near(venues_queryset, *point, radius)
+    else:
+        near = None
+    
     # Filter by amenities
     amenities = request.GET.getlist('amenities')
     # Filter out empty strings
@@ -94,16 +125,20 @@ def venue_list(request):
         amenities_int = [int(a) for a in amenities]
         venues_queryset = venues_queryset.filter(amenities__id__in=amenities_int).distinct()
     
+    sort = request.GET.get('sort') or ('distance' if point else 'name')
+
     # ⚡ PERFORMANCE OPTIMIZATION: Apply annotations AFTER filtering
     # This way we only calculate avg_rating and review_count for filtered results
     # Instead of ALL venues, then filtering (which wastes CPU on filtered-out rows)
-    venues_queryset = venues_queryset.annotate(
-        average_rating=Avg('reviews__rating'),
-        review_count=Count('reviews')
-    )
+    # sort=popular adds them to the page's venues only (below): their GROUP BY
+    # would keep the (status, -popularity_score) index from serving the ORDER BY
+    if sort != 'popular':
+        venues_queryset = venues_queryset.annotate(
+            average_rating=Avg('reviews__rating'),
+            review_count=Count('reviews')
+        )
     
     # Sorting (handles both hourly and flat pricing)
-    sort = request.GET.get('sort', 'name')
     if sort == 'price_low' or sort == 'price_asc':
         # Sort by effective price (hourly_price for HOURLY, flat_price for FLAT)
         from django.db.models import Case, When, F
@@ -127,6 +162,12 @@ def venue_list(request):
         venues_queryset = venues_queryset.order_by('-capacity')
     elif sort == 'rating':
         venues_queryset = venues_queryset.order_by('-average_rating')
+    elif sort == 'distance' and point:
+        venues_queryset = venues_queryset.order_by('distance_km', 'id')
+    elif sort == 'popular':
+        # Precomputed by `manage.py update_popularity`; the page is read off the
+        # (status, -popularity_score) index
+        venues_queryset = venues_queryset.order_by('-popularity_score', 'id')
     else:
         venues_queryset = venues_queryset.order_by('name')
     
@@ -147,12 +188,17 @@ def venue_list(request):
         venues = paginator.page(1)
     except EmptyPage:
         venues = paginator.page(paginator.num_pages)
+    if sort == 'popular':
+        _add_ratings(venues)
     
     return render(request, 'venues/venue_list.html', {
         'page_obj': venues,  # Only need one variable for the paginated venues
         'all_categories': all_categories,
         'min_capacity': capacity,  # Use the same variable name we use above
         'city': city,
+        'near': near,
+        'radius': radius,
+        'radius_choices': RADIUS_CHOICES,
         'sort': sort,
         'cities': cities,
         'amenities': all_amenities,
@@ -162,60 +208,68 @@ def venue_list(request):
         'venues_count': total_venues,
     })
 
-def venue_detail(request, slug):
-    # Use select_related and prefetch_related to avoid N+1 queries
-    venue = get_object_or_404(
-        Venue.objects.prefetch_related(
-            'category', 
-            'amenities', 
-            'photos', 
-            'catering_packages'
-        ), 
-        slug=slug, 
-        status='approved'
-    )
-    
-    # Get related venues with prefetch_related to optimize performance
-    venue_categories = venue.category.all()
-    related_venues = Venue.objects.filter(
-        category__in=venue_categories, status='approved'
-    ).prefetch_related('photos').exclude(id=venue.id).distinct()[:3]
-    
-    # Check if favorited
-    is_favorite = False
-    if request.user.is_authenticated:
-        is_favorite = FavoriteVenue.objects.filter(
-            user=request.user, venue=venue
-        ).exists()
-    
-    # Get reviews with select_related to include user information in a single query
+def _save_review(request, venue, user):
+    """Handle a posted review; returns ``(redirect or None, form)``."""
+    review_form = VenueReviewForm(request.POST)
+    if review_form.is_valid():
+        new_review = review_form.save(commit=False)
+        new_review.venue = venue
+        new_review.user = user
+        
+        # Check if user already reviewed this venue
+        try:
+            existing_review = VenueReview.objects.get(venue=venue, user=user)
+            existing_review.rating = new_review.rating
+            existing_review.comment = new_review.comment
+            existing_review.save()
+            messages.success(request, 'Your review has been updated!')
+        except VenueReview.DoesNotExist:
+            new_review.save()
+            messages.success(request, 'Your review has been submitted!')
+            
+        return redirect('venues:venue_detail', slug=venue.slug), review_form
+    return None, review_form
+
+def _venue_reviews(venue):
+    # Get reviews with select_related to include user information in a single query;
+    # evaluated here so the template's reviews.count reads the result cache
     reviews = venue.reviews.select_related('user').all()
-    avg_rating = reviews.aggregate(Avg('rating'))['rating__avg'] or 0
+    len(reviews)
+    return reviews
+
+async def venue_detail(request, slug):
+    # The related rows the template needs are prefetched below, concurrently
+    # with the other lookups, instead of one after another here
+    venue = await aget_object_or_404(Venue, slug=slug, status='approved')
+    # Resolved once here; reused by the template context
+    user = request.user = await request.auser()
+    
+    # Buffered in memory and flushed in batches - no write on the request path
+    record_view(request, 'venue', venue.id)
     
     # Review form
     if request.method == 'POST':
-        review_form = VenueReviewForm(request.POST)
-        if review_form.is_valid():
-            new_review = review_form.save(commit=False)
-            new_review.venue = venue
-            new_review.user = request.user
-            
-            # Check if user already reviewed this venue
-            try:
-                existing_review = VenueReview.objects.get(venue=venue, user=request.user)
-                existing_review.rating = new_review.rating
-                existing_review.comment = new_review.comment
-                existing_review.save()
-                messages.success(request, 'Your review has been updated!')
-            except VenueReview.DoesNotExist:
-                new_review.save()
-                messages.success(request, 'Your review has been submitted!')
-                
-            return redirect('venues:venue_detail', slug=slug)
+        response, review_form = await sync_to_async(_save_review)(request, venue, user)
+        if response:
+            return response
     else:
         review_form = VenueReviewForm()
     
-    return render(request, 'venues/venue_detail.html', {
+    # Independent lookups, each on its own connection (envents_project.async_queries);
+    # prefetching one relation per call avoids N+1 queries in the template. The
+    # calls share the venue, so its prefetch cache must exist before they start:
+    # each would otherwise create one and overwrite the others' results
+    venue._prefetched_objects_cache = {}
+    related_venues, is_favorite, reviews, avg_rating, *_ = await gather_queries(
+        lambda: get_related_venues(venue, limit=3),
+        lambda: user.is_authenticated and FavoriteVenue.objects.filter(user=user, venue=venue).exists(),
+        lambda: _venue_reviews(venue),
+        lambda: venue.reviews.aggregate(Avg('rating'))['rating__avg'] or 0,
+        *(partial(prefetch_related_objects, [venue], lookup)
+          for lookup in ('category', 'amenities', 'photos', 'catering_packages')),
+    )
+    
+    return await sync_to_async(render)(request, 'venues/venue_detail.html', {
         'venue': venue,
         'related_venues': related_venues,
         'is_favorite': is_favorite,
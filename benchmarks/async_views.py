@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""
+Latency of the async catalog views with their independent queries run one
+after another vs concurrently (envents_project.async_queries). Both modes
+serve envents_project.asgi from gunicorn's uvicorn worker on the benchmark
+settings (every query delayed by --latency-ms); each path is driven by
+--concurrency keep-alive clients for --duration seconds.
+
+    python benchmarks/async_views.py
+    python benchmarks/async_views.py --latency-ms 50 --json
+
+Needs the local database (seeded) from the development settings.
+"""
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+from worker_classes import _free_port, run_load, start_server, wait_until_ready
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+MODES = {'sequential': '0', 'concurrent': '1'}
+
+
+def default_paths():
+    """The home page and the detail page of one approved venue."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    sys.path.insert(0, str(PROJECT_ROOT))
+    import django
+
+    django.setup()
+    from apps.venues.models import Venue
+
+    slug = Venue.objects.filter(status='approved').values_list('slug', flat=True).first()
+    if slug is None:
+        raise SystemExit("No approved venue to request; seed the database first")
+    return ['/', f'/venues/{slug}/']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--latency-ms', type=float, default=20)
+    parser.add_argument('--paths', nargs='+')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+    paths = args.paths or default_paths()
+
+    results = {}
+    for mode, flag in MODES.items():
+        port = _free_port()
+        server = start_server('uvicorn', port, args.workers, args.latency_ms, ASYNC_CONCURRENT_QUERIES=flag)
+        try:
+            wait_until_ready(port)
+            run_load(port, paths, args.concurrency, 1)  # let every worker finish warming up
+            results[mode] = {path: run_load(port, [path], args.concurrency, args.duration) for path in paths}
+        finally:
+            server.terminate()
+            server.wait()
+
+    if args.json:
+        print(json.dumps(results))
+        return
+    print(f"uvicorn, {args.workers} worker(s), {args.concurrency} clients, {args.latency_ms:g}ms per query, "
+          f"{args.duration:g}s per path:")
+    print(f"  {'path':<40} {'mode':<11} {'p50 ms':>8} {'p95 ms':>8} {'req/s':>7} {'errors':>7}")
+    for path in paths:
+        for mode in MODES:
+            result = results[mode][path]
+            print(f"  {path:<40} {mode:<11} {result['p50_ms']:>8} {result['p95_ms']:>8} "
+                  f"{result['requests_per_second']:>7} {result['errors']:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""
+Overhead of the request metrics middleware (envents_project.instrumentation).
+Requests the same pages in-process through two handlers, one with
+REQUEST_METRICS_ENABLED and JSON logging on and one with it off, interleaved,
+with no added database latency so the relative cost is at its highest.
+
+    python benchmarks/instrumentation.py
+    python benchmarks/instrumentation.py --rounds 500 --json
+
+Needs the local database (seeded) from the development settings.
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rounds', type=int, default=200)
+    parser.add_argument('--paths', nargs='+', default=['/', '/venues/', '/services/', '/about/'])
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    os.environ['BENCHMARK_DB_LATENCY_MS'] = '0'
+    sys.path.insert(0, str(PROJECT_ROOT))
+    import django
+
+    django.setup()
+    from django.test import Client, override_settings
+
+    # Format every line as production does, then drop it
+    request_log = logging.getLogger('envents_project.requests')
+    request_log.setLevel(logging.INFO)
+    request_log.addHandler(logging.NullHandler())
+    request_log.propagate = False
+
+    clients = {'on': Client()}
+    with override_settings(REQUEST_METRICS_ENABLED=False):
+        clients['off'] = Client()
+        clients['off'].get('/health/')  # loads its middleware while the setting is off
+
+    timings = {mode: {path: [] for path in args.paths} for mode in clients}
+    for path in args.paths:
+        for client in clients.values():
+            client.get(path)  # warm caches and templates
+    for round_number in range(args.rounds):
+        for path in args.paths:
+            # Alternate which handler goes first, so neither always runs on a colder cache
+            order = list(clients.items())[::1 if round_number % 2 else -1]
+            for mode, client in order:
+                started = time.perf_counter()
+                client.get(path)
+                timings[mode][path].append(time.perf_counter() - started)
+
+    results = {}
+    for path in args.paths:
+        off = statistics.median(timings['off'][path]) * 1000
+        on = statistics.median(timings['on'][path]) * 1000
+        results[path] = {'off_ms': round(off, 2), 'on_ms': round(on, 2), 'overhead_pct': round((on - off) / off * 100, 2)}
+    total_off = sum(result['off_ms'] for result in results.values())
+    total_on = sum(result['on_ms'] for result in results.values())
+    overall = round((total_on - total_off) / total_off * 100, 2)
+
+    if args.json:
+        print(json.dumps({'paths': results, 'overhead_pct': overall}))
+        return
+    print(f"Median of {args.rounds} requests per path, metrics off vs on:")
+    print(f"  {'path':<16} {'off ms':>8} {'on ms':>8} {'overhead':>9}")
+    for path, result in results.items():
+        print(f"  {path:<16} {result['off_ms']:>8} {result['on_ms']:>8} {result['overhead_pct']:>8}%")
+    print(f"  {'all':<16} {total_off:>8.2f} {total_on:>8.2f} {overall:>8}%")
+
+
+if __name__ == '__main__':
+    main()
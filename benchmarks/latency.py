@@ -0,0 +1,34 @@
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.backends.signals import connection_created
+
+
+def _delay(seconds, execute, sql, params, many, context):
+    time.sleep(seconds)
+    return execute(sql, params, many, context)
+
+
+class DatabaseLatencyMiddleware:
+    """
+    Sleep ``BENCHMARK_DB_LATENCY_MS`` before every query, like a network
+    round-trip. ``time.sleep`` is cooperative under gevent's monkey patching,
+    as psycopg 3's socket waits are.
+
+    The delay is attached to every connection as it is opened - including
+    those of the threads async views query from - so the middleware itself
+    drops out of the chain once loaded.
+    """
+
+    def __init__(self, get_response):
+        delay = settings.BENCHMARK_DB_LATENCY_MS / 1000
+        if delay:
+            self.wrapper = partial(_delay, delay)
+            connection_created.connect(self._install, weak=False, dispatch_uid='benchmark-db-latency')
+        raise MiddlewareNotUsed
+
+    def _install(self, sender, connection, **kwargs):
+        if self.wrapper not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self.wrapper)
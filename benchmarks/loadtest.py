@@ -0,0 +1,398 @@
+#!/usr/bin/env python
+"""
+Load test a running server with a mix of user scenarios.
+
+Each of --concurrency virtual users keeps one keep-alive connection (and
+its own cookies) and runs scenarios picked by the --mix weights, one after
+another, for --duration seconds:
+
+    browse   home page, venue list with a filter, a venue, the service list
+    search   venue list filtered by city/capacity/price/category, services by category
+    detail   venue and service detail pages
+    booking  (logged in) create_booking -> add_services -> confirm_booking -> booking_detail
+
+Latency is recorded per endpoint (the URL name, not the path) and reported
+as throughput and p50/p95/p99, also as JSON (--output) so runs can be
+compared between commits (--compare an earlier file).
+
+    python benchmarks/loadtest.py --url http://127.0.0.1:8000
+    python benchmarks/loadtest.py --start gthread --mix browse=5 detail=3 booking=1 --output run.json
+    python benchmarks/loadtest.py --start uvicorn --compare run.json
+
+Venue/service slugs and logins come from the database of the development
+settings. Booking users are synthetic customers (manage.py seed_synthetic)
+unless --users is given. The booking scenario writes bookings, so use a
+scratch database.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from http.cookies import SimpleCookie
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_MIX = ('browse=5', 'search=2', 'detail=3', 'booking=1')
+
+
+class HttpError(Exception):
+    pass
+
+
+class Session:
+    """One virtual user: a keep-alive HTTP/1.1 connection and a cookie jar."""
+
+    def __init__(self, host, port, stats):
+        self.host, self.port = host, port
+        self.stats = stats
+        self.cookies = {}
+        self.reader = self.writer = None
+        self.logged_in = False
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+    async def request(self, name, method, path, data=None):
+        """Send one request and record its latency under ``name``; returns (status, headers, body)."""
+        body = b''
+        headers = {'Host': f'{self.host}:{self.port}', 'Connection': 'keep-alive', 'User-Agent': 'envents-loadtest'}
+        if data is not None:
+            data = {**data, 'csrfmiddlewaretoken': self.cookies.get('csrftoken', '')}
+            body = urlencode(data).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            headers['Referer'] = f'http://{self.host}:{self.port}{path}'
+        headers['Content-Length'] = str(len(body))
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{key}={value}' for key, value in self.cookies.items())
+        raw = f'{method} {path} HTTP/1.1\r\n'.encode() + b''.join(
+            f'{key}: {value}\r\n'.encode() for key, value in headers.items()
+        ) + b'\r\n' + body
+
+        started = time.perf_counter()
+        try:
+            reused = self.writer is not None
+            try:
+                status, response_headers, response_body = await self._exchange(raw)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                if not reused:
+                    raise
+                # The server closed the idle keep-alive connection; retry on a new one
+                await self.close()
+                started = time.perf_counter()
+                status, response_headers, response_body = await self._exchange(raw)
+        except (OSError, asyncio.IncompleteReadError, HttpError):
+            await self.close()
+            self.stats.record(name, time.perf_counter() - started, ok=False)
+            raise
+        self.stats.record(name, time.perf_counter() - started, ok=status < 400)
+        if status >= 400:
+            raise HttpError(f'{method} {path}: {status}')
+        return status, response_headers, response_body
+
+    async def _exchange(self, raw):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.writer.write(raw)
+        await self.writer.drain()
+        status_line = await self.reader.readuntil(b'\r\n')
+        status = int(status_line.split()[1])
+        headers = {}
+        while (line := await self.reader.readuntil(b'\r\n')) != b'\r\n':
+            key, _, value = line.decode('latin-1').partition(':')
+            key, value = key.strip().lower(), value.strip()
+            if key == 'set-cookie':
+                self._store_cookie(value)
+            headers[key] = value
+        if headers.get('transfer-encoding') == 'chunked':
+            body = bytearray()
+            while size := int((await self.reader.readuntil(b'\r\n')).split(b';')[0], 16):
+                body += await self.reader.readexactly(size + 2)
+                del body[-2:]
+            await self.reader.readuntil(b'\r\n')
+        else:
+            body = await self.reader.readexactly(int(headers.get('content-length', 0)))
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status, headers, bytes(body)
+
+    def _store_cookie(self, header):
+        for name, morsel in SimpleCookie(header).items():
+            if morsel['max-age'] == '0' or not morsel.value:
+                self.cookies.pop(name, None)
+            else:
+                self.cookies[name] = morsel.value
+
+    async def get(self, name, path):
+        return await self.request(name, 'GET', path)
+
+    async def post(self, name, path, data):
+        return await self.request(name, 'POST', path, data)
+
+    async def login(self, username, password):
+        await self.get('login', '/accounts/login/')
+        status, headers, _ = await self.post('login_submit', '/accounts/login/', {'username': username, 'password': password})
+        if status != 302:
+            raise HttpError(f'Login as {username} failed')
+        self.logged_in = True
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        self.scenarios = {}
+        self.recording = False
+
+    def record(self, name, seconds, ok):
+        if not self.recording:
+            return
+        if ok:
+            self.latencies.setdefault(name, []).append(seconds)
+        else:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def summary(self, duration):
+        def describe(latencies, errors):
+            quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [latencies[0] if latencies else 0] * 99
+            return {
+                'requests': len(latencies),
+                'errors': errors,
+                'requests_per_second': round(len(latencies) / duration, 2),
+                'p50_ms': round(quantiles[49] * 1000, 1),
+                'p95_ms': round(quantiles[94] * 1000, 1),
+                'p99_ms': round(quantiles[98] * 1000, 1),
+                'mean_ms': round(statistics.fmean(latencies) * 1000, 1) if latencies else 0.0,
+            }
+
+        names = sorted(set(self.latencies) | set(self.errors))
+        return {
+            'endpoints': {name: describe(self.latencies.get(name, []), self.errors.get(name, 0)) for name in names},
+            'total': describe([value for values in self.latencies.values() for value in values], sum(self.errors.values())),
+            'scenarios': dict(sorted(self.scenarios.items())),
+        }
+
+
+class Catalog:
+    """What the scenarios request: slugs, filter values and logins from the database."""
+
+    def __init__(self, sample=500, users=None, password=None):
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'envents_project.settings.development')
+        sys.path.insert(0, str(PROJECT_ROOT))
+        import django
+
+        django.setup()
+        from django.contrib.auth import get_user_model
+
+        from apps.bookings.synthetic import PASSWORD
+        from apps.services.models import Service, ServiceCategory
+        from apps.venues.models import Venue, VenueCategory
+
+        venues = Venue.objects.filter(status='approved')
+        self.venue_slugs = list(venues.order_by('?').values_list('slug', flat=True)[:sample])
+        services = Service.objects.filter(status='approved').order_by('?').values_list('pk', 'slug')[:sample]
+        self.service_ids, self.service_slugs = zip(*services) if services else ((), ())
+        self.cities = sorted(set(venues.values_list('city', flat=True).distinct()[:50]))
+        self.venue_categories = list(VenueCategory.objects.values_list('slug', flat=True))
+        self.venue_category_ids = list(VenueCategory.objects.values_list('pk', flat=True))
+        self.service_categories = list(ServiceCategory.objects.values_list('slug', flat=True))
+        self.users = users or list(
+            get_user_model().objects.filter(username__startswith='synthetic', user_type='customer')
+            .order_by('?').values_list('username', flat=True)[:sample]
+        )
+        self.password = password or PASSWORD
+        if not self.venue_slugs or not self.service_slugs:
+            raise SystemExit("No approved venues/services to request; run manage.py seed_synthetic first")
+
+
+# Scenarios: coroutines taking (session, catalog, rng)
+
+async def browse(session, catalog, rng):
+    await session.get('home', '/')
+    await session.get('venue_list', '/venues/?' + urlencode({'city': rng.choice(catalog.cities)}))
+    await session.get('venue_detail', f'/venues/{rng.choice(catalog.venue_slugs)}/')
+    await session.get('service_list', '/services/')
+
+
+async def search(session, catalog, rng):
+    filters = {'capacity': rng.choice((50, 100, 200, 500)), 'max_price': rng.choice((5000, 10000, 20000))}
+    if catalog.cities:
+        filters['city'] = rng.choice(catalog.cities)
+    if catalog.venue_category_ids and rng.random() < 0.5:
+        filters['category'] = rng.choice(catalog.venue_category_ids)
+    await session.get('venue_list_filtered', '/venues/?' + urlencode(filters))
+    if catalog.venue_categories:
+        await session.get('venue_list_by_category', f'/venues/category/{rng.choice(catalog.venue_categories)}/')
+    if catalog.service_categories:
+        await session.get('service_list_by_category', f'/services/category/{rng.choice(catalog.service_categories)}/')
+
+
+async def detail(session, catalog, rng):
+    await session.get('venue_detail', f'/venues/{rng.choice(catalog.venue_slugs)}/')
+    await session.get('service_detail', f'/services/{rng.choice(catalog.service_slugs)}/')
+
+
+async def booking(session, catalog, rng):
+    if not session.logged_in:
+        await session.login(rng.choice(catalog.users), catalog.password)
+    path = f'/bookings/create/{rng.choice(catalog.venue_slugs)}/'
+    await session.get('create_booking', path)
+    start = rng.randint(10, 16)
+    status, headers, _ = await session.post('create_booking_submit', path, {
+        'booking_type': 'venue',
+        'event_date': time.strftime('%Y-%m-%d', time.localtime(time.time() + rng.randint(14, 300) * 86400)),
+        'start_time': f'{start}:00', 'end_time': f'{start + rng.randint(2, 6)}:00',
+        'guest_count': rng.randint(20, 200), 'event_type': 'Wedding', 'phone_number': '01700000000',
+    })
+    if status != 302:
+        raise HttpError('create_booking did not redirect; the form was rejected')
+    booking_path = urlsplit(headers['location']).path.removesuffix('add-services/')
+    await session.get('add_services', booking_path + 'add-services/')
+    await session.post('add_services_submit', booking_path + 'add-services/', {
+        'service_id': rng.choice(catalog.service_ids), 'quantity': 1,
+    })
+    await session.get('confirm_booking', booking_path + 'confirm/')
+    await session.post('confirm_booking_submit', booking_path + 'confirm/', {})
+    await session.get('booking_detail', booking_path)
+
+
+SCENARIOS = {'browse': browse, 'search': search, 'detail': detail, 'booking': booking}
+
+
+async def virtual_user(number, args, catalog, stats, deadline, weights):
+    rng = random.Random(args.seed * 10_000 + number)
+    session = Session(args.host, args.port, stats)
+    names, shares = zip(*weights.items())
+    try:
+        while time.monotonic() < deadline:
+            name = rng.choices(names, shares)[0]
+            try:
+                await SCENARIOS[name](session, catalog, rng)
+            except (OSError, asyncio.IncompleteReadError, HttpError):
+                continue  # already counted as an endpoint error
+            if stats.recording:
+                stats.scenarios[name] = stats.scenarios.get(name, 0) + 1
+            if args.think_ms:
+                await asyncio.sleep(rng.uniform(0, 2 * args.think_ms) / 1000)
+    finally:
+        await session.close()
+
+
+async def run(args, catalog, weights):
+    stats = Stats()
+    started = time.monotonic()
+    deadline = started + args.warmup + args.duration
+    users = [
+        asyncio.create_task(virtual_user(number, args, catalog, stats, deadline, weights))
+        for number in range(args.concurrency)
+    ]
+    await asyncio.sleep(args.warmup)
+    stats.recording = True
+    measured_from = time.monotonic()
+    await asyncio.gather(*users)
+    return stats.summary(time.monotonic() - measured_from)
+
+
+def parse_mix(values):
+    weights = {}
+    for value in values:
+        name, _, weight = value.partition('=')
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        weights[name] = float(weight or 1)
+    return {name: weight for name, weight in weights.items() if weight > 0}
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(result, baseline=None):
+    print(f"{result['concurrency']} users, {result['duration_s']:g}s, mix {result['mix']}, commit {result['commit']}")
+    header = f"  {'endpoint':<26} {'reqs':>7} {'err':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    print(header + ('   p95 vs baseline' if baseline else ''))
+    rows = {**result['endpoints'], 'TOTAL': result['total']}
+    base_rows = {**baseline['endpoints'], 'TOTAL': baseline['total']} if baseline else {}
+    for name, row in rows.items():
+        line = (f"  {name:<26} {row['requests']:>7} {row['errors']:>5} {row['requests_per_second']:>8} "
+                f"{row['p50_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8}")
+        before = base_rows.get(name)
+        if before and before['p95_ms']:
+            line += f"   {(row['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100:+6.1f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help='Server to load (ignored with --start)')
+    parser.add_argument('--start', metavar='WORKER_CLASS',
+                        help='Start gunicorn with this worker class (sync, gthread, gevent, uvicorn) for the run')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers with --start')
+    parser.add_argument('--latency-ms', type=float, default=0, help='Added per query with --start (benchmark settings)')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--warmup', type=float, default=3, help='Seconds of load before measuring starts')
+    parser.add_argument('--mix', nargs='+', default=list(DEFAULT_MIX), help='scenario=weight ...')
+    parser.add_argument('--think-ms', type=float, default=0, help='Mean pause between scenarios per user')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--users', nargs='+', help='Usernames for the booking scenario')
+    parser.add_argument('--password', help='Their password (default: the seed_synthetic password)')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    parser.add_argument('--compare', help='Earlier --output file to compare p95 against')
+    parser.add_argument('--json', action='store_true', help='Print JSON instead of the table')
+    args = parser.parse_args()
+    weights = parse_mix(args.mix)
+    catalog = Catalog(users=args.users, password=args.password)
+    if 'booking' in weights and not catalog.users:
+        raise SystemExit("No users for the booking scenario; run manage.py seed_synthetic or pass --users")
+
+    server = None
+    if args.start:
+        from worker_classes import _free_port, start_server, wait_until_ready
+
+        args.host, args.port = '127.0.0.1', _free_port()
+        server = start_server(args.start, args.port, args.workers, args.latency_ms)
+    else:
+        url = urlsplit(args.url)
+        args.host, args.port = url.hostname, url.port or 80
+    try:
+        if server is not None:
+            wait_until_ready(args.port)
+        summary = asyncio.run(run(args, catalog, weights))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    result = {
+        'commit': git_commit(),
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'server': args.start or args.url,
+        'concurrency': args.concurrency,
+        'duration_s': args.duration,
+        'mix': ' '.join(f'{name}={weight:g}' for name, weight in weights.items()),
+        **summary,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2) + '\n')
+    if args.json:
+        print(json.dumps(result))
+        return
+    print_report(result, json.loads(Path(args.compare).read_text()) if args.compare else None)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,21 @@
+"""
+Settings for the local benchmarks: development settings served like
+production (DEBUG off) with an artificial round-trip added to every SQL query,
+so local runs behave like a remote database such as Neon.
+
+    BENCHMARK_DB_LATENCY_MS   added per query (default 20)
+    ASYNC_CONCURRENT_QUERIES  0 runs the async views' queries one by one
+"""
+import os
+
+from envents_project.settings.development import *  # noqa: F401,F403
+
+DEBUG = False
+ALLOWED_HOSTS = ['*']
+SECURE_SSL_REDIRECT = False
+# Persistent connections, as in production (which also turns them off under gevent)
+DATABASES['default']['CONN_MAX_AGE'] = 0 if os.environ.get('GUNICORN_WORKER_CLASS') == 'gevent' else 600  # noqa: F405
+
+BENCHMARK_DB_LATENCY_MS = float(os.environ.get('BENCHMARK_DB_LATENCY_MS', 20))
+ASYNC_CONCURRENT_QUERIES = os.environ.get('ASYNC_CONCURRENT_QUERIES', '1') != '0'
+MIDDLEWARE = ['benchmarks.latency.DatabaseLatencyMiddleware', *MIDDLEWARE]  # noqa: F405
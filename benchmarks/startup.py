@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+"""
+Worker startup benchmark: process start -> django.setup() -> URLconf import
+-> first request, plus the slowest imports from ``python -X importtime``.
+
+Run from the project root:
+
+    python benchmarks/startup.py            # median of 5 cold starts
+    python benchmarks/startup.py --json     # machine-readable (used by the startup test)
+
+Each run is a fresh interpreter, so it measures what a gunicorn worker or a
+``manage.py`` command pays before doing any work.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Modules that must not be loaded just to boot and serve a plain request;
+# they belong to code paths that import them on first use
+HEAVY_MODULES = ('boto3', 'botocore', 'redis', 'storages.backends.s3boto3', 'PIL.Image', 'numpy')
+
+FIRST_REQUEST_PATH = '/health/'
+
+
+def child():
+    """Boot Django in this process and report the phase timings as JSON."""
+    import contextlib
+    import io
+
+    started = time.perf_counter()
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'envents_project.settings.development')
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+    import django
+    from django.conf import settings
+
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        django.setup()
+    setup_done = time.perf_counter()
+
+    from importlib import import_module
+    import_module(settings.ROOT_URLCONF)
+    urls_done = time.perf_counter()
+
+    from django.test import Client
+    hosts = [host for host in settings.ALLOWED_HOSTS if host != '*'] or ['localhost']
+    response = Client().get(FIRST_REQUEST_PATH, HTTP_HOST=hosts[0].lstrip('.'))
+    request_done = time.perf_counter()
+
+    print(json.dumps({
+        'setup_ms': (setup_done - started) * 1000,
+        'urls_ms': (urls_done - setup_done) * 1000,
+        'first_request_ms': (request_done - urls_done) * 1000,
+        'status_code': response.status_code,
+        'heavy_modules': sorted(name for name in HEAVY_MODULES if name in sys.modules),
+        'settings_output': output.getvalue(),
+    }))
+
+
+def run_once():
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, __file__, '--child'],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+    )
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    # Includes interpreter start-up, which the child cannot see
+    report['total_ms'] = (time.perf_counter() - started) * 1000
+    return report
+
+
+def slowest_imports(limit):
+    """Top-level imports by cumulative time during boot (``-X importtime``)."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', __file__, '--child'],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line.split('|')
+        # Only direct imports of the boot path, not their dependencies
+        if name.startswith(' ') and not name.startswith('  '):
+            rows.append((int(cumulative_us) / 1000, name.strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help='Slowest imports to list')
+    parser.add_argument('--json', action='store_true')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child()
+        return
+
+    runs = [run_once() for _ in range(args.runs)]
+    phases = ('setup_ms', 'urls_ms', 'first_request_ms', 'total_ms')
+    summary = {phase: round(statistics.median(run[phase] for run in runs), 1) for phase in phases}
+    summary.update({
+        'runs': args.runs,
+        'status_code': runs[-1]['status_code'],
+        'heavy_modules': runs[-1]['heavy_modules'],
+        'settings_output': runs[-1]['settings_output'],
+    })
+
+    if args.json:
+        print(json.dumps(summary))
+        return
+
+    print(f"Median of {args.runs} cold starts (GET {FIRST_REQUEST_PATH} -> {summary['status_code']}):")
+    for phase in phases:
+        print(f"  {phase:<18} {summary[phase]:8.1f}")
+    print(f"  heavy modules      {', '.join(summary['heavy_modules']) or 'none'}")
+    if summary['settings_output']:
+        print(f"  settings printed   {summary['settings_output']!r}")
+    print("\nSlowest imports (cumulative ms):")
+    for cumulative_ms, name in slowest_imports(args.top):
+        print(f"  {cumulative_ms:8.1f}  {name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+"""
+Throughput of gunicorn's sync, gthread, gevent and uvicorn (ASGI) workers
+under database latency. For each worker class this starts gunicorn with gunicorn.conf.py on
+the benchmark settings (every query delayed by --latency-ms), drives it with
+--concurrency keep-alive clients for --duration seconds, and reports
+requests/s and latency percentiles.
+
+    python benchmarks/worker_classes.py
+    python benchmarks/worker_classes.py --classes sync gevent --latency-ms 50 --json
+
+Needs the local database (seeded) from the development settings.
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(worker_class, port, workers, latency_ms, **extra_env):
+    env = {
+        **os.environ,
+        'DJANGO_SETTINGS_MODULE': 'benchmarks.settings',
+        'GUNICORN_WORKER_CLASS': worker_class,
+        'WEB_CONCURRENCY': str(workers),
+        'PORT': str(port),
+        'BENCHMARK_DB_LATENCY_MS': str(latency_ms),
+        **extra_env,
+    }
+    return subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--access-logfile', '/dev/null'],
+        cwd=PROJECT_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_until_ready(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            connection.request('GET', '/health/')
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"gunicorn did not come up on port {port}")
+
+
+def run_load(port, paths, concurrency, duration):
+    latencies, errors = [], []
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client(offset):
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        done, failed, index = [], 0, offset
+        while time.monotonic() < stop_at:
+            path = paths[index % len(paths)]
+            index += 1
+            started = time.perf_counter()
+            try:
+                connection.request('GET', path)
+                response = connection.getresponse()
+                response.read()
+                if response.status >= 400:
+                    failed += 1
+                    continue
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                connection.close()
+                continue
+            done.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(done)
+            errors.append(failed)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0] * 99
+    return {
+        'requests': len(latencies),
+        'errors': sum(errors),
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(quantiles[49] * 1000, 1),
+        'p95_ms': round(quantiles[94] * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--classes', nargs='+', default=['sync', 'gthread', 'gevent', 'uvicorn'])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--latency-ms', type=float, default=20)
+    parser.add_argument('--paths', nargs='+', default=['/', '/venues/', '/services/'])
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    results = {}
+    for worker_class in args.classes:
+        port = _free_port()
+        server = start_server(worker_class, port, args.workers, args.latency_ms)
+        try:
+            wait_until_ready(port)
+            run_load(port, args.paths, args.concurrency, 1)  # let every worker finish warming up
+            results[worker_class] = run_load(port, args.paths, args.concurrency, args.duration)
+        finally:
+            server.terminate()
+            server.wait()
+
+    if args.json:
+        print(json.dumps(results))
+        return
+    print(f"{args.workers} workers, {args.concurrency} clients, {args.latency_ms:g}ms per query, "
+          f"{args.duration:g}s per class:")
+    print(f"  {'class':<8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+    for worker_class, result in results.items():
+        print(f"  {worker_class:<8} {result['requests_per_second']:>8} {result['p50_ms']:>8} "
+              f"{result['p95_ms']:>8} {result['errors']:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,8 @@
 from django import forms
 from apps.venues.models import Venue, VenueCategory, Amenity, VenuePhoto, VenueCateringPackage
 from apps.services.models import Service, ServiceCategory, ServicePhoto
+from envents_project.media_metadata import apply_metadata
+from .uploads import verify_upload
 
 
 class VenueSubmissionForm(forms.ModelForm):
@@ -134,8 +136,55 @@ class ServiceSubmissionForm(forms.ModelForm):
         return service
 
 
-class VenuePhotoForm(forms.ModelForm):
+class DirectUploadPhotoMixin:
+    """
+    Accept either a regular file upload or an ``upload_token`` for a photo
+    the browser already uploaded straight to S3 (see business.uploads).
+    """
+    upload_kind = None
+    
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user = user
+        self.fields['upload_token'] = forms.CharField(
+            required=False, widget=forms.HiddenInput(attrs={'class': 'upload-token'})
+        )
+        self.fields['image'].required = False
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        token = cleaned_data.get('upload_token')
+        if token and not cleaned_data.get('image'):
+            try:
+                # A storage name: the object is already in the bucket, nothing to re-upload
+                cleaned_data['image'], metadata = verify_upload(token, self.user, self.upload_kind)
+                apply_metadata(self.instance, 'image', metadata)
+            except forms.ValidationError as e:
+                self.add_error('image', e)
+        elif not cleaned_data.get('image') and not self.instance.image:
+            self.add_error('image', "Please choose a photo.")
+        return cleaned_data
+
+
+class BaseDirectUploadPhotoFormSet(forms.BaseModelFormSet):
+    """Refuse the same direct upload attached by two forms of one submission."""
+    
+    def clean(self):
+        super().clean()
+        names = set()
+        for form in self.forms:
+            if not form.cleaned_data.get('upload_token') or self._should_delete_form(form):
+                continue
+            name = form.cleaned_data.get('image')
+            if name in names:
+                form.add_error('image', "This photo has already been submitted.")
+            elif name:
+                names.add(name)
+
+
+class VenuePhotoForm(DirectUploadPhotoMixin, forms.ModelForm):
     """Form for uploading venue photos"""
+    upload_kind = 'venue'
     
     class Meta:
         model = VenuePhoto
@@ -146,8 +195,9 @@ class VenuePhotoForm(forms.ModelForm):
         }
 
 
-class ServicePhotoForm(forms.ModelForm):
+class ServicePhotoForm(DirectUploadPhotoMixin, forms.ModelForm):
     """Form for uploading service photos"""
+    upload_kind = 'service'
     
     class Meta:
         model = ServicePhoto
@@ -193,6 +243,7 @@ class VenueCateringPackageForm(forms.ModelForm):
 VenuePhotoFormSet = forms.modelformset_factory(
     VenuePhoto, 
     form=VenuePhotoForm,
+    formset=BaseDirectUploadPhotoFormSet,
     extra=3,  # Number of empty forms to display
     max_num=5,  # Maximum number of forms to display
     can_delete=True  # Allow deleting images
@@ -201,6 +252,7 @@ VenuePhotoFormSet = forms.modelformset_factory(
 ServicePhotoFormSet = forms.modelformset_factory(
     ServicePhoto, 
     form=ServicePhotoForm,
+    formset=BaseDirectUploadPhotoFormSet,
     extra=3,  # Number of empty forms to display
     max_num=5,  # Maximum number of forms to display
     can_delete=True  # Allow deleting images
@@ -0,0 +1,222 @@
+"""
+Direct-to-S3 photo uploads for business submissions.
+
+Instead of streaming multi-megabyte photos through gunicorn and then
+re-uploading them to S3, the browser asks :func:`presign_photo_upload` for
+a presigned POST, uploads the file straight to the bucket at its final
+key, and submits only a signed token naming that key. The form then checks
+the object (:func:`verify_upload`): a HEAD for its type and size, then a
+bounded GET that Pillow must accept as a complete image of that type, since
+the Content-Type the browser declared says nothing about the bytes. The key
+is stored on ``VenuePhoto``/``ServicePhoto`` with the image metadata read
+on the way, without uploading anything again.
+
+Tokens are signed with the user's id so nobody can attach another user's
+upload, they expire after ``UPLOAD_TOKEN_MAX_AGE``, and a token whose
+object is already attached to a photo, or to another form of the same
+submission, is refused.
+
+Photos that do come through the server are written by
+:func:`upload_photo_files` on a bounded thread pool *before* the submission
+transaction opens, so the transaction only inserts rows
+(:func:`bulk_create_photos`) and never holds a connection during S3 PUTs.
+"""
+import logging
+import os
+from io import BytesIO
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from storages.utils import safe_join
+
+from apps.services.models import ServicePhoto
+from apps.venues.models import VenuePhoto
+from envents_project.image_derivatives import schedule_derivatives
+from envents_project.media_metadata import capture_on_upload, read_image_metadata, remember_in_storage
+
+logger = logging.getLogger(__name__)
+
+# kind -> upload_to of the matching photo model
+UPLOAD_PREFIXES = {
+    'venue': 'venues/photos/',
+    'service': 'services/photos/',
+}
+ALLOWED_CONTENT_TYPES = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/webp': '.webp',
+}
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+PRESIGN_EXPIRES = 15 * 60
+UPLOAD_TOKEN_MAX_AGE = 24 * 60 * 60
+_TOKEN_SALT = 'business.uploads'
+
+
+def direct_uploads_enabled(storage=None):
+    """Presigned uploads need an S3 storage; local FileSystemStorage keeps multipart forms."""
+    storage = storage or default_storage
+    return getattr(settings, 'DIRECT_PHOTO_UPLOADS', True) and hasattr(storage, 'bucket_name')
+
+
+def _client(storage):
+    return storage.bucket.meta.client
+
+
+def _key(storage, name):
+    # The object key for a storage name, as S3Storage builds it
+    return safe_join(storage.location, name)
+
+
+def presign_photo_upload(user, kind, content_type, storage=None):
+    """
+    Presigned POST for one photo. Returns ``{'url', 'fields', 'token'}``: the
+    browser POSTs ``fields`` plus the file to ``url`` and submits ``token``.
+    """
+    storage = storage or default_storage
+    if kind not in UPLOAD_PREFIXES:
+        raise ValidationError("Unknown upload type.")
+    if content_type not in ALLOWED_CONTENT_TYPES:
+        raise ValidationError("Photos must be JPEG, PNG or WebP images.")
+
+    name = f"{UPLOAD_PREFIXES[kind]}{uuid.uuid4().hex}{ALLOWED_CONTENT_TYPES[content_type]}"
+    post = _client(storage).generate_presigned_post(
+        Bucket=storage.bucket_name,
+        Key=_key(storage, name),
+        Fields={'Content-Type': content_type},
+        Conditions=[
+            {'Content-Type': content_type},
+            ['content-length-range', 1, MAX_UPLOAD_BYTES],
+        ],
+        ExpiresIn=PRESIGN_EXPIRES,
+    )
+    token = signing.dumps({'name': name, 'kind': kind, 'user': user.pk}, salt=_TOKEN_SALT)
+    return {'url': post['url'], 'fields': post['fields'], 'token': token}
+
+
+def _read_image(storage, name, etag):
+    """
+    Metadata of the uploaded object, once Pillow has verified it is a whole
+    image. The GET is capped at ``MAX_UPLOAD_BYTES`` and pinned to the object
+    the HEAD saw, in case it was replaced in between.
+    """
+    from PIL import Image  # only needed for uploads; keeps model imports light
+
+    try:
+        body = _client(storage).get_object(
+            Bucket=storage.bucket_name, Key=_key(storage, name),
+            Range=f'bytes=0-{MAX_UPLOAD_BYTES - 1}', IfMatch=etag,
+        )['Body']
+        with body:
+            file = BytesIO(body.read())
+    except Exception:
+        raise ValidationError("The photo upload did not complete. Please try again.")
+    try:
+        with Image.open(file) as image:
+            image.verify()
+    except Exception:
+        raise ValidationError("Photos must be JPEG, PNG or WebP images.")
+    return read_image_metadata(file)
+
+
+def verify_upload(token, user, kind, storage=None):
+    """
+    Check an upload token and the object it names. Returns the storage name to
+    assign to the photo's ``image`` field and the image's metadata (see
+    envents_project.media_metadata). Raises ``ValidationError``.
+    """
+    storage = storage or default_storage
+    try:
+        payload = signing.loads(token, salt=_TOKEN_SALT, max_age=UPLOAD_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        raise ValidationError("This upload has expired. Please choose the photo again.")
+    if payload.get('user') != user.pk or payload.get('kind') != kind:
+        raise ValidationError("Invalid upload.")
+
+    name = payload['name']
+    if any(model.objects.filter(image=name).exists() for model in (VenuePhoto, ServicePhoto)):
+        raise ValidationError("This photo has already been submitted.")
+    try:
+        head = _client(storage).head_object(Bucket=storage.bucket_name, Key=_key(storage, name))
+    except Exception:
+        raise ValidationError("The photo upload did not complete. Please try again.")
+
+    extension = os.path.splitext(name)[1]
+    if ALLOWED_CONTENT_TYPES.get(head.get('ContentType')) != extension:
+        raise ValidationError("Photos must be JPEG, PNG or WebP images.")
+    if not 0 < head.get('ContentLength', 0) <= MAX_UPLOAD_BYTES:
+        raise ValidationError("Photos must be smaller than 10 MB.")
+    metadata = _read_image(storage, name, head['ETag'])
+    if metadata['mime_type'] != head['ContentType']:
+        raise ValidationError("Photos must be JPEG, PNG or WebP images.")
+    return name, metadata
+
+
+def _store(photo):
+    # bulk_create skips pre_save, so capture metadata while the file is in memory
+    capture_on_upload(photo, 'image', 'image')
+    # FieldFile.save(save=False) runs upload_to and the storage's name
+    # generation, then marks the file committed so the model save won't re-upload
+    photo.image.save(photo.image.name, photo.image.file, save=False)
+    return photo.image.name
+
+
+def upload_photo_files(photos, max_workers=None):
+    """
+    Write the image files of unsaved photo instances to storage concurrently.
+
+    Photos whose image is already in storage (direct uploads) are skipped.
+    Returns the names written. If any upload fails, the ones that succeeded
+    are deleted again and the first error is raised.
+    """
+    pending = [photo for photo in photos if photo.image and not photo.image._committed]
+    if not pending:
+        return []
+    max_workers = max_workers or getattr(settings, 'PHOTO_UPLOAD_WORKERS', 4)
+
+    uploaded, errors = [], []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(pending)),
+                            thread_name_prefix='photo-upload') as pool:
+        for future in [pool.submit(_store, photo) for photo in pending]:
+            try:
+                uploaded.append(future.result())
+            except Exception as exc:
+                errors.append(exc)
+
+    if errors:
+        delete_photo_files(uploaded)
+        raise errors[0]
+    return uploaded
+
+
+def delete_photo_files(names, storage=None):
+    """
+    Best-effort removal of blobs whose rows were never committed. Content-
+    addressed blobs may be shared with existing photos, so referenced names
+    are kept.
+    """
+    storage = storage or default_storage
+    referenced = set()
+    if names:
+        for model in (VenuePhoto, ServicePhoto):
+            referenced.update(model.objects.filter(image__in=names).values_list('image', flat=True))
+    for name in set(names) - referenced:
+        try:
+            storage.delete(name)
+        except Exception:
+            logger.exception("Could not delete orphaned upload %s", name)
+
+
+def bulk_create_photos(model, photos):
+    """
+    Insert photo rows in one query. ``bulk_create`` skips ``post_save``, so
+    the storage cache is primed and derivative generation queued here instead.
+    """
+    created = model.objects.bulk_create(photos)
+    for photo in created:
+        remember_in_storage(photo, 'image', 'image')
+        schedule_derivatives(photo)
+    return created
@@ -7,4 +7,5 @@ urlpatterns = [
     path('', views.BusinessDashboardView.as_view(), name='dashboard'),
     path('venue/submit/', views.VenueSubmissionView.as_view(), name='submit_venue'),
     path('service/submit/', views.ServiceSubmissionView.as_view(), name='submit_service'),
+    path('photos/presign/', views.presign_photo_upload_view, name='presign_photo_upload'),
 ]
\ No newline at end of file
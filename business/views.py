@@ -1,17 +1,25 @@
 from django.shortcuts import render, redirect
 from django.views.generic import TemplateView
+from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
+from django.core.exceptions import ValidationError
 from django.db import transaction
+from django.http import JsonResponse
 from django.urls import reverse_lazy
+from django.views.decorators.http import require_POST
 
 from .forms import (
     VenueSubmissionForm, ServiceSubmissionForm, 
     VenuePhotoFormSet, ServicePhotoFormSet,
     VenueCateringPackageFormSet
 )
-from apps.venues.models import Venue, VenueCateringPackage
-from apps.services.models import Service
+from apps.venues.models import Venue, VenueCateringPackage, VenuePhoto
+from apps.services.models import Service, ServicePhoto
+from .uploads import (
+    bulk_create_photos, delete_photo_files, direct_uploads_enabled,
+    presign_photo_upload, upload_photo_files,
+)
 
 class BusinessDashboardView(LoginRequiredMixin, TemplateView):
     """Main dashboard view for venue owners and service providers to submit listings."""
@@ -26,6 +34,7 @@ class VenueSubmissionView(LoginRequiredMixin, TemplateView):
         context = super().get_context_data(**kwargs)
         context['venue_form'] = VenueSubmissionForm()
         context['photo_formset'] = VenuePhotoFormSet(queryset=Venue.objects.none())
+        context['direct_uploads'] = direct_uploads_enabled()
         context['catering_formset'] = VenueCateringPackageFormSet(
             queryset=VenueCateringPackage.objects.none(),
             prefix='catering'
@@ -34,7 +43,9 @@ class VenueSubmissionView(LoginRequiredMixin, TemplateView):
     
     def post(self, request, *args, **kwargs):
         venue_form = VenueSubmissionForm(request.POST, owner=request.user)
-        photo_formset = VenuePhotoFormSet(request.POST, request.FILES, queryset=Venue.objects.none())
+        photo_formset = VenuePhotoFormSet(
+            request.POST, request.FILES, queryset=Venue.objects.none(), form_kwargs={'user': request.user}
+        )
         catering_formset = VenueCateringPackageFormSet(
             request.POST, queryset=VenueCateringPackage.objects.none(), prefix='catering'
         )
@@ -45,16 +56,21 @@ class VenueSubmissionView(LoginRequiredMixin, TemplateView):
             return self._form_invalid(venue_form, photo_formset, catering_formset)
     
     def _form_valid(self, venue_form, photo_formset, catering_formset):
+        uploaded = []
         try:
+            # Upload photo files in parallel before the transaction opens, so
+            # it never holds a connection while S3 PUTs are in flight
+            photo_instances = photo_formset.save(commit=False)
+            uploaded = upload_photo_files(photo_instances)
+            
             with transaction.atomic():
                 # Save the venue
                 venue = venue_form.save()
                 
-                # Process the photo formset
-                photo_instances = photo_formset.save(commit=False)
+                # Insert the photo rows in one query
                 for instance in photo_instances:
                     instance.venue = venue
-                    instance.save()
+                bulk_create_photos(VenuePhoto, photo_instances)
                 
                 # Handle deleted images
                 for obj in photo_formset.deleted_objects:
@@ -73,6 +89,8 @@ class VenueSubmissionView(LoginRequiredMixin, TemplateView):
                 messages.success(self.request, "Your venue has been submitted for review. We'll notify you once it's approved.")
                 return redirect('business:dashboard')
         except Exception as e:
+            # Nothing references the uploaded files now
+            delete_photo_files(uploaded)
             messages.error(self.request, f"An error occurred: {str(e)}")
             return self._form_invalid(venue_form, photo_formset, catering_formset)
     
@@ -92,11 +110,14 @@ class ServiceSubmissionView(LoginRequiredMixin, TemplateView):
         context = super().get_context_data(**kwargs)
         context['service_form'] = ServiceSubmissionForm()
         context['photo_formset'] = ServicePhotoFormSet(queryset=Service.objects.none())
+        context['direct_uploads'] = direct_uploads_enabled()
         return context
     
     def post(self, request, *args, **kwargs):
         service_form = ServiceSubmissionForm(request.POST, provider=request.user)
-        photo_formset = ServicePhotoFormSet(request.POST, request.FILES, queryset=Service.objects.none())
+        photo_formset = ServicePhotoFormSet(
+            request.POST, request.FILES, queryset=Service.objects.none(), form_kwargs={'user': request.user}
+        )
         
         if service_form.is_valid() and photo_formset.is_valid():
             return self._form_valid(service_form, photo_formset)
@@ -104,16 +125,20 @@ class ServiceSubmissionView(LoginRequiredMixin, TemplateView):
             return self._form_invalid(service_form, photo_formset)
     
     def _form_valid(self, service_form, photo_formset):
+        uploaded = []
         try:
+            # Upload photo files in parallel before the transaction opens
+            instances = photo_formset.save(commit=False)
+            uploaded = upload_photo_files(instances)
+            
             with transaction.atomic():
                 # Save the service
                 service = service_form.save()
                 
-                # Process the photo formset
-                instances = photo_formset.save(commit=False)
+                # Insert the photo rows in one query
                 for instance in instances:
                     instance.service = service
-                    instance.save()
+                bulk_create_photos(ServicePhoto, instances)
                 
                 # Handle deleted images
                 for obj in photo_formset.deleted_objects:
@@ -122,6 +147,7 @@ class ServiceSubmissionView(LoginRequiredMixin, TemplateView):
                 messages.success(self.request, "Your service has been submitted for review. We'll notify you once it's approved.")
                 return redirect('business:dashboard')
         except Exception as e:
+            delete_photo_files(uploaded)
             messages.error(self.request, f"An error occurred: {str(e)}")
             return self._form_invalid(service_form, photo_formset)
     
@@ -130,3 +156,18 @@ class ServiceSubmissionView(LoginRequiredMixin, TemplateView):
         context['service_form'] = service_form
         context['photo_formset'] = photo_formset
         return render(self.request, self.template_name, context)
+
+
+@login_required
+@require_POST
+def presign_photo_upload_view(request):
+    """Presigned S3 POST for one submission photo (see business.uploads)."""
+    if not direct_uploads_enabled():
+        return JsonResponse({'error': "Direct uploads are not available."}, status=404)
+    try:
+        upload = presign_photo_upload(
+            request.user, request.POST.get('kind'), request.POST.get('content_type')
+        )
+    except ValidationError as e:
+        return JsonResponse({'error': e.messages[0]}, status=400)
+    return JsonResponse(upload)
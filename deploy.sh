@@ -72,7 +72,8 @@ sleep 20
 echo "🔄 Running database migrations..."
 docker-compose exec -T web python manage.py migrate
 
-# Collect static files (upload to S3)
+# Collect static files (upload to S3). Incremental: StaticStorage compares
+# against the manifest from the last run and only uploads changed files
 echo "📦 Collecting static files..."
 docker-compose exec -T web python manage.py collectstatic --noinput
 
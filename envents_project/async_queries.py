@@ -0,0 +1,82 @@
+"""
+Run independent ORM queries concurrently from async views.
+
+Django's async ORM methods (``aget``, ``acount``, ...) all hop onto the
+single thread-sensitive executor thread, so ``asyncio.gather`` over them
+still runs the queries one after another. :func:`gather_queries` runs each
+callable with ``sync_to_async(thread_sensitive=False)`` instead: every call
+gets an executor thread, and with it its own database connection, so a page
+that needs four independent round trips to Neon waits for roughly one.
+
+Those threads never see ``request_started``/``request_finished``, so each
+call closes its connection the way a request would (``CONN_MAX_AGE``). They
+come from one pool per process of ``ASYNC_QUERY_THREADS`` threads rather
+than the event loop's default executor: under sync/gthread workers every
+request runs its async view on a new event loop, whose executor threads
+would each leave a persistent connection behind.
+
+Before the calls start, the request's own connection is released like at
+the end of a request: with a pool it goes back for the calls to use.
+
+With ``ASYNC_CONCURRENT_QUERIES = False`` the calls run one after another on
+the request's own connection - for tests, whose data lives in a transaction
+only that connection can see.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _query_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'ASYNC_QUERY_THREADS', 8),
+                    thread_name_prefix='async-queries',
+                )
+    return _executor
+
+
+def _on_own_connection(call):
+    close_old_connections()
+    try:
+        return call()
+    finally:
+        close_old_connections()
+
+
+def _release_connections():
+    # Like close_old_connections, minus connections inside a transaction
+    for connection in connections.all(initialized_only=True):
+        if not connection.in_atomic_block:
+            connection.close_if_unusable_or_obsolete()
+
+
+def _one_by_one(calls):
+    return [call() for call in calls]
+
+
+async def gather_queries(*calls):
+    """
+    Run zero-argument callables that query the database concurrently and
+    return their results in order.
+    """
+    if not getattr(settings, 'ASYNC_CONCURRENT_QUERIES', True):
+        return await sync_to_async(_one_by_one)(calls)
+    # With a connection pool (envents_project.db_pool), hand the request's own
+    # connection back first: otherwise every request waiting here holds one
+    # while its calls wait for theirs, and a burst can drain the pool
+    await sync_to_async(_release_connections)()
+    executor = _query_executor()
+    return await asyncio.gather(*(
+        sync_to_async(_on_own_connection, thread_sensitive=False, executor=executor)(call) for call in calls
+    ))
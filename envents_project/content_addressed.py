@@ -0,0 +1,56 @@
+"""
+Content-addressed (SHA-256) names for uploaded photos.
+
+A photo's key is derived from its bytes -
+``venues/photos/ab/ab12...ef.jpg`` - so identical uploads map to a single
+object. Because a name can only ever hold one content, storages don't
+have to probe for free names (see ``ContentAddressedMixin``) and can skip
+the PUT entirely when the object already exists. Unreferenced blobs are
+removed by ``manage.py gc_media_blobs``.
+"""
+import os
+import re
+
+from django.utils.deconstruct import deconstructible
+
+from .media_metadata import capture_on_upload
+
+_CONTENT_ADDRESSED = re.compile(r'(?:^|/)([0-9a-f]{2})/\1[0-9a-f]{62}\.[a-z0-9]+$')
+
+
+def is_content_addressed(name):
+    return bool(name and _CONTENT_ADDRESSED.search(name))
+
+
+def content_addressed_name(prefix, sha256, filename):
+    extension = os.path.splitext(filename)[1].lower()
+    return f"{prefix}{sha256[:2]}/{sha256}{extension}"
+
+
+@deconstructible
+class ContentAddressedUploadTo:
+    """
+    ``upload_to`` for a file field whose metadata lives in
+    ``<field_name>_sha256`` etc. (see envents_project.media_metadata).
+    """
+
+    def __init__(self, prefix, field_name):
+        self.prefix = prefix
+        self.field_name = field_name
+
+    def __call__(self, instance, filename):
+        field_file = getattr(instance, self.field_name)
+        if field_file._committed:
+            # FieldFile.save(name, content) on a stored file: the new bytes
+            # aren't reachable from the instance, so keep a plain name
+            return f"{self.prefix}{filename}"
+        # Hash here rather than trusting <field>_sha256, which may be stale
+        # if the file was swapped after the metadata was captured
+        capture_on_upload(instance, self.field_name, self.field_name)
+        return content_addressed_name(self.prefix, getattr(instance, f'{self.field_name}_sha256'), filename)
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, ContentAddressedUploadTo)
+            and (self.prefix, self.field_name) == (other.prefix, other.field_name)
+        )
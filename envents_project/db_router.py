@@ -0,0 +1,175 @@
+"""
+Read-replica routing for catalog traffic.
+
+``ReplicaRouter`` sends reads of catalog models (venues, services) to one of
+the aliases in ``DATABASE_REPLICAS``; everything else, all writes and any
+read inside a transaction on the primary go to ``default``.
+
+Read-your-writes: when a request writes a review, favorite, booking or any
+other catalog/booking row, ``ReplicaPinningMiddleware`` sets a short-lived
+cookie and that browser's reads stay on the primary for
+``REPLICA_STICKY_SECONDS`` - longer than the replicas usually lag.
+
+Each replica is probed at most every ``REPLICA_CHECK_INTERVAL`` seconds per
+process; one that is unreachable or more than ``REPLICA_MAX_LAG_SECONDS``
+behind is skipped until a later probe succeeds, and with no healthy replica
+reads fall back to the primary.
+"""
+import contextvars
+import logging
+import random
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+# Reads of these apps' models may be served by a replica
+REPLICA_APPS = ('venues', 'services')
+# Writes to these apps' models pin the writer to the primary
+STICKY_APPS = REPLICA_APPS + ('bookings',)
+
+PIN_COOKIE = 'db_pin'
+
+# Seconds a replica has fallen behind; 0 when it has replayed everything it
+# received (an idle primary doesn't make it "lag") and NULL on a primary
+_LAG_SQL = """
+    SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END
+"""
+
+_request = contextvars.ContextVar('db_router_request', default=None)
+_health = {}  # alias -> (monotonic time of last probe, usable)
+_probe_lock = threading.Lock()
+
+
+class _RequestState:
+    # Mutated rather than replaced: queries of async views run in copies of
+    # the request's context (sync_to_async), which share this object
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.wrote = False
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _probe(alias):
+    try:
+        connection = connections[alias]
+        connection.close_if_unusable_or_obsolete()
+        with connection.cursor() as cursor:
+            if connection.vendor != 'postgresql':
+                cursor.execute('SELECT 1')
+                return True
+            cursor.execute(_LAG_SQL)
+            lag = cursor.fetchone()[0] or 0
+    except Exception as e:
+        logger.warning(f"Read replica {alias} is unavailable: {e}")
+        return False
+    if lag > _setting('REPLICA_MAX_LAG_SECONDS', 5):
+        logger.warning(f"Read replica {alias} is {lag:.1f}s behind; using the primary")
+        return False
+    return True
+
+
+def replica_usable(alias):
+    """Whether ``alias`` answered its last probe in time; re-probes when that is stale."""
+    checked_at, usable = _health.get(alias, (None, False))
+    if checked_at is not None and time.monotonic() - checked_at < _setting('REPLICA_CHECK_INTERVAL', 5):
+        return usable
+    # One thread probes; the others go on with the last known state
+    if not _probe_lock.acquire(blocking=checked_at is None):
+        return usable
+    try:
+        usable = _probe(alias)
+        _health[alias] = (time.monotonic(), usable)
+    finally:
+        _probe_lock.release()
+    return usable
+
+
+def reset_replica_health():
+    _health.clear()
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = _setting('DATABASE_REPLICAS', ())
+        if not replicas or model._meta.app_label not in REPLICA_APPS:
+            return None
+        state = _request.get()
+        if state is not None and (state.pinned or state.wrote):
+            return DEFAULT_DB_ALIAS
+        # Reads that are part of a write (select_for_update(), get_or_create())
+        # are routed through db_for_write; plain reads inside a transaction
+        # must still see its uncommitted rows
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        usable = [alias for alias in replicas if replica_usable(alias)]
+        return random.choice(usable) if usable else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _request.get()
+        if state is not None and model._meta.app_label in STICKY_APPS:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication
+        if db in _setting('DATABASE_REPLICAS', ()):
+            return False
+        return None
+
+
+class ReplicaPinningMiddleware:
+    """Keeps a browser on the primary for a while after it wrote catalog or booking rows."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state, token = self._begin(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request.reset(token)
+        return self._finish(state, response)
+
+    async def __acall__(self, request):
+        state, token = self._begin(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request.reset(token)
+        return self._finish(state, response)
+
+    def _begin(self, request):
+        state = _RequestState(pinned=PIN_COOKIE in request.COOKIES)
+        return state, _request.set(state)
+
+    def _finish(self, state, response):
+        if state.wrote:
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=_setting('REPLICA_STICKY_SECONDS', 10),
+                secure=settings.SESSION_COOKIE_SECURE,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
@@ -1,19 +1,34 @@
 """
 Health checks for the Envents application.
 This module provides endpoints for monitoring the application's health.
+
+The full check probes every dependency concurrently on a small shared thread
+pool, gives each probe a deadline (``HEALTH_CHECK_TIMEOUT`` seconds) and
+caches the combined result for ``HEALTH_CHECK_CACHE_SECONDS``, so frequent
+load-balancer probes neither hammer the backends nor tie up a worker behind
+a slow dependency.
 """
 
 from django.http import JsonResponse
 from django.views.decorators.http import require_GET
-import psycopg2
 from django.conf import settings
-import boto3
-import redis
-import json
+from django.db import connections
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from . import db_pool, storage_clients
 
 logger = logging.getLogger(__name__)
 
+_pool = None
+_pool_lock = threading.Lock()
+_in_flight = {}    # check name -> Future still running (possibly past its deadline)
+_cached = None     # (monotonic time, payload, http status)
+_redis_client = None
+
+
 @require_GET
 def health_check(request):
     """
@@ -30,75 +45,111 @@ def full_health_check(request):
     - S3 storage
     - Redis (if used)
     """
-    status = {
-        "status": "ok",
-        "database": check_database(),
-        "s3_storage": check_s3_storage(),
-        "redis": check_redis()
-    }
-    
+    global _cached
+    max_age = getattr(settings, 'HEALTH_CHECK_CACHE_SECONDS', 5)
+    cached = _cached
+    if cached and time.monotonic() - cached[0] < max_age:
+        payload, status_code = cached[1], cached[2]
+        return JsonResponse({**payload, "cached": True}, status=status_code)
+
+    payload = {"status": "ok", **run_checks()}
     # If any component is not ok, set overall status to error
-    if "error" in status["database"] or "error" in status["s3_storage"] or "error" in status["redis"]:
-        status["status"] = "error"
-        return JsonResponse(status, status=500)
-    
-    return JsonResponse(status)
+    status_code = 200
+    if any(result["status"] == "error" for result in payload.values() if isinstance(result, dict)):
+        payload["status"] = "error"
+        status_code = 500
+
+    _cached = (time.monotonic(), payload, status_code)
+    return JsonResponse({**payload, "cached": False}, status=status_code)
+
+def run_checks():
+    """
+    Run every check in ``CHECKS`` concurrently and return ``{name: result}``.
+    Each result carries ``latency_ms``; checks that miss the deadline are
+    reported as errors while they finish in the background.
+    """
+    timeout = getattr(settings, 'HEALTH_CHECK_TIMEOUT', 2.0)
+    futures = {name: _submit(name, check) for name, check in CHECKS.items()}
+    wait(futures.values(), timeout=timeout)
+
+    results = {}
+    for name, future in futures.items():
+        if future.done():
+            results[name] = future.result()
+        else:
+            logger.error(f"{name} health check timed out after {timeout}s")
+            results[name] = {"status": "error", "message": f"Timed out after {timeout}s",
+                             "latency_ms": round(timeout * 1000, 1)}
+    return results
+
+def _submit(name, check):
+    global _pool
+    with _pool_lock:
+        # A check that is still stuck from an earlier probe is awaited again
+        # rather than piling up another thread behind the same dependency
+        future = _in_flight.get(name)
+        if future is None or future.done():
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=len(CHECKS) * 2, thread_name_prefix='health-check')
+            future = _in_flight[name] = _pool.submit(_timed, name, check)
+    return future
+
+def _timed(name, check):
+    started = time.perf_counter()
+    try:
+        result = check()
+    except Exception as e:
+        logger.error(f"{name} health check failed: {str(e)}")
+        result = {"status": "error", "message": str(e)}
+    result["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
 
 def check_database():
     """Check database connection"""
+    # Django's connection for this pool thread: kept open between probes
+    # (CONN_MAX_AGE), or checked out of the connection pool and handed back
+    connection = connections['default']
+    connection.close_if_unusable_or_obsolete()
     try:
-        # Attempt to connect to the database
-        conn = psycopg2.connect(
-            dbname=settings.DATABASES['default']['NAME'],
-            user=settings.DATABASES['default']['USER'],
-            password=settings.DATABASES['default']['PASSWORD'],
-            host=settings.DATABASES['default']['HOST'],
-            port=settings.DATABASES['default']['PORT'],
-        )
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1")
-        cursor.close()
-        conn.close()
-        return {"status": "ok"}
-    except Exception as e:
-        logger.error(f"Database health check failed: {str(e)}")
-        return {"status": "error", "message": str(e)}
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+    finally:
+        connection.close_if_unusable_or_obsolete()
+    result = {"status": "ok"}
+    pool = db_pool.pool_stats()
+    if pool is not None:
+        result["pool"] = pool
+    return result
 
 def check_s3_storage():
     """Check S3 storage connection"""
-    try:
-        s3 = boto3.client(
-            's3',
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name=settings.AWS_S3_REGION_NAME,
-        )
-        # Check if bucket exists
-        s3.head_bucket(Bucket=settings.AWS_STORAGE_BUCKET_NAME)
-        return {"status": "ok"}
-    except Exception as e:
-        logger.error(f"S3 storage health check failed: {str(e)}")
-        return {"status": "error", "message": str(e)}
+    bucket_name = getattr(settings, 'AWS_STORAGE_BUCKET_NAME', None)
+    if not bucket_name:
+        return {"status": "skipped", "message": "S3 storage is not configured"}
+    # Shared per-process client: no new session or TLS handshake per probe
+    s3 = storage_clients.s3_client()
+    # Check if bucket exists
+    s3.head_bucket(Bucket=bucket_name)
+    return {"status": "ok"}
 
 def check_redis():
     """Check Redis connection"""
-    try:
-        # Extract host and port from REDIS_URL
-        redis_url = getattr(settings, 'REDIS_URL', 'redis://redis:6379/1')
-        # Parse the URL
-        host = 'redis'
-        port = 6379
-        
-        if '://' in redis_url:
-            parts = redis_url.split('://')[-1].split(':')
-            if len(parts) > 1:
-                host = parts[0]
-                port = int(parts[1].split('/')[0])
-        
-        # Connect to Redis
-        r = redis.Redis(host=host, port=port)
-        r.ping()
-        return {"status": "ok"}
-    except Exception as e:
-        logger.error(f"Redis health check failed: {str(e)}")
-        return {"status": "error", "message": str(e)}
\ No newline at end of file
+    global _redis_client
+    redis_url = getattr(settings, 'REDIS_URL', None)
+    if not redis_url:
+        return {"status": "skipped", "message": "Redis is not configured"}
+    if _redis_client is None:
+        import redis  # optional dependency; keeps worker boot from loading it
+
+        timeout = getattr(settings, 'HEALTH_CHECK_TIMEOUT', 2.0)
+        _redis_client = redis.Redis.from_url(
+            redis_url, socket_timeout=timeout, socket_connect_timeout=timeout
+        )
+    _redis_client.ping()
+    return {"status": "ok"}
+
+CHECKS = {
+    "database": check_database,
+    "s3_storage": check_s3_storage,
+    "redis": check_redis,
+}
@@ -0,0 +1,198 @@
+"""
+Fixed-size derivatives (thumb, card, hero) of venue and service photos.
+
+Listing pages used to download the original upload just to fill a
+300x200 card. After a photo is saved, :func:`schedule_derivatives` queues
+a job on a small background thread pool (after the transaction commits,
+so the request never waits on Pillow or S3). The job renders every variant
+as WebP plus a JPEG fallback, writes them through the photo's own storage
+(``MediaStorage`` in production, ``FileSystemStorage`` locally) and records
+their keys and dimensions in the photo's ``derivatives`` JSON column.
+Templates then pick the right file with the ``responsive_photo`` tag.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+
+from .media_metadata import apply_metadata, metadata_update, read_image_metadata
+
+logger = logging.getLogger(__name__)
+
+# name -> (max width, max height, crop to exactly that box). thumb and card
+# share a crop so they can stand in for each other in a srcset
+VARIANTS = {
+    'thumb': (240, 160, True),
+    'card': (600, 400, True),
+    'hero': (1600, 900, False),
+}
+
+# format -> (Pillow encoder, file extension, encoder options)
+FORMATS = {
+    'avif': ('AVIF', 'avif', {'quality': 55}),
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def enabled_formats():
+    """Configured formats this Pillow build can encode; JPEG is always last."""
+    from PIL import features
+
+    wanted = getattr(settings, 'IMAGE_DERIVATIVE_FORMATS', ('webp', 'jpeg'))
+    formats = [fmt for fmt in wanted if fmt != 'jpeg' and features.check(fmt)]
+    return formats + ['jpeg']
+
+
+def derivative_name(original_name, variant, extension):
+    directory, filename = os.path.split(original_name)
+    stem = os.path.splitext(filename)[0]
+    return f"{directory}/derivatives/{stem}_{variant}.{extension}"
+
+
+def _render(image, width, height, crop):
+    from PIL import Image, ImageOps
+
+    if crop:
+        return ImageOps.fit(image, (width, height), Image.Resampling.LANCZOS)
+    resized = image.copy()
+    resized.thumbnail((width, height), Image.Resampling.LANCZOS)  # never upscales
+    return resized
+
+
+def _reusable(storage, name):
+    # Like the original, restart the age of a reused derivative so
+    # gc_media_blobs keeps it (see ContentAddressedMixin.refresh)
+    refresh = getattr(storage, 'refresh', None)
+    return refresh(name) if refresh else storage.exists(name)
+
+
+def generate_derivatives(photo, overwrite=False):
+    """
+    Render and store every variant of ``photo.image``. Existing derivative
+    files are reused unless ``overwrite`` is set.
+
+    Returns the ``derivatives`` mapping, e.g.
+    ``{'card': {'width': 600, 'height': 400, 'webp': '<key>', 'jpeg': '<key>'}}``.
+    """
+    # Pillow is imported here and not at module level: this module is loaded
+    # by the photo signals at startup, rendering only happens on upload
+    from PIL import Image, ImageOps
+
+    storage = photo.image.storage
+    with photo.image.open('rb') as source:
+        data = BytesIO(source.read())
+    image = ImageOps.exif_transpose(Image.open(data)).convert('RGB')
+
+    derivatives = {}
+    for variant, (width, height, crop) in VARIANTS.items():
+        rendered = _render(image, width, height, crop)
+        entry = {'width': rendered.width, 'height': rendered.height}
+        for fmt in enabled_formats():
+            encoder, extension, options = FORMATS[fmt]
+            name = derivative_name(photo.image.name, variant, extension)
+            if overwrite and storage.exists(name):
+                storage.delete(name)
+            elif _reusable(storage, name):
+                # Originals are content-addressed, so an existing derivative
+                # was rendered from these same bytes (e.g. a duplicate upload)
+                entry[fmt] = name
+                continue
+            buffer = BytesIO()
+            rendered.save(buffer, encoder, **options)
+            entry[fmt] = storage.save(name, ContentFile(buffer.getvalue()))
+        derivatives[variant] = entry
+
+    updates = {'derivatives': derivatives}
+    if not photo.image_sha256:
+        # Direct-to-S3 uploads never passed through the server; we have the bytes now
+        metadata = read_image_metadata(data)
+        apply_metadata(photo, 'image', metadata)
+        updates.update(metadata_update('image', metadata))
+
+    # update() rather than save(): don't re-trigger the post_save hook
+    type(photo).objects.filter(pk=photo.pk).update(**updates)
+    photo.derivatives = derivatives
+    return derivatives
+
+
+def _run(model_label, pk):
+    try:
+        photo = apps.get_model(model_label).objects.filter(pk=pk).first()
+        if photo and photo.image:
+            generate_derivatives(photo)
+    except Exception:
+        logger.exception("Generating image derivatives for %s %s failed", model_label, pk)
+
+
+def _run_in_worker(model_label, pk):
+    try:
+        _run(model_label, pk)
+    finally:
+        # Worker threads hold their own DB connection
+        connection.close()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'IMAGE_DERIVATIVE_WORKERS', 2),
+                thread_name_prefix='image-derivatives',
+            )
+        return _executor
+
+
+def schedule_derivatives(photo):
+    """Generate derivatives for ``photo`` once the current transaction commits."""
+    label = photo._meta.label
+
+    def submit():
+        if getattr(settings, 'IMAGE_DERIVATIVES_ASYNC', True):
+            _get_executor().submit(_run_in_worker, label, photo.pk)
+        else:
+            _run(label, photo.pk)
+
+    transaction.on_commit(submit)
+
+
+def needs_derivatives(photo):
+    """True for a photo whose stored derivatives don't belong to its current file."""
+    if not photo.image:
+        return False
+    stored = photo.derivatives.get('card', {}).get('jpeg', '')
+    # Storages may append a suffix to avoid name clashes, so compare prefixes
+    return not stored.startswith(derivative_name(photo.image.name, 'card', '')[:-1])
+
+
+def photo_srcset(photo, fmt='jpeg', variant='card'):
+    """
+    ``srcset`` value listing the stored variants of ``photo`` in ``fmt`` with
+    ``variant``'s aspect ratio. The browser picks among them by width alone,
+    so mixing the cropped and uncropped variants would change the crop with
+    the viewport.
+    """
+    storage = photo.image.storage
+    shape = photo.derivatives[variant]
+    entries = sorted(
+        (
+            entry for entry in photo.derivatives.values()
+            if entry['width'] * shape['height'] == entry['height'] * shape['width']
+        ),
+        key=lambda entry: entry['width'],
+    )
+    return ', '.join(
+        f"{storage.url(entry[fmt])} {entry['width']}w" for entry in entries if fmt in entry
+    )
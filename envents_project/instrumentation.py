@@ -0,0 +1,258 @@
+"""
+Per-request performance instrumentation.
+
+``RequestMetricsMiddleware`` measures each request: SQL query count and
+time (an execute wrapper on every connection), cache hits and misses (the
+cache backends below), template render time (the template backend below)
+and total time. For each request it then
+
+* adds a ``Server-Timing`` header when the user is staff, so the numbers
+  show up in the browser's network panel;
+* logs one JSON line on the ``envents_project.requests`` logger;
+* adds the request to in-process, per-view histograms served as JSON to
+  staff at ``/metrics/requests/`` (per worker process, since start).
+
+The measurements live in a contextvar, so queries that async views run on
+executor threads (envents_project.async_queries) are counted for the right
+request. Outside a request the hooks cost one contextvar lookup.
+Disable with ``REQUEST_METRICS_ENABLED = False``.
+"""
+import bisect
+import json
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.cache.backends.locmem import LocMemCache as _LocMemCache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import JsonResponse
+from django.template.backends.django import DjangoTemplates as _DjangoTemplates, Template as _Template
+from django.views.decorators.http import require_GET
+
+logger = logging.getLogger('envents_project.requests')
+
+# Upper bounds (ms) of the latency histogram buckets; the last one is open
+HISTOGRAM_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_current = ContextVar('request_metrics', default=None)
+_MISSING = object()
+
+
+class RequestMetrics:
+    # Lists, not counters: async views add to them from several threads at
+    # once, and list.append is atomic
+    __slots__ = ('started', 'queries', 'cache_hits', 'cache_misses', 'templates')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = []       # seconds per query
+        self.cache_hits = []
+        self.cache_misses = []
+        self.templates = []     # seconds per top-level template render
+
+    def summary(self, total):
+        return {
+            'total_ms': round(total * 1000, 1),
+            'db_queries': len(self.queries),
+            'db_ms': round(sum(self.queries) * 1000, 1),
+            'cache_hits': len(self.cache_hits),
+            'cache_misses': len(self.cache_misses),
+            'template_ms': round(sum(self.templates) * 1000, 1),
+        }
+
+
+def current_metrics():
+    """The metrics of the request being served, or None."""
+    return _current.get()
+
+
+def _time_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries.append(time.perf_counter() - started)
+
+
+def _install_query_timer(sender, connection, **kwargs):
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+class _ViewHistogram:
+    __slots__ = ('count', 'buckets', 'totals')
+
+    def __init__(self):
+        self.count = 0
+        self.buckets = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+        self.totals = dict.fromkeys(('total_ms', 'db_queries', 'db_ms', 'cache_hits', 'cache_misses', 'template_ms'), 0)
+
+    def add(self, summary):
+        self.count += 1
+        self.buckets[bisect.bisect_left(HISTOGRAM_BUCKETS_MS, summary['total_ms'])] += 1
+        for name in self.totals:
+            self.totals[name] += summary[name]
+
+    def percentile(self, fraction):
+        # Upper bound of the bucket holding that request; None if it's the open one
+        rank, seen = fraction * self.count, 0
+        for bound, count in zip(HISTOGRAM_BUCKETS_MS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+    def as_dict(self):
+        return {
+            'requests': self.count,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'buckets': {
+                **{f'le_{bound}': count for bound, count in zip(HISTOGRAM_BUCKETS_MS, self.buckets)},
+                'gt_{}'.format(HISTOGRAM_BUCKETS_MS[-1]): self.buckets[-1],
+            },
+            'avg': {name: round(total / self.count, 1) for name, total in self.totals.items()},
+        }
+
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+
+def _add_to_histogram(view, summary):
+    with _histograms_lock:
+        histogram = _histograms.get(view)
+        if histogram is None:
+            histogram = _histograms[view] = _ViewHistogram()
+        histogram.add(summary)
+
+
+def view_histograms():
+    with _histograms_lock:
+        return {view: histogram.as_dict() for view, histogram in sorted(_histograms.items())}
+
+
+def reset_histograms():
+    with _histograms_lock:
+        _histograms.clear()
+
+
+def server_timing(summary):
+    return (
+        f'db;desc="{summary["db_queries"]} queries";dur={summary["db_ms"]}, '
+        f'cache;desc="{summary["cache_hits"]} hits, {summary["cache_misses"]} misses", '
+        f'tpl;desc="templates";dur={summary["template_ms"]}, '
+        f'total;dur={summary["total_ms"]}'
+    )
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        connection_created.connect(_install_query_timer, dispatch_uid='request-metrics')
+        # Connections this thread opened before the middleware was loaded
+        for connection in connections.all(initialized_only=True):
+            _install_query_timer(None, connection)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        summary = self._record(request, response, metrics)
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_staff:
+            response['Server-Timing'] = server_timing(summary)
+        return response
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        summary = self._record(request, response, metrics)
+        if hasattr(request, 'auser') and (await request.auser()).is_staff:
+            response['Server-Timing'] = server_timing(summary)
+        return response
+
+    def _record(self, request, response, metrics):
+        summary = metrics.summary(time.perf_counter() - metrics.started)
+        match = request.resolver_match
+        view = match.view_name if match else '<unresolved>'
+        _add_to_histogram(view, summary)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({
+                'view': view, 'method': request.method, 'path': request.path,
+                'status': response.status_code, **summary,
+            }))
+        return summary
+
+
+@staff_member_required
+@require_GET
+def request_metrics(request):
+    """Per-view latency histograms of this worker process."""
+    return JsonResponse({'buckets_ms': HISTOGRAM_BUCKETS_MS, 'views': view_histograms()})
+
+
+class CacheMetricsMixin:
+    """
+    Counts the current request's cache hits and misses. ``get_many`` and
+    ``get_or_set`` are counted too on backends that implement them with ``get``.
+    """
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        metrics = _current.get()
+        if metrics is not None:
+            (metrics.cache_misses if value is _MISSING else metrics.cache_hits).append(key)
+        return default if value is _MISSING else value
+
+
+class LocMemCache(CacheMetricsMixin, _LocMemCache):
+    pass
+
+
+class Template(_Template):
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.templates.append(time.perf_counter() - started)
+
+
+class DjangoTemplates(_DjangoTemplates):
+    """The Django template backend, with render time counted per request."""
+
+    def from_string(self, template_code):
+        return Template(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return Template(super().get_template(template_name).template, self)
@@ -0,0 +1,86 @@
+"""
+Image metadata captured once, at upload time.
+
+Byte size, pixel dimensions, SHA-256 and MIME type of an uploaded image are
+stored next to the file field (``<prefix>_size``, ``<prefix>_width``, ...)
+while the upload is still in memory, so admin pages and templates never
+have to ask S3 for a HEAD or download the file to measure it.
+"""
+import hashlib
+
+# Fields stored for every tracked file, as <prefix>_<suffix>
+METADATA_SUFFIXES = ('size', 'width', 'height', 'sha256', 'mime_type')
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def read_image_metadata(file):
+    """
+    ``{'size', 'width', 'height', 'sha256', 'mime_type'}`` for a file-like
+    object, read in one streaming pass plus Pillow's header parse.
+    """
+    from PIL import Image  # only needed for uploads; keeps model imports light
+
+    file.seek(0)
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in iter(lambda: file.read(READ_CHUNK_SIZE), b''):
+        digest.update(chunk)
+        size += len(chunk)
+
+    file.seek(0)
+    width = height = None
+    mime_type = ''
+    try:
+        with Image.open(file) as image:  # lazy: only the header is parsed
+            width, height = image.size
+            mime_type = Image.MIME.get(image.format, '')
+    except Exception:
+        pass
+    file.seek(0)
+
+    return {
+        'size': size,
+        'width': width,
+        'height': height,
+        'sha256': digest.hexdigest(),
+        'mime_type': mime_type,
+    }
+
+
+def apply_metadata(instance, prefix, metadata):
+    for suffix in METADATA_SUFFIXES:
+        setattr(instance, f'{prefix}_{suffix}', metadata[suffix])
+
+
+def clear_metadata(instance, prefix):
+    for suffix in METADATA_SUFFIXES:
+        setattr(instance, f'{prefix}_{suffix}', '' if suffix in ('sha256', 'mime_type') else None)
+
+
+def metadata_update(prefix, metadata):
+    """``metadata`` as keyword arguments for ``QuerySet.update()``."""
+    return {f'{prefix}_{suffix}': metadata[suffix] for suffix in METADATA_SUFFIXES}
+
+
+def capture_on_upload(instance, field_name, prefix):
+    """
+    ``pre_save`` helper: record metadata for a file that is about to be
+    uploaded (still in memory), and remember its size in the storage's
+    metadata cache. Files that are already in storage are left alone.
+    """
+    field_file = getattr(instance, field_name)
+    if not field_file:
+        clear_metadata(instance, prefix)
+        return
+    if field_file._committed:
+        return
+    apply_metadata(instance, prefix, read_image_metadata(field_file.file))
+
+
+def remember_in_storage(instance, field_name, prefix):
+    """``post_save`` helper: prime the storage metadata cache from the row."""
+    field_file = getattr(instance, field_name)
+    remember = getattr(field_file.storage, 'remember', None) if field_file else None
+    if remember:
+        remember(field_file.name, size=getattr(instance, f'{prefix}_size'))
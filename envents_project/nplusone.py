@@ -0,0 +1,169 @@
+"""
+N+1 query detection.
+
+``NPlusOneMiddleware`` fingerprints each SELECT a request runs by its
+normalized SQL (literals and ``IN (...)`` lists collapsed) and the project
+line that ran it. When one fingerprint runs more than ``NPLUSONE_THRESHOLD``
+times in a request, that is almost always a query in a loop that
+``select_related``/``prefetch_related`` should have batched:
+
+* with ``NPLUSONE_RAISE`` (the test runner turns it on) the query that
+  crosses the threshold raises :class:`NPlusOneError`, failing the test;
+* otherwise a warning is logged on ``envents_project.nplusone`` at the end
+  of the request. Only a ``NPLUSONE_SAMPLE_RATE`` fraction of requests is
+  checked; the others skip fingerprinting altogether.
+
+Like the request metrics, the per-request counts live in a contextvar, so
+queries async views run on executor threads count for their request.
+"""
+import logging
+import os
+import random
+import re
+import sys
+import threading
+from collections import Counter
+from contextvars import ContextVar
+from functools import lru_cache
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('nplusone', default=None)
+
+_IN_LIST = re.compile(r'\bIN \((?:[^()]|\([^()]*\))*\)', re.IGNORECASE)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_SPACE = re.compile(r'\s+')
+
+# Frames in these files are query hooks (the detector's, instrumentation's and
+# those registered with ignore_in_call_sites), not callers
+_HOOK_FILES = {__file__, os.path.join(os.path.dirname(__file__), 'instrumentation.py')}
+
+
+class NPlusOneError(AssertionError):
+    """The same query ran more than ``NPLUSONE_THRESHOLD`` times in one request."""
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql):
+    """The SQL with values replaced, so queries differing only in parameters match."""
+    sql = _IN_LIST.sub('IN (...)', sql)
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def _project_root():
+    return str(settings.BASE_DIR) + '/'
+
+
+def ignore_in_call_sites(filename):
+    """Pass over frames in ``filename``, another module wrapping query execution."""
+    _HOOK_FILES.add(filename)
+
+
+def call_site():
+    """``path:line (function)`` of the innermost project frame on the stack."""
+    root = _project_root()
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (filename.startswith(root) and filename not in _HOOK_FILES
+                and 'site-packages' not in filename):
+            return f"{filename[len(root):]}:{frame.f_lineno} ({frame.f_code.co_name})"
+        frame = frame.f_back
+    return '<unknown>'
+
+
+class _RequestQueries:
+    # Shared by the executor threads of an async view, hence the lock
+    __slots__ = ('counts', 'raise_errors', 'threshold', 'lock')
+
+    def __init__(self, threshold, raise_errors):
+        self.counts = Counter()
+        self.threshold = threshold
+        self.raise_errors = raise_errors
+        self.lock = threading.Lock()
+
+
+def _check_query(execute, sql, params, many, context):
+    state = _current.get()
+    if state is not None and not many and sql.lstrip()[:6].upper() == 'SELECT':
+        fingerprint = (normalize_sql(sql), call_site())
+        with state.lock:
+            state.counts[fingerprint] += 1
+            count = state.counts[fingerprint]
+        if state.raise_errors and count > state.threshold:
+            raise NPlusOneError(
+                f"Query ran {count} times in one request from {fingerprint[1]}; "
+                f"use select_related()/prefetch_related():\n{fingerprint[0]}"
+            )
+    return execute(sql, params, many, context)
+
+
+def _install_checker(sender, connection, **kwargs):
+    if _check_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_check_query)
+
+
+class NPlusOneMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'NPLUSONE_RAISE', False) and not getattr(settings, 'NPLUSONE_SAMPLE_RATE', 0):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        connection_created.connect(_install_checker, dispatch_uid='nplusone')
+        # Connections this thread opened before the middleware was loaded
+        for connection in connections.all(initialized_only=True):
+            _install_checker(None, connection)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = self._begin()
+        if state is None:
+            return self.get_response(request)
+        token = _current.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._report(request, state)
+        return response
+
+    async def __acall__(self, request):
+        state = self._begin()
+        if state is None:
+            return await self.get_response(request)
+        token = _current.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._report(request, state)
+        return response
+
+    def _begin(self):
+        raise_errors = getattr(settings, 'NPLUSONE_RAISE', False)
+        if not raise_errors and random.random() >= getattr(settings, 'NPLUSONE_SAMPLE_RATE', 0):
+            return None
+        return _RequestQueries(getattr(settings, 'NPLUSONE_THRESHOLD', 5), raise_errors)
+
+    def _report(self, request, state):
+        if state.raise_errors:
+            return
+        match = request.resolver_match
+        view = match.view_name if match else '<unresolved>'
+        for (sql, site), count in state.counts.items():
+            if count > state.threshold:
+                logger.warning(f"N+1 query in {view}: ran {count} times from {site}: {sql}")
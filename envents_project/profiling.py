@@ -0,0 +1,252 @@
+"""
+On-demand request profiling for staff.
+
+A staff user adds ``?_profile=1`` to a URL, or sends an ``X-Profile: 1``
+header, and ``ProfilerMiddleware`` runs the request under a sampling
+profiler: a thread records the Python stacks of the process's threads every
+``REQUEST_PROFILER_INTERVAL_MS``. Instead of the page, the response is a
+`speedscope <https://www.speedscope.app/>`_ file with
+
+* a sampled CPU profile per thread that did work (async views and, under
+  ASGI, sync views run off the request's thread; under concurrent load the
+  other threads may be serving other requests);
+* the request's SQL timeline, one track per thread, also listed with the
+  call sites under the file's ``sql`` key.
+
+For anyone else the parameter and header are ignored. Outside a profile the
+middleware costs a dict lookup and the SQL hook a contextvar lookup; one
+request per process is profiled at a time, others are served as usual, and
+sampling stops after ``REQUEST_PROFILER_MAX_SECONDS``. The sampler is a
+thread, so under gevent workers it only gets to run when the request yields.
+Disable with ``REQUEST_PROFILER_ENABLED = False``.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+
+from .nplusone import call_site, ignore_in_call_sites
+
+SPEEDSCOPE_SCHEMA = 'https://www.speedscope.app/file-format-schema.json'
+
+_current = ContextVar('profile', default=None)
+_busy = threading.Lock()
+
+ignore_in_call_sites(__file__)
+
+# Threads parked in these files are idle, not working for the request
+_IDLE_FILES = tuple(
+    os.path.join(os.path.dirname(threading.__file__), name)
+    for name in ('threading.py', 'selectors.py', 'queue.py', os.path.join('concurrent', 'futures', 'thread.py'))
+)
+
+
+def _wants_profile(request):
+    return request.GET.get('_profile') == '1' or request.headers.get('X-Profile') == '1'
+
+
+class Profile:
+    def __init__(self, interval, max_seconds):
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.thread_id = threading.get_ident()
+        self.frames = []        # speedscope frames: {name, file, line}
+        self._frame_index = {}
+        self.samples = {}       # thread ident -> [(seconds since start, stack, weight)]
+        self.thread_names = {}
+        self.queries = []       # (thread ident, start, end, sql, database, call site)
+        self._stop = threading.Event()
+        self.started = None
+        self.finished = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._sampler = threading.Thread(target=self._sample, name='request-profiler', daemon=True)
+        self._sampler.start()
+
+    def stop(self):
+        self.finished = time.perf_counter()
+        self._stop.set()
+        self._sampler.join()
+
+    def _sample(self):
+        own = threading.get_ident()
+        deadline = self.started + self.max_seconds
+        previous = self.started
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            if now > deadline:
+                break
+            for ident, frame in sys._current_frames().items():
+                if ident == own or (ident != self.thread_id and frame.f_code.co_filename in _IDLE_FILES):
+                    continue
+                self.samples.setdefault(ident, []).append((now - self.started, self._stack(frame), now - previous))
+            previous = now
+        self.thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+
+    def _stack(self, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            key = (code.co_name, code.co_filename, code.co_firstlineno)
+            index = self._frame_index.get(key)
+            if index is None:
+                index = self._frame_index[key] = len(self.frames)
+                self.frames.append({'name': code.co_name, 'file': code.co_filename, 'line': code.co_firstlineno})
+            stack.append(index)
+            frame = frame.f_back
+        stack.reverse()
+        return stack
+
+    def _thread_name(self, ident):
+        if ident == self.thread_id:
+            return 'request thread'
+        return self.thread_names.get(ident, f'thread {ident}')
+
+    def speedscope(self, name):
+        """The profile as a speedscope file."""
+        end_ms = (self.finished - self.started) * 1000
+        frames = list(self.frames)
+        # The request thread first, then the busiest
+        threads = sorted(self.samples, key=lambda ident: (ident != self.thread_id, -len(self.samples[ident])))
+        profiles = [
+            {
+                'type': 'sampled', 'name': f'CPU: {self._thread_name(ident)}', 'unit': 'milliseconds',
+                'startValue': 0, 'endValue': end_ms,
+                'samples': [stack for at, stack, weight in self.samples[ident]],
+                'weights': [weight * 1000 for at, stack, weight in self.samples[ident]],
+            }
+            for ident in threads
+        ]
+        sql_threads = {}
+        for ident, start, end, sql, database, site in self.queries:
+            frames.append({'name': f'{site}: {sql[:200]}', 'file': database})
+            sql_threads.setdefault(ident, []).extend((
+                {'type': 'O', 'frame': len(frames) - 1, 'at': start * 1000},
+                {'type': 'C', 'frame': len(frames) - 1, 'at': end * 1000},
+            ))
+        profiles += [
+            {
+                'type': 'evented', 'name': f'SQL: {self._thread_name(ident)}', 'unit': 'milliseconds',
+                'startValue': 0, 'endValue': end_ms, 'events': events,
+            }
+            for ident, events in sql_threads.items()
+        ]
+        return {
+            '$schema': SPEEDSCOPE_SCHEMA,
+            'name': name,
+            'exporter': 'envents_project.profiling',
+            'activeProfileIndex': 0,
+            'shared': {'frames': frames},
+            'profiles': profiles,
+            'sql': [
+                {
+                    'start_ms': round(start * 1000, 2), 'duration_ms': round((end - start) * 1000, 2),
+                    'thread': self._thread_name(ident), 'database': database, 'call_site': site, 'sql': sql,
+                }
+                for ident, start, end, sql, database, site in self.queries
+            ],
+        }
+
+
+def _time_query(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.queries.append((
+            threading.get_ident(), started - profile.started, time.perf_counter() - profile.started,
+            sql, context['connection'].alias, call_site(),
+        ))
+
+
+def _install_query_timer(sender, connection, **kwargs):
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+def _profile_response(request, profile):
+    match = request.resolver_match
+    name = match.view_name if match else request.path
+    response = HttpResponse(
+        json.dumps(profile.speedscope(f'{request.method} {request.get_full_path()}')),
+        content_type='application/json',
+    )
+    filename = name.replace(':', '-').replace('/', '_').strip('_') or 'request'
+    response['Content-Disposition'] = f'attachment; filename="{filename}.speedscope.json"'
+    response['Cache-Control'] = 'private, no-store'
+    return response
+
+
+class ProfilerMiddleware:
+    """Place after AuthenticationMiddleware: only staff can profile."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_PROFILER_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        connection_created.connect(_install_query_timer, dispatch_uid='request-profiler')
+        # Connections this thread opened before the middleware was loaded
+        for connection in connections.all(initialized_only=True):
+            _install_query_timer(None, connection)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not _wants_profile(request) or not (request.user.is_active and request.user.is_staff):
+            return self.get_response(request)
+        if not _busy.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            profile = self._start()
+            token = _current.set(profile)
+            try:
+                self.get_response(request)
+            finally:
+                _current.reset(token)
+                profile.stop()
+            return _profile_response(request, profile)
+        finally:
+            _busy.release()
+
+    async def __acall__(self, request):
+        if not _wants_profile(request):
+            return await self.get_response(request)
+        user = await request.auser()
+        if not (user.is_active and user.is_staff) or not _busy.acquire(blocking=False):
+            return await self.get_response(request)
+        try:
+            profile = self._start()
+            token = _current.set(profile)
+            try:
+                await self.get_response(request)
+            finally:
+                _current.reset(token)
+                profile.stop()
+            return _profile_response(request, profile)
+        finally:
+            _busy.release()
+
+    def _start(self):
+        profile = Profile(
+            getattr(settings, 'REQUEST_PROFILER_INTERVAL_MS', 5) / 1000,
+            getattr(settings, 'REQUEST_PROFILER_MAX_SECONDS', 30),
+        )
+        profile.start()
+        return profile
@@ -49,6 +49,12 @@ def configure_s3_storage():
             # Storage backends
             'STATICFILES_STORAGE': 'envents_project.storage_backends.StaticStorage',
             'DEFAULT_FILE_STORAGE': 'envents_project.storage_backends.MediaStorage',
+            # Django 5.1+ only reads STORAGES; the two settings above are
+            # kept for debug_storage.py
+            'STORAGES': {
+                'default': {'BACKEND': 'envents_project.storage_backends.MediaStorage'},
+                'staticfiles': {'BACKEND': 'envents_project.storage_backends.StaticStorage'},
+            },
             
             # URLs
             'STATIC_URL': f'https://{aws_s3_custom_domain}/static/',
@@ -82,13 +88,8 @@ def apply_s3_settings(settings_dict):
     if s3_settings.get('INSTALL_STORAGES') and 'storages' not in settings_dict.get('INSTALLED_APPS', []):
         settings_dict.setdefault('INSTALLED_APPS', []).append('storages')
     
-    # Apply the storage patch
-    try:
-        from envents_project.storage_backends import patch_default_storage
-        patch_default_storage()
-        print("✅ S3 storage configured and patched successfully")
-    except ImportError:
-        print("⚠️  Storage patch not applied (storage_backends not available)")
+    # MediaStorage/StaticStorage come from STORAGES and are created lazily on
+    # first use; nothing storage-related is instantiated at settings import
     
     return True
 
@@ -38,16 +38,24 @@ INSTALLED_APPS = [
     'apps.venues.apps.VenuesConfig',
     'apps.bookings.apps.BookingsConfig',
     'apps.services.apps.ServicesConfig',
+    'apps.analytics.apps.AnalyticsConfig',
+    'apps.monitoring.apps.MonitoringConfig',
     'business.apps.BusinessConfig'  # Business app
 ]
 
 MIDDLEWARE = [
+    'envents_project.instrumentation.RequestMetricsMiddleware',  # First, so its total covers the others
+    'envents_project.nplusone.NPlusOneMiddleware',  # Flags queries repeated in a loop
+    'apps.monitoring.slow_queries.SlowQueryMiddleware',  # Records slow queries and samples their plans
     'django.middleware.security.SecurityMiddleware',
     'django.middleware.gzip.GZipMiddleware',  # Compress responses - add early in pipeline
+    'envents_project.static_encodings.PrecompressedStaticMiddleware',  # .br/.gz static URLs the client accepts
+    'envents_project.db_router.ReplicaPinningMiddleware',  # Read-your-writes for replica routing
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'envents_project.profiling.ProfilerMiddleware',  # ?_profile=1 for staff; needs request.user
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -56,7 +64,8 @@ ROOT_URLCONF = 'envents_project.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Django's backend, timing renders for envents_project.instrumentation
+        'BACKEND': 'envents_project.instrumentation.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -128,3 +137,102 @@ DEBUG = False
 
 # Set TAILWIND_DEV_MODE (will be overridden in environment-specific settings)
 TAILWIND_DEV_MODE = False
+
+# Page view counters (apps.analytics): buffered in memory and upserted in
+# batches every PAGE_VIEW_FLUSH_INTERVAL seconds or PAGE_VIEW_FLUSH_EVENTS views
+PAGE_VIEW_FLUSH_INTERVAL = 30
+PAGE_VIEW_FLUSH_EVENTS = 500
+
+# Photo derivatives (envents_project.image_derivatives): rendered on a
+# background pool after upload; add 'avif' before 'webp' to also emit AVIF
+IMAGE_DERIVATIVE_FORMATS = ('webp', 'jpeg')
+IMAGE_DERIVATIVE_WORKERS = 2
+IMAGE_DERIVATIVES_ASYNC = True
+
+# Business photo submissions upload straight to S3 with presigned POSTs
+# (business.uploads); ignored when media is on local storage
+DIRECT_PHOTO_UPLOADS = True
+# Concurrent storage writes for photos that are posted through the server
+PHOTO_UPLOAD_WORKERS = 4
+
+# Static files on S3 (storage_backends.StaticStorage) are uploaded with .gz
+# and .br variants; templates link the first of these encodings the request's
+# Accept-Encoding lists, or the uncompressed file
+STATICFILES_PRECOMPRESSED_ENCODINGS = ('br', 'gzip')
+
+# Shared S3 client (envents_project.storage_clients): one keep-alive
+# connection pool per process for media, static files and health checks
+S3_MAX_POOL_CONNECTIONS = 32
+S3_CONNECT_TIMEOUT = 5
+S3_READ_TIMEOUT = 30
+
+# /health/full/ (envents_project.health_checks): checks run in parallel, each
+# bounded by HEALTH_CHECK_TIMEOUT seconds; results are reused for
+# HEALTH_CHECK_CACHE_SECONDS so frequent probes don't hit the backends
+HEALTH_CHECK_TIMEOUT = 2.0
+HEALTH_CHECK_CACHE_SECONDS = 5
+
+# Pages requested in-process by gunicorn's post_worker_init hook
+# (envents_project.warmup) before a new worker takes traffic
+WARMUP_PATHS = ('/', '/venues/', '/services/')
+
+# Async views (home, venue detail) run their independent queries concurrently,
+# each on its own executor thread and connection (envents_project.async_queries);
+# False runs them one after another on the request's connection.
+# ASYNC_QUERY_THREADS bounds those threads, and so their connections, per process
+ASYNC_CONCURRENT_QUERIES = True
+ASYNC_QUERY_THREADS = 8
+
+# Read replicas (envents_project.db_router): catalog reads go to one of
+# DATABASE_REPLICAS, except for REPLICA_STICKY_SECONDS after a browser wrote a
+# review/favorite/booking; replicas that fail a probe (every
+# REPLICA_CHECK_INTERVAL seconds) or lag more than REPLICA_MAX_LAG_SECONDS
+# are skipped in favour of the primary
+DATABASE_ROUTERS = ['envents_project.db_router.ReplicaRouter']
+DATABASE_REPLICAS = []
+REPLICA_STICKY_SECONDS = 10
+REPLICA_CHECK_INTERVAL = 5
+REPLICA_MAX_LAG_SECONDS = 5
+
+# Per-request metrics (envents_project.instrumentation): query/cache/template
+# timings, a Server-Timing header for staff, one JSON log line per request
+# and per-view histograms at /metrics/requests/. Caches count hits and misses
+# when they use an instrumented backend such as this one
+REQUEST_METRICS_ENABLED = True
+CACHES = {
+    'default': {
+        'BACKEND': 'envents_project.instrumentation.LocMemCache',
+    }
+}
+
+# N+1 detection (envents_project.nplusone): a query (normalized SQL + calling
+# line) run more than NPLUSONE_THRESHOLD times in one request logs a warning
+# for the NPLUSONE_SAMPLE_RATE fraction of requests that are checked. The test
+# runner sets NPLUSONE_RAISE so such a request fails its test instead
+NPLUSONE_THRESHOLD = 5
+NPLUSONE_SAMPLE_RATE = 0.05
+NPLUSONE_RAISE = False
+TEST_RUNNER = 'envents_project.test_runner.DiscoverRunner'
+
+# Slow-query capture (apps.monitoring.slow_queries): queries slower than
+# SLOW_QUERY_THRESHOLD_MS (None switches it off) are recorded per normalized
+# SQL with their view and calling line, in batches every
+# SLOW_QUERY_FLUSH_INTERVAL seconds. A SLOW_QUERY_EXPLAIN_RATE fraction of the
+# SELECTs is re-run afterwards under EXPLAIN (ANALYZE, BUFFERS), for at most
+# SLOW_QUERY_EXPLAIN_TIMEOUT seconds, keeping SLOW_QUERY_PLANS_KEPT plans per
+# query; queries on the session and account tables are never explained.
+# Superusers browse them in the admin under Monitoring
+SLOW_QUERY_THRESHOLD_MS = 200
+SLOW_QUERY_EXPLAIN_RATE = 0.1
+SLOW_QUERY_EXPLAIN_TIMEOUT = 30
+SLOW_QUERY_PLANS_KEPT = 5
+SLOW_QUERY_FLUSH_INTERVAL = 10
+
+# On-demand profiling (envents_project.profiling): staff add ?_profile=1 or an
+# X-Profile: 1 header to get a speedscope file of the request (stacks sampled
+# every REQUEST_PROFILER_INTERVAL_MS plus its SQL timeline) instead of the
+# page. One request per process at a time; sampling stops after
+# REQUEST_PROFILER_MAX_SECONDS
+REQUEST_PROFILER_ENABLED = True
+REQUEST_PROFILER_INTERVAL_MS = 5
+REQUEST_PROFILER_MAX_SECONDS = 30
@@ -5,6 +5,7 @@ These settings are meant for local development environments.
 """
 
 import os
+import warnings
 from pathlib import Path
 
 # Import all settings from the base.py file
@@ -40,6 +41,18 @@ DATABASES = {
     }
 }
 
+# Read replica for the router (envents_project.db_router). Without DB_REPLICA_*
+# it is a second alias on the local database; USE_DB_REPLICA=True routes
+# catalog reads through it. Tests treat it as a mirror of default.
+DATABASES['replica'] = {
+    **DATABASES['default'],
+    'NAME': env('DB_REPLICA_NAME', default=DATABASES['default']['NAME']),
+    'HOST': env('DB_REPLICA_HOST', default=DATABASES['default']['HOST']),
+    'PORT': env('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+    'TEST': {'MIRROR': 'default'},
+}
+DATABASE_REPLICAS = ['replica'] if env.bool('USE_DB_REPLICA', default=False) else []
+
 # Email Configuration
 EMAIL_BACKEND = env('EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
 EMAIL_HOST = env('EMAIL_HOST', default='smtp.gmail.com')
@@ -50,21 +63,19 @@ EMAIL_HOST_PASSWORD = env('EMAIL_HOST_PASSWORD', default='')
 DEFAULT_FROM_EMAIL = env('DEFAULT_FROM_EMAIL', default='webmaster@localhost')
 
 # Storage Configuration - Use S3 by default for consistency
+# (only settings values here; storages and their S3 clients are created on
+# first use, and nothing is printed so manage.py output stays clean)
 if USE_S3_IN_DEV:
     try:
-        print("Configuring S3 storage for development...")
         # Use unified S3 configuration
         apply_s3_settings(locals())
-        print("✅ S3 storage enabled in development")
         
     except Exception as e:
-        print(f"❌ S3 configuration failed: {e}")
-        print("🔄 Falling back to local storage")
+        warnings.warn(f"S3 configuration failed ({e}); falling back to local storage")
         # Apply fallback settings
         fallback_settings = get_fallback_settings()
         locals().update(fallback_settings)
         USE_S3_IN_DEV = False
 else:
-    print("📁 Using local storage in development")
     fallback_settings = get_fallback_settings()
     locals().update(fallback_settings)
@@ -0,0 +1,143 @@
+"""
+Vectorised helpers for the offline recommendation builders.
+
+Everything here works on plain NumPy arrays so the batch jobs never
+materialise ORM objects or a dense item x item matrix.
+"""
+from itertools import chain
+
+import numpy as np
+
+
+def fetch_columns(queryset, *fields, chunk_size=20000, dtype=np.int64):
+    """
+    Stream ``values_list`` rows straight into NumPy, one array per field.
+
+    Rows are read with a server-side iterator and flattened into a single
+    buffer, so memory stays proportional to the numbers themselves rather
+    than to Python tuples or model instances.
+    """
+    rows = queryset.values_list(*fields).iterator(chunk_size=chunk_size)
+    flat = np.fromiter(chain.from_iterable(rows), dtype=dtype)
+    return tuple(flat.reshape(-1, len(fields)).T)
+
+
+def index_positions(ids, values):
+    """
+    Map primary keys in ``values`` to their positions in the sorted ``ids``.
+
+    Returns ``(positions, mask)`` where ``mask`` flags the values that are
+    present in ``ids``; positions for missing values are meaningless.
+    """
+    values = np.asarray(values, dtype=np.int64)
+    if ids.size == 0:
+        return np.zeros_like(values), np.zeros(values.shape, dtype=bool)
+    positions = np.searchsorted(ids, values)
+    positions = np.clip(positions, 0, ids.size - 1)
+    return positions, ids[positions] == values
+
+
+def pair_counts(left, right, n_right):
+    """
+    Sum duplicate ``(left, right)`` pairs, i.e. the COO -> CSR step of a
+    sparse matrix build. Returns ``(left, right, counts)`` sorted by row.
+    """
+    left = np.asarray(left, dtype=np.int64)
+    right = np.asarray(right, dtype=np.int64)
+    if left.size == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty
+    keys, counts = np.unique(left * n_right + right, return_counts=True)
+    return keys // n_right, keys % n_right, counts
+
+
+def co_occurrence(groups, items, n_items, max_group_size=50):
+    """
+    Count how often two items share a group (a user, a booking, ...).
+
+    ``groups`` and ``items`` are parallel integer arrays. The result is the
+    symmetric item x item co-occurrence matrix, without its diagonal, in the
+    ``(left, right, counts)`` form returned by :func:`pair_counts`. Groups
+    larger than ``max_group_size`` are truncated so a single heavy user can't
+    blow up the number of generated pairs quadratically.
+    """
+    groups = np.asarray(groups, dtype=np.int64)
+    items = np.asarray(items, dtype=np.int64)
+    if groups.size == 0:
+        return pair_counts(groups, items, n_items)
+
+    order = np.lexsort((items, groups))
+    groups, items = groups[order], items[order]
+    unique = np.ones(groups.size, dtype=bool)
+    unique[1:] = (groups[1:] != groups[:-1]) | (items[1:] != items[:-1])
+    groups, items = groups[unique], items[unique]
+
+    starts, sizes = _group_bounds(groups)
+    if max_group_size:
+        rank_in_group = np.arange(groups.size) - np.repeat(starts, sizes)
+        keep = rank_in_group < max_group_size
+        groups, items = groups[keep], items[keep]
+        starts, sizes = _group_bounds(groups)
+
+    # Pair every row with every row of its own group (a vectorised self-join)
+    row_size = np.repeat(sizes, sizes)
+    row_start = np.repeat(starts, sizes)
+    left_rows = np.repeat(np.arange(items.size), row_size)
+    offsets = np.arange(left_rows.size) - np.repeat(np.cumsum(row_size) - row_size, row_size)
+    right_rows = np.repeat(row_start, row_size) + offsets
+    distinct = left_rows != right_rows
+
+    return pair_counts(items[left_rows[distinct]], items[right_rows[distinct]], n_items)
+
+
+def rows_slice(left, start, stop):
+    """Return the slice of a row-sorted COO matrix covering rows [start, stop)."""
+    lo, hi = np.searchsorted(left, [start, stop])
+    return slice(lo, hi)
+
+
+def top_k(scores, k):
+    """
+    Return the column indices of the ``k`` largest scores in each row, best
+    first, equal scores in column order. A partition finds each row's k-th
+    largest score, so the cost stays linear in the row length; only the
+    entries tied with it need their index to decide which are kept.
+    """
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    kth = -np.partition(-scores, k - 1, axis=1)[:, k - 1:k]
+    above = scores > kth
+    tied = scores == kth
+    keep = above | (tied & (np.cumsum(tied, axis=1) <= k - above.sum(axis=1, keepdims=True)))
+    # Exactly k per row, in column order
+    candidates = np.nonzero(keep)[1].reshape(-1, k)
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1, kind='stable')
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def sparse_top_k(left, right, scores, k):
+    """
+    Keep the ``k`` best entries of every row of a sparse COO matrix.
+
+    Returns ``(left, right, scores, rank)`` sorted by row and rank, ready to
+    be written out as one row per neighbour. Equal scores keep their input
+    order.
+    """
+    left = np.asarray(left, dtype=np.int64)
+    order = np.lexsort((-np.asarray(scores), left))
+    left, right, scores = left[order], np.asarray(right)[order], np.asarray(scores)[order]
+    starts, sizes = _group_bounds(left)
+    rank = np.arange(left.size) - np.repeat(starts, sizes)
+    keep = rank < k
+    return left[keep], right[keep], scores[keep], rank[keep]
+
+
+def _group_bounds(groups):
+    if groups.size == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    sizes = np.diff(np.r_[starts, groups.size])
+    return starts, sizes
@@ -0,0 +1,86 @@
+"""
+Precompressed static files for the clients that accept them.
+
+``StaticStorage`` uploads ``.br`` and ``.gz`` variants of hashed CSS/JS/SVG
+files. ``PrecompressedStaticMiddleware`` notes which of
+``STATICFILES_PRECOMPRESSED_ENCODINGS`` the request's Accept-Encoding lists,
+and ``{% static %}`` links the first of those that was uploaded; pages that
+link one vary on Accept-Encoding. Outside a request, and for clients that
+list none, the uncompressed file is linked.
+
+Kept out of storage_backends, which imports boto3, so loading the middleware
+doesn't pull it into worker boot.
+"""
+import contextvars
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+
+_current = contextvars.ContextVar('static_encodings', default=None)
+
+
+class _RequestState:
+    # Mutated rather than replaced: async views render in copies of the
+    # request's context (see db_router)
+    def __init__(self, accepted):
+        self.accepted = accepted
+        self.linked = False
+
+
+def accepted():
+    """Encodings to try for the current request, preferred first."""
+    state = _current.get()
+    return state.accepted if state else ()
+
+
+def mark_linked():
+    state = _current.get()
+    if state:
+        state.linked = True
+
+
+class PrecompressedStaticMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.encodings = tuple(getattr(settings, 'STATICFILES_PRECOMPRESSED_ENCODINGS', ()))
+        if not self.encodings:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state, token = self._begin(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(state, response)
+
+    async def __acall__(self, request):
+        state, token = self._begin(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(state, response)
+
+    def _begin(self, request):
+        # The same check as GZipMiddleware's
+        header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        state = _RequestState(tuple(
+            encoding for encoding in self.encodings if re.search(rf'\b{re.escape(encoding)}\b', header)
+        ))
+        return state, _current.set(state)
+
+    def _finish(self, state, response):
+        if state.linked:
+            patch_vary_headers(response, ('Accept-Encoding',))
+        return response
@@ -1,8 +1,113 @@
+import gzip
+import hashlib
+import json
+import mimetypes
 import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone as dt_timezone
+
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestFilesMixin
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.utils import timezone
 from storages.backends.s3boto3 import S3Boto3Storage
+from storages.utils import clean_name
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip variants are uploaded without it
+    brotli = None
+
+from . import static_encodings, storage_clients
+from .content_addressed import is_content_addressed
+
+
+# Text formats worth precompressing; images and fonts like woff2 are
+# already compressed
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.json', '.svg', '.map', '.txt', '.html', '.xml', '.ttf', '.eot', '.ico')
+COMPRESSED_VARIANTS = {'gzip': '.gz', 'br': '.br'}
+# Hashed names written by ManifestFilesMixin: name.<12 hex>.ext (+ .gz/.br)
+_HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^/]+$')
+
 
+def _compress(data, encoding):
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if encoding == 'br' and brotli is not None:
+        return brotli.compress(data, quality=11)
+    return None
 
-class StaticStorage(S3Boto3Storage):
+
+class SharedClientMixin:
+    """
+    Talk to S3 through the process-wide client in
+    envents_project.storage_clients instead of a boto3 session and
+    connection pool per storage instance and thread.
+
+    Connection options the storage sets differently from settings (see
+    ``storage_clients.CLIENT_OPTIONS``) select a client of their own. A
+    per-storage ``client_config`` or ``proxies`` can't be honoured by a
+    shared client and is refused.
+    """
+    
+    def __init__(self, **settings):
+        unsupported = sorted({'client_config', 'config', 'proxies'} & set(settings))
+        if unsupported:
+            raise ImproperlyConfigured(
+                f"{type(self).__name__} shares its S3 client; set {', '.join(unsupported)} in settings instead"
+            )
+        super().__init__(**settings)
+    
+    @property
+    def _client_overrides(self):
+        overrides = self.__dict__.get('_shared_client_overrides')
+        if overrides is None:
+            defaults = self.get_default_settings()
+            overrides = self.__dict__['_shared_client_overrides'] = {
+                name: getattr(self, name) for name in storage_clients.CLIENT_OPTIONS
+                if getattr(self, name) != defaults[name]
+            }
+        return overrides
+    
+    @property
+    def connection(self):
+        return storage_clients.s3_resource(**self._client_overrides)
+    
+    @property
+    def unsigned_connection(self):
+        return storage_clients.s3_resource(unsigned=True, **self._client_overrides)
+    
+    @property
+    def bucket(self):
+        return storage_clients.s3_bucket(self.bucket_name, **self._client_overrides)
+
+
+class StaticStorage(SharedClientMixin, ManifestFilesMixin, S3Boto3Storage):
+    """
+    Content-hashed static files on S3 (``app.3f2a9c1b7d4e.css``), so the
+    year-long immutable Cache-Control is safe across deploys.
+
+    Hashed CSS/JS/SVG files also get ``.gz`` and ``.br`` (when the brotli
+    package is installed) siblings uploaded with the matching
+    ``Content-Encoding``. During a request, ``url()`` points at the first
+    variant in ``STATICFILES_PRECOMPRESSED_ENCODINGS`` that the client's
+    Accept-Encoding lists (see ``PrecompressedStaticMiddleware``); otherwise
+    at the uncompressed file.
+
+    Besides Django's name -> hashed name map, the manifest records a digest
+    and upload time for every object, which makes ``collectstatic``
+    incremental: ``exists()`` and ``get_modified_time()`` are answered from
+    it instead of a HEAD per file, and unchanged content is never PUT again.
+    Deletes that collectstatic issues before overwriting a known file are
+    deferred to the end of the run and dropped if the file was re-saved.
+    Hashed files from earlier deploys are kept, so workers still running
+    the previous release keep resolving their URLs.
+    """
     location = 'static'
     default_acl = None  # Don't set ACL when bucket has Block Public Access enabled
     bucket_acl = None   # Don't set bucket ACL
@@ -10,13 +115,104 @@ class StaticStorage(S3Boto3Storage):
     querystring_auth = False  # Don't add authentication to URLs
     file_overwrite = True
     
-    def _normalize_name(self, name):
-        name = super()._normalize_name(name)
-        return name
+    def __init__(self, *args, **kwargs):
+        self._manifest_content = None
+        super().__init__(*args, **kwargs)
+        self._deferred_deletes = set()
+    
+    # Manifest
+    
+    def read_manifest(self):
+        self._manifest_content = super().read_manifest()
+        return self._manifest_content
+    
+    def load_manifest(self):
+        hashed_files, manifest_hash = super().load_manifest()
+        # {name: {'sha256': ..., 'modified': epoch}} for every object uploaded
+        self._published = json.loads(self._manifest_content).get('files', {}) if self._manifest_content else {}
+        return hashed_files, manifest_hash
+    
+    def save_manifest(self):
+        # Runs once at the end of post_process: first drop the files
+        # collectstatic deleted and never wrote back (e.g. with --clear)
+        for name in self._deferred_deletes:
+            for variant in [name] + [name + suffix for suffix in COMPRESSED_VARIANTS.values()]:
+                if self._published.pop(variant, None) is not None:
+                    super().delete(variant)
+        self._deferred_deletes.clear()
         
+        self.manifest_hash = self.file_hash(
+            None, ContentFile(json.dumps(sorted(self.hashed_files.items())).encode())
+        )
+        payload = {
+            'paths': self.hashed_files,
+            'version': self.manifest_version,
+            'hash': self.manifest_hash,
+            'files': self._published,
+        }
+        # A PUT replaces the previous manifest; no need to HEAD or delete it first
+        super()._save(self.manifest_name, ContentFile(json.dumps(payload).encode()))
+    
+    # Incremental uploads
+    
+    def exists(self, name):
+        if name in self._deferred_deletes:
+            return False
+        if name in self._published:
+            return True
+        return super().exists(name)
+    
+    def get_modified_time(self, name):
+        entry = self._published.get(name)
+        if entry is None:
+            return super().get_modified_time(name)
+        modified = datetime.fromtimestamp(entry['modified'], tz=dt_timezone.utc)
+        return modified if settings.USE_TZ else timezone.make_naive(modified)
+    
+    def delete(self, name):
+        if name in self._published:
+            # Usually followed by a save of the same content; see save_manifest
+            self._deferred_deletes.add(name)
+            return
+        super().delete(name)
+    
+    def _save(self, name, content):
+        content.seek(0)
+        data = content.read()
+        digest = hashlib.sha256(data).hexdigest()
+        self._deferred_deletes.discard(name)
+        
+        entry = self._published.get(name)
+        if entry is None or entry['sha256'] != digest:
+            name = super()._save(name, ContentFile(data))
+            self._published[name] = {'sha256': digest, 'modified': time.time()}
+            if _HASHED_NAME.search(name) and name.lower().endswith(COMPRESSIBLE_EXTENSIONS):
+                self._save_compressed_variants(name, data, digest)
+        return name
+    
+    def _save_compressed_variants(self, name, data, digest):
+        for encoding, suffix in COMPRESSED_VARIANTS.items():
+            compressed = _compress(data, encoding)
+            # Tiny files can grow when compressed; serve the original then
+            if compressed is None or len(compressed) >= len(data) * 0.95:
+                continue
+            super()._save(name + suffix, ContentFile(compressed))
+            self._published[name + suffix] = {'sha256': digest, 'modified': time.time()}
+    
+    # Serving
+    
+    def stored_name(self, name):
+        stored = super().stored_name(name)
+        for encoding in static_encodings.accepted():
+            suffix = COMPRESSED_VARIANTS.get(encoding)
+            if suffix and stored + suffix in self._published:
+                static_encodings.mark_linked()
+                return stored + suffix
+        return stored
+    
     def get_object_parameters(self, name):
         """
-        Set proper MIME types for files based on extension
+        Set proper MIME types, encodings and cache headers for files based on extension
         """
         params = super().get_object_parameters(name)
         
@@ -32,97 +228,163 @@ class StaticStorage(S3Boto3Storage):
             '.eot': 'application/vnd.ms-fontobject',
         }
         
+        # Precompressed variants carry the type of the file they encode
+        base = name
+        for encoding, suffix in COMPRESSED_VARIANTS.items():
+            if name.endswith(suffix):
+                base = name[:-len(suffix)]
+                params['ContentEncoding'] = encoding
+                params['ContentType'] = mimetypes.guess_type(base)[0] or 'application/octet-stream'
+        
         # Find the file extension
-        ext = os.path.splitext(name)[1].lower()
+        ext = os.path.splitext(base)[1].lower()
         
         # Set the content type if we have a mapping for this extension
         if ext in content_types:
             params['ContentType'] = content_types[ext]
-            # Add cache headers for static assets
+        
+        # Only hashed names are safe to cache forever; the manifest and the
+        # unhashed copies change in place
+        if name.endswith(self.manifest_name):
+            params['CacheControl'] = 'no-cache'
+        elif _HASHED_NAME.search(name):
             params['CacheControl'] = 'max-age=31536000, immutable'
+        else:
+            params['CacheControl'] = 'max-age=3600'
         
         return params
 
 
-class MediaStorage(S3Boto3Storage):
-    location = 'media'
-    default_acl = None  # Don't set ACL when bucket has Block Public Access enabled
-    bucket_acl = None   # Don't set bucket ACL
-    object_acl = None   # Don't set object ACL
-    querystring_auth = False  # Don't add authentication to URLs
-    file_overwrite = False
-
-
-def patch_default_storage():
+class MetadataCacheMixin:
     """
-    Force Django to use the correct storage backend.
-    This function patches the default_storage to ensure S3 is used.
+    Per-process LRU of what this storage already knows about its objects.
+
+    ``size()``, ``exists()`` and ``url()`` answer from memory for files that
+    were saved, looked up or primed with ``remember()`` (from the metadata
+    persisted on model rows) instead of issuing a HEAD per call. Only
+    positive ``exists()`` results are cached, so name-collision probing
+    stays correct.
     """
-    from django.core.files import storage
-    from django.conf import settings
-    
-    # Only patch if DEFAULT_FILE_STORAGE is set to our MediaStorage
-    if settings.DEFAULT_FILE_STORAGE == 'envents_project.storage_backends.MediaStorage':
-        # Create new MediaStorage instance
-        media_storage = MediaStorage()
-        
-        # Replace the default storage
-        storage.default_storage = media_storage
-        
-        print(f"✅ Patched default_storage to use: {media_storage}")
-        return True
-    
-    return False
+    metadata_cache_size = 10000
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        print(f"MediaStorage initialized with location: {self.location}")
-        print(f"MediaStorage bucket: {self.bucket_name}")
-        
-        # Check for potential MEDIA_ROOT conflicts
-        from django.conf import settings
-        media_root = getattr(settings, 'MEDIA_ROOT', None)
-        if media_root:
-            print(f"WARNING: MEDIA_ROOT is set to {media_root} but using S3 storage!")
-        else:
-            print("MEDIA_ROOT is properly cleared for S3 storage")
+        self._metadata = OrderedDict()
+        self._metadata_lock = threading.Lock()
+    
+    def _cached(self, name):
+        with self._metadata_lock:
+            entry = self._metadata.get(name)
+            if entry is not None:
+                self._metadata.move_to_end(name)
+            return entry
+    
+    def remember(self, name, **values):
+        """Record known facts (e.g. ``size``) about an object that exists."""
+        self._store(name, exists=True, **values)
+    
+    def _store(self, name, **values):
+        values = {key: value for key, value in values.items() if value is not None}
+        with self._metadata_lock:
+            entry = self._metadata.setdefault(name, {})
+            entry.update(values)
+            self._metadata.move_to_end(name)
+            while len(self._metadata) > self.metadata_cache_size:
+                self._metadata.popitem(last=False)
+    
+    def forget(self, name):
+        with self._metadata_lock:
+            self._metadata.pop(name, None)
     
     def _save(self, name, content):
-        """
-        Override _save to add debugging and ensure proper saving
-        """
-        print(f"MediaStorage._save called with name: {name}")
-        print(f"Content type: {type(content)}, size: {getattr(content, 'size', 'unknown')}")
-        try:
-            result = super()._save(name, content)
-            print(f"MediaStorage._save successful, result: {result}")
-            return result
-        except Exception as e:
-            print(f"MediaStorage._save failed with error: {e}")
-            import traceback
-            traceback.print_exc()
-            raise
+        name = super()._save(name, content)
+        self.remember(name, size=getattr(content, 'size', None))
+        return name
+    
+    def delete(self, name):
+        super().delete(name)
+        self.forget(name)
+    
+    def exists(self, name):
+        entry = self._cached(name)
+        if entry and entry.get('exists'):
+            return True
+        found = super().exists(name)
+        if found:
+            self.remember(name)
+        return found
+    
+    def size(self, name):
+        entry = self._cached(name)
+        if entry and 'size' in entry:
+            return entry['size']
+        size = super().size(name)
+        self.remember(name, size=size)
+        return size
+    
+    def url(self, name, *args, **kwargs):
+        # Signed URLs expire, so only plain public URLs are reusable
+        if self.querystring_auth or args or any(kwargs.values()):
+            return super().url(name, *args, **kwargs)
+        entry = self._cached(name)
+        if entry and 'url' in entry:
+            return entry['url']
+        url = super().url(name)
+        self._store(name, url=url)
+        return url
+
+
+class ContentAddressedMixin:
+    """
+    Content-addressed names (see envents_project.content_addressed) hold
+    exactly one content, so there is nothing to probe for and an existing
+    object means the bytes are already stored: skip the PUT.
+
+    The object is still copied onto itself (:meth:`refresh`) so its
+    ``LastModified`` restarts, and gc_media_blobs' grace period covers the
+    row that is about to reference it.
+    """
+    # Headers a REPLACE copy would otherwise drop
+    COPIED_HEADERS = ('ContentType', 'CacheControl', 'ContentEncoding', 'ContentDisposition', 'ContentLanguage')
     
     def get_available_name(self, name, max_length=None):
+        if is_content_addressed(name):
+            return name
+        return super().get_available_name(name, max_length=max_length)
+    
+    def save(self, name, content, max_length=None):
+        if is_content_addressed(name) and self.refresh(name):
+            return name
+        return super().save(name, content, max_length=max_length)
+    
+    def refresh(self, name):
         """
-        Override to add debugging
+        Restart the age of an existing object; False if there is none. Asks S3
+        itself: the metadata cache may still hold a blob that gc_media_blobs
+        deleted from another process.
         """
-        result = super().get_available_name(name, max_length)
-        print(f"MediaStorage.get_available_name: {name} -> {result}")
-        return result
+        key = self._normalize_name(clean_name(name))
+        client = self.connection.meta.client
+        try:
+            head = client.head_object(Bucket=self.bucket_name, Key=key)
+            # A copy in place must change something: REPLACE with the same metadata
+            client.copy_object(
+                Bucket=self.bucket_name, Key=key, CopySource={'Bucket': self.bucket_name, 'Key': key},
+                CopySourceIfMatch=head['ETag'], MetadataDirective='REPLACE', Metadata=head['Metadata'],
+                **{header: head[header] for header in self.COPIED_HEADERS if header in head},
+            )
+        except ClientError as err:
+            # Missing, or deleted since the HEAD
+            if err.response['ResponseMetadata']['HTTPStatusCode'] in (404, 412):
+                return False
+            raise
+        return True
 
 
-def patch_default_storage():
-    """
-    Patch Django's default storage to ensure S3 is used
-    """
-    from django.core.files.storage import default_storage
-    from django.conf import settings
-    
-    # Only patch if we're using S3
-    if hasattr(settings, 'DEFAULT_FILE_STORAGE') and 'MediaStorage' in settings.DEFAULT_FILE_STORAGE:
-        print("Patching default storage to use S3")
-        # Force the default storage to be our MediaStorage
-        default_storage._wrapped = MediaStorage()
-    else:
-        print("Not patching storage - not using S3")
+class MediaStorage(SharedClientMixin, ContentAddressedMixin, MetadataCacheMixin, S3Boto3Storage):
+    location = 'media'
+    default_acl = None  # Don't set ACL when bucket has Block Public Access enabled
+    bucket_acl = None   # Don't set bucket ACL
+    object_acl = None   # Don't set object ACL
+    querystring_auth = False  # Don't add authentication to URLs
+    file_overwrite = False
@@ -0,0 +1,170 @@
+"""
+Process-wide boto3 clients for S3.
+
+django-storages builds a boto3 session and resource (each with its own
+connection pool) per storage instance *and* per thread, and the health
+check built yet another client on every call. Creating a session loads
+botocore's service models, and every fresh pool means a fresh TLS
+handshake to S3.
+
+Here one session and one client per signing mode are created lazily, on
+first use, and shared by ``MediaStorage``, ``StaticStorage`` and the health
+checks. A storage that overrides one of ``CLIENT_OPTIONS`` (e.g.
+``access_key`` or ``endpoint_url`` in its ``STORAGES`` options) gets its own
+session and client for that combination, shared with any other storage that
+sets the same values. boto3 clients are thread-safe; resources are not, so
+each thread gets its own lightweight resource/bucket object wrapping the
+shared client. The pool is sized by ``S3_MAX_POOL_CONNECTIONS`` and uses TCP
+keep-alive. Everything is dropped after ``fork()`` so gunicorn workers never
+share sockets with the master.
+"""
+import os
+import threading
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+# django-storages options a storage may override; anything else about the
+# client comes from settings
+CREDENTIAL_OPTIONS = ('access_key', 'secret_key', 'security_token', 'session_profile')
+CLIENT_OPTIONS = CREDENTIAL_OPTIONS + (
+    'endpoint_url', 'region_name', 'use_ssl', 'verify', 'addressing_style', 'signature_version',
+)
+
+_lock = threading.Lock()
+_sessions = {}   # credential overrides -> session
+_resources = {}  # (unsigned, overrides) -> resource owning the shared client
+_local = threading.local()
+
+
+def _setting(name, default=None):
+    return getattr(settings, name, default)
+
+
+def _key(overrides):
+    unknown = set(overrides) - set(CLIENT_OPTIONS)
+    if unknown:
+        raise TypeError(f"Unsupported S3 client options: {', '.join(sorted(unknown))}")
+    return tuple(sorted(overrides.items()))
+
+
+def _build_session(access_key=None, secret_key=None, security_token=None, session_profile=None):
+    import boto3
+
+    if access_key or secret_key:
+        return boto3.Session(
+            aws_access_key_id=access_key, aws_secret_access_key=secret_key, aws_session_token=security_token,
+        )
+    profile = session_profile or _setting('AWS_S3_SESSION_PROFILE')
+    if profile:
+        return boto3.Session(profile_name=profile)
+    # Same lookup order as django-storages
+    return boto3.Session(
+        aws_access_key_id=_setting('AWS_S3_ACCESS_KEY_ID', _setting('AWS_ACCESS_KEY_ID')),
+        aws_secret_access_key=_setting('AWS_S3_SECRET_ACCESS_KEY', _setting('AWS_SECRET_ACCESS_KEY')),
+        aws_session_token=security_token or _setting('AWS_SESSION_TOKEN', _setting('AWS_SECURITY_TOKEN')),
+    )
+
+
+def _client_config(unsigned, overrides):
+    import botocore
+    from botocore.config import Config
+
+    config = Config(
+        s3={'addressing_style': overrides.get('addressing_style', _setting('AWS_S3_ADDRESSING_STYLE'))},
+        signature_version=(
+            botocore.UNSIGNED if unsigned else overrides.get('signature_version', _setting('AWS_S3_SIGNATURE_VERSION'))
+        ),
+        max_pool_connections=_setting('S3_MAX_POOL_CONNECTIONS', 32),
+        tcp_keepalive=True,
+        connect_timeout=_setting('S3_CONNECT_TIMEOUT', 5),
+        read_timeout=_setting('S3_READ_TIMEOUT', 30),
+        retries={'mode': 'standard', 'max_attempts': 3},
+    )
+    custom = _setting('AWS_S3_CLIENT_CONFIG')
+    return custom.merge(config) if custom else config
+
+
+def get_session(**credentials):
+    key = _key(credentials)
+    session = _sessions.get(key)
+    if session is None:
+        with _lock:
+            session = _sessions.get(key)
+            if session is None:
+                session = _sessions[key] = _build_session(**credentials)
+    return session
+
+
+def _shared_resource(unsigned, overrides):
+    key = (unsigned, _key(overrides))
+    resource = _resources.get(key)
+    if resource is None:
+        session = get_session(**{name: value for name, value in overrides.items() if name in CREDENTIAL_OPTIONS})
+        with _lock:
+            resource = _resources.get(key)
+            if resource is None:
+                resource = session.resource(
+                    's3',
+                    region_name=overrides.get('region_name', _setting('AWS_S3_REGION_NAME')),
+                    endpoint_url=overrides.get('endpoint_url', _setting('AWS_S3_ENDPOINT_URL')),
+                    use_ssl=overrides.get('use_ssl', _setting('AWS_S3_USE_SSL', True)),
+                    verify=overrides.get('verify', _setting('AWS_S3_VERIFY')),
+                    config=_client_config(unsigned, overrides),
+                )
+                _resources[key] = resource
+    return resource
+
+
+def s3_client(unsigned=False, **overrides):
+    """The process-wide S3 client (thread-safe) for these ``CLIENT_OPTIONS`` overrides."""
+    return _shared_resource(unsigned, overrides).meta.client
+
+
+def s3_resource(unsigned=False, **overrides):
+    """An S3 resource for the current thread, backed by the shared client."""
+    cache = _local.__dict__.setdefault('resources', {})
+    key = (unsigned, _key(overrides))
+    resource = cache.get(key)
+    if resource is None:
+        shared = _shared_resource(unsigned, overrides)
+        resource = cache[key] = type(shared)(client=shared.meta.client)
+    return resource
+
+
+def s3_bucket(name, **overrides):
+    """A ``Bucket`` resource for the current thread."""
+    cache = _local.__dict__.setdefault('buckets', {})
+    key = (name, _key(overrides))
+    bucket = cache.get(key)
+    if bucket is None:
+        bucket = cache[key] = s3_resource(**overrides).Bucket(name)
+    return bucket
+
+
+def reset():
+    """Drop all clients; the next call creates new ones."""
+    global _local
+    with _lock:
+        _sessions.clear()
+        _resources.clear()
+        _local = threading.local()
+
+
+def _after_fork():
+    # The lock may have been held by another thread of the parent
+    global _lock
+    _lock = threading.Lock()
+    reset()
+
+
+@receiver(setting_changed)
+def _reset_on_setting_change(setting, **kwargs):
+    if setting.startswith(('AWS_', 'S3_')):
+        reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    # The child gets a copy of the parent's pooled sockets; never reuse them
+    os.register_at_fork(after_in_child=_after_fork)
@@ -0,0 +1,19 @@
+from django.test import override_settings
+from django.test.runner import DiscoverRunner as _DiscoverRunner
+
+
+class DiscoverRunner(_DiscoverRunner):
+    """
+    Django's test runner, with N+1 queries failing the test that makes them
+    and slow-query capture off (its flushing thread would write outside the
+    test's transaction; its own tests switch it on).
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._overrides = override_settings(NPLUSONE_RAISE=True, SLOW_QUERY_THRESHOLD_MS=None)
+        self._overrides.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._overrides.disable()
+        super().teardown_test_environment(**kwargs)
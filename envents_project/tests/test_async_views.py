@@ -0,0 +1,84 @@
+import json
+import logging
+import time
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from apps.venues.models import Amenity, Venue, VenueCategory, VenueCateringPackage, VenuePhoto, VenueReview
+
+
+# Committed data and real concurrency: gather_queries runs each call on a
+# pool thread with its own connection, as in production
+@override_settings(ASYNC_CONCURRENT_QUERIES=True, REQUEST_METRICS_ENABLED=True)
+class AsyncViewTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        owner = User.objects.create_user('owner', password='x', user_type='venue_owner')
+        reviewer = User.objects.create_user('reviewer', password='x')
+        category = VenueCategory.objects.create(name='Halls', slug='halls')
+        amenity = Amenity.objects.create(name='Parking')
+        self.venues = []
+        for number in range(5):
+            venue = Venue.objects.create(
+                name=f'Venue {number}', description='A venue.', location='Gulshan', city='Dhaka',
+                address='Road 1', capacity=100, hourly_price=Decimal(100), owner=owner,
+                status='approved', is_featured=number < 3,
+            )
+            venue.category.set([category])
+            venue.amenities.set([amenity])
+            VenuePhoto.objects.bulk_create([VenuePhoto(venue=venue, image=f'venues/photos/{number}.jpg')])
+            VenueCateringPackage.objects.create(venue=venue, name='Standard', price=Decimal(10))
+            VenueReview.objects.create(venue=venue, user=reviewer, rating=4, comment='Nice.')
+            self.venues.append(venue)
+
+    def get(self, url):
+        """The response and the number of queries the request ran, on any thread."""
+        cache.clear()
+        with self.assertLogs('envents_project.requests', logging.INFO) as logs:
+            response = self.client.get(url, HTTP_HOST='localhost')
+        self.assertEqual(response.status_code, 200)
+        return response, json.loads(logs.records[-1].getMessage())['db_queries']
+
+    def test_venue_detail_prefetches_survive_concurrency(self):
+        url = reverse('venues:venue_detail', args=[self.venues[0].slug])
+        with self.settings(ASYNC_CONCURRENT_QUERIES=False):
+            expected = self.get(url)[1]
+
+        def slow_hasattr(obj, name):
+            # Widen the window between prefetch_related_objects checking for
+            # the instance's prefetch cache and creating it, where the
+            # concurrent prefetches race
+            found = hasattr(obj, name)
+            if name == '_prefetched_objects_cache' and not found:
+                time.sleep(0.05)
+            return found
+
+        with mock.patch('django.db.models.query.hasattr', slow_hasattr, create=True):
+            response, queries = self.get(url)
+        self.assertEqual(queries, expected)
+        venue = response.context['venue']
+        self.assertEqual(
+            set(venue._prefetched_objects_cache), {'category', 'amenities', 'photos', 'catering_packages'},
+        )
+        self.assertEqual(len(response.context['reviews']), 1)
+        self.assertEqual(response.context['avg_rating'], 4)
+        self.assertEqual(len(response.context['related_venues']), 3)
+
+    def test_home_tops_up_featured_venues_only_when_needed(self):
+        response, with_filler = self.get(reverse('home'))
+        top_venues = response.context['top_venues']
+        self.assertEqual(len(top_venues), 4)
+        self.assertEqual(sum(venue.is_featured for venue in top_venues), 3)
+        self.assertEqual(response.context['cities'], ['Dhaka'])
+
+        Venue.objects.filter(pk=self.venues[3].pk).update(is_featured=True)
+        response, featured_only = self.get(reverse('home'))
+        self.assertTrue(all(venue.is_featured for venue in response.context['top_venues']))
+        # No random filler query, nor its photo and category prefetches
+        self.assertEqual(featured_only, with_filler - 3)
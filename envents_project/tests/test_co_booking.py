@@ -0,0 +1,118 @@
+import datetime
+import math
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.bookings.models import Booking, BookingService, ServiceAffinity, VenueServiceAffinity
+from apps.services.models import Service, ServiceCategory
+from apps.venues.models import FavoriteVenue, RelatedVenue, Venue
+
+
+class CoBookingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        owner = User.objects.create_user('owner', password='x', user_type='venue_owner')
+        cls.guest = User.objects.create_user('guest', password='x')
+        cls.hall, cls.garden = (
+            Venue.objects.create(
+                name=name, description='-', location='-', city='Dhaka', address='-', capacity=100,
+                hourly_price=Decimal(100), owner=owner, status='approved',
+            )
+            for name in ('Hall', 'Garden')
+        )
+        cls.cake, cls.dj, cls.photos, cls.unlisted = (
+            Service.objects.create(
+                name=name, description='-', provider=owner, status=status, hourly_price=Decimal(100),
+                category=ServiceCategory.objects.create(name=name, slug=name.lower()),
+            )
+            for name, status in (('Cake', 'approved'), ('DJ', 'approved'), ('Photos', 'approved'), ('Draft', 'pending'))
+        )
+
+        # Hall: cake + dj, cake + photos, cake (+ a pending service); a
+        # cancelled dj + photos is ignored. Garden: dj. Service only: cake + dj
+        cls.book(cls.hall, cls.cake, cls.dj)
+        cls.book(cls.hall, cls.cake, cls.photos)
+        cls.book(cls.hall, cls.cake, cls.unlisted)
+        cls.book(cls.hall, cls.dj, cls.photos, status='cancelled')
+        cls.book(cls.garden, cls.dj)
+        cls.book(None, cls.cake, cls.dj)
+
+        for venue in (cls.hall, cls.garden):
+            FavoriteVenue.objects.create(user=cls.guest, venue=venue)
+
+    @classmethod
+    def book(cls, venue, *services, status='confirmed'):
+        booking = Booking.objects.create(
+            user=cls.guest, venue=venue, booking_type='venue' if venue else 'service_only',
+            event_date=datetime.date(2030, 1, 1), start_time=datetime.time(18), end_time=datetime.time(22),
+            guest_count=50, event_type='Wedding', status=status, total_cost=0,
+        )
+        for service in services:
+            BookingService.objects.create(booking=booking, service=service, price=100)
+        return booking
+
+    def setUp(self):
+        cache.clear()
+
+    def build(self):
+        call_command('build_co_booking_recommendations', stdout=StringIO())
+
+    def test_affinity_tables(self):
+        self.build()
+
+        # Hall is in 3 bookings; cake is in 4, dj in 3, photos in 1
+        self.assertEqual(
+            list(VenueServiceAffinity.objects.values_list('venue', 'service', 'rank', 'booking_count')),
+            [
+                (self.hall.pk, self.cake.pk, 0, 3),    # 3 / sqrt(3 x 4)
+                (self.hall.pk, self.photos.pk, 1, 1),  # 1 / sqrt(3 x 1)
+                (self.hall.pk, self.dj.pk, 2, 1),      # 1 / sqrt(3 x 3)
+                (self.garden.pk, self.dj.pk, 0, 1),
+            ],
+        )
+        scores = VenueServiceAffinity.objects.filter(venue=self.hall).values_list('score', flat=True)
+        for score, expected in zip(scores, (3 / math.sqrt(12), 1 / math.sqrt(3), 1 / 3)):
+            self.assertAlmostEqual(score, expected)
+
+        self.assertEqual(
+            list(ServiceAffinity.objects.values_list('service', 'related', 'rank', 'booking_count')),
+            [
+                (self.cake.pk, self.dj.pk, 0, 2),
+                (self.cake.pk, self.photos.pk, 1, 1),
+                (self.dj.pk, self.cake.pk, 0, 2),
+                (self.photos.pk, self.cake.pk, 0, 1),
+            ],
+        )
+        self.assertEqual(
+            list(RelatedVenue.objects.filter(kind='co_favorite').values_list('venue', 'related', 'rank')),
+            [(self.hall.pk, self.garden.pk, 0), (self.garden.pk, self.hall.pk, 0)],
+        )
+
+    def frequently_booked(self, booking):
+        self.client.force_login(self.guest)
+        response = self.client.get(reverse('bookings:add_services', args=[booking.pk]), HTTP_HOST='localhost')
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_add_services_panel(self):
+        venue_booking = self.book(self.hall, self.cake, status='pending')
+        service_booking = self.book(None, self.cake, status='pending')
+        self.assertNotContains(self.frequently_booked(venue_booking), 'Frequently Booked Together')
+
+        self.build()
+        # Services already on the booking are left out
+        response = self.frequently_booked(venue_booking)
+        self.assertEqual([service.name for service in response.context['frequently_booked']], ['Photos', 'DJ'])
+        self.assertContains(response, 'Frequently Booked Together')
+        self.assertContains(response, 'Booked together 1 time<')
+
+        response = self.frequently_booked(service_booking)
+        self.assertEqual([service.name for service in response.context['frequently_booked']], ['DJ', 'Photos'])
+        self.assertContains(response, 'Booked together 2 times')
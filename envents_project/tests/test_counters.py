@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from django.test import RequestFactory, SimpleTestCase, TestCase
+
+from apps.analytics import counters
+from apps.analytics.models import HourlyPageView
+
+BROWSER = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36'
+
+
+class FailedFlushTests(SimpleTestCase):
+    def setUp(self):
+        self.buffer = counters.ViewCounterBuffer(flush_interval=3600, flush_events=10**6)
+
+    def fail_flush(self):
+        with mock.patch.object(counters, '_upsert', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.buffer.flush()
+
+    def test_counts_are_kept_for_a_retry(self):
+        self.buffer.add('venue', 1)
+        self.buffer.add('venue', 1)
+        self.fail_flush()
+        self.assertEqual(sum(self.buffer.drain().values()), 2)
+
+    @mock.patch.object(counters, 'MAX_RETAINED_ROWS', 3)
+    def test_counts_past_the_cap_are_dropped(self):
+        for object_id in range(4):
+            self.buffer.add('venue', object_id)
+        with self.assertLogs(counters.logger, 'ERROR'):
+            self.fail_flush()
+        self.assertFalse(self.buffer.drain())
+
+
+class FlushTests(TestCase):
+    def setUp(self):
+        self.buffer = counters.ViewCounterBuffer(flush_interval=3600, flush_events=10**6)
+
+    def test_flushes_add_to_the_hour_row(self):
+        hour = datetime(2026, 3, 1, 14, tzinfo=timezone.utc)
+        self.buffer.add('venue', 7, when=hour + timedelta(minutes=5))
+        self.buffer.add('venue', 7, when=hour + timedelta(minutes=50))
+        self.buffer.add('service', 7, when=hour)
+        self.assertEqual(self.buffer.flush(), 2)
+        self.buffer.add('venue', 7, when=hour + timedelta(minutes=59, seconds=59))
+        self.buffer.add('venue', 7, when=hour + timedelta(hours=1))
+        self.assertEqual(self.buffer.flush(), 2)
+        self.assertEqual(self.buffer.flush(), 0)
+
+        self.assertEqual(
+            sorted(HourlyPageView.objects.values_list('kind', 'hour', 'views')),
+            [('service', hour, 1), ('venue', hour, 3), ('venue', hour + timedelta(hours=1), 1)],
+        )
+
+    @mock.patch.object(counters, 'UPSERT_BATCH_SIZE', 2)
+    def test_rows_are_written_in_batches(self):
+        hour = datetime(2026, 3, 1, 14, tzinfo=timezone.utc)
+        for object_id in range(5):
+            self.buffer.add('venue', object_id, when=hour)
+        with self.assertNumQueries(3):
+            self.assertEqual(self.buffer.flush(), 5)
+        self.assertEqual(HourlyPageView.objects.filter(views=1).count(), 5)
+
+
+class RecordViewTests(SimpleTestCase):
+    def setUp(self):
+        self.buffer = counters.ViewCounterBuffer(flush_interval=3600, flush_events=10**6)
+        patch = mock.patch.object(counters, 'view_counter', self.buffer)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def recorded(self, method='get', **headers):
+        counters.record_view(getattr(RequestFactory(), method)('/venues/hall/', **headers), 'venue', 1)
+        return sum(self.buffer.drain().values())
+
+    def test_browser_views_are_counted(self):
+        self.assertEqual(self.recorded(HTTP_USER_AGENT=BROWSER), 1)
+
+    def test_bots_scripts_and_prefetches_are_not(self):
+        for headers in (
+            {},
+            {'HTTP_USER_AGENT': ''},
+            {'HTTP_USER_AGENT': 'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)'},
+            {'HTTP_USER_AGENT': 'facebookexternalhit/1.1'},
+            {'HTTP_USER_AGENT': 'python-requests/2.32.3'},
+            {'HTTP_USER_AGENT': BROWSER, 'HTTP_SEC_PURPOSE': 'prefetch;prerender'},
+            {'HTTP_USER_AGENT': BROWSER, 'HTTP_PURPOSE': 'prefetch'},
+        ):
+            with self.subTest(headers=headers):
+                self.assertEqual(self.recorded(**headers), 0)
+        self.assertEqual(self.recorded('post', HTTP_USER_AGENT=BROWSER), 0)
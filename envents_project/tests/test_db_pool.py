@@ -0,0 +1,51 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+
+from envents_project.db_pool import POOL_DEFAULTS, configure_pool
+
+
+class ConfigurePoolTests(SimpleTestCase):
+    def configure(self, **options):
+        database = {'NAME': 'envents', 'CONN_MAX_AGE': 600, 'OPTIONS': {'sslmode': 'require', **options}}
+        return configure_pool(database), database
+
+    def test_disabled_by_default(self):
+        enabled, database = self.configure(pool_max_size='20')
+        self.assertFalse(enabled)
+        # pool_* parameters are consumed either way: psycopg would reject them
+        self.assertEqual(database['OPTIONS'], {'sslmode': 'require'})
+        self.assertEqual(database['CONN_MAX_AGE'], 600)
+
+    def test_enabled(self):
+        for flag in ('true', 'True', '1', 'yes', 'on'):
+            with self.subTest(flag=flag):
+                enabled, database = self.configure(pool=flag)
+                self.assertTrue(enabled)
+                self.assertEqual(database['OPTIONS'], {'sslmode': 'require', 'pool': POOL_DEFAULTS})
+                self.assertEqual(database['CONN_MAX_AGE'], 0)
+                self.assertTrue(database['CONN_HEALTH_CHECKS'])
+        self.assertFalse(self.configure(pool='false')[0])
+
+    def test_parameters_are_typed(self):
+        enabled, database = self.configure(pool='true', pool_min_size='4', pool_timeout='2.5', pool_max_idle='60')
+        self.assertEqual(
+            database['OPTIONS']['pool'],
+            {**POOL_DEFAULTS, 'min_size': 4, 'timeout': 2.5, 'max_idle': 60.0},
+        )
+        self.assertIsInstance(database['OPTIONS']['pool']['min_size'], int)
+
+    def test_max_size_is_at_least_min_size(self):
+        enabled, database = self.configure(pool='true', pool_min_size='24', pool_max_size='8')
+        self.assertEqual(database['OPTIONS']['pool']['max_size'], 24)
+
+    def test_default_max_size_covers_request_threads_and_query_threads(self):
+        from django.conf import settings
+
+        gthread_threads = 8  # gunicorn.conf.py's GUNICORN_THREADS default
+        self.assertGreaterEqual(POOL_DEFAULTS['max_size'], gthread_threads + settings.ASYNC_QUERY_THREADS)
+
+    def test_unknown_parameter(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, "'pool_size'"):
+            self.configure(pool='true', pool_size='5')
+        with self.assertRaises(ValueError):
+            self.configure(pool='true', pool_max_size='many')
@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TransactionTestCase, override_settings
+
+from apps.venues.models import Venue, VenueCategory
+from envents_project import db_router
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(TransactionTestCase):
+    """Routing between ``default`` and the ``replica`` alias (a test mirror of default)."""
+
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        db_router.reset_replica_health()
+        self.addCleanup(db_router.reset_replica_health)
+
+    def request(self, view, cookies=None):
+        request = RequestFactory().post('/')
+        request.COOKIES.update(cookies or {})
+        return db_router.ReplicaPinningMiddleware(view)(request)
+
+    def test_catalog_reads_use_the_replica(self):
+        VenueCategory.objects.create(name='Rooftops', slug='rooftops')
+        self.assertEqual(Venue.objects.all().db, 'replica')
+        self.assertEqual(VenueCategory.objects.using(Venue.objects.all().db).get().slug, 'rooftops')
+
+    def test_other_reads_and_writes_use_the_primary(self):
+        self.assertEqual(get_user_model().objects.all().db, 'default')
+        self.assertEqual(Venue.objects.select_for_update().db, 'default')
+        with transaction.atomic():
+            self.assertEqual(Venue.objects.all().db, 'default')
+
+    def test_writer_is_pinned_to_the_primary(self):
+        def view(request):
+            self.assertEqual(Venue.objects.all().db, 'replica')
+            VenueCategory.objects.create(name='Halls', slug='halls')
+            self.assertEqual(Venue.objects.all().db, 'default')
+            return HttpResponse()
+
+        response = self.request(view)
+        self.assertIn(db_router.PIN_COOKIE, response.cookies)
+
+        def next_view(request):
+            self.assertEqual(Venue.objects.all().db, 'default')
+            return HttpResponse()
+
+        self.request(next_view, cookies={db_router.PIN_COOKIE: '1'})
+
+    def test_read_only_request_is_not_pinned(self):
+        response = self.request(lambda request: HttpResponse(list(Venue.objects.all())))
+        self.assertNotIn(db_router.PIN_COOKIE, response.cookies)
+
+    @override_settings(REPLICA_MAX_LAG_SECONDS=-1)
+    def test_lagging_replica_falls_back_to_the_primary(self):
+        with self.assertLogs('envents_project.db_router', 'WARNING'):
+            self.assertEqual(Venue.objects.all().db, 'default')
+
+    @override_settings(DATABASE_REPLICAS=['replica', 'missing'])
+    def test_unreachable_replica_is_skipped(self):
+        with self.settings(REPLICA_CHECK_INTERVAL=60), self.assertLogs('envents_project.db_router', 'WARNING'):
+            self.assertFalse(db_router.replica_usable('missing'))
+            self.assertEqual({Venue.objects.all().db for _ in range(20)}, {'replica'})
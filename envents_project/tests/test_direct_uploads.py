@@ -0,0 +1,149 @@
+from decimal import Decimal
+from io import BytesIO
+
+import boto3
+import requests
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from moto import mock_aws
+from PIL import Image
+
+from apps.venues.models import Venue, VenuePhoto
+from business.forms import VenuePhotoForm, VenuePhotoFormSet
+from business.uploads import bulk_create_photos, upload_photo_files
+
+BUCKET = 'envents-test-media'
+
+
+@override_settings(
+    AWS_ACCESS_KEY_ID='testing', AWS_SECRET_ACCESS_KEY='testing', AWS_S3_SESSION_PROFILE=None,
+    AWS_S3_REGION_NAME='us-east-1', AWS_S3_ENDPOINT_URL=None, DIRECT_PHOTO_UPLOADS=True,
+    STORAGES={
+        'default': {
+            'BACKEND': 'envents_project.storage_backends.MediaStorage',
+            'OPTIONS': {'bucket_name': BUCKET},
+        },
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    },
+)
+class DirectUploadTests(TestCase):
+    """Presigned POST, token check and attaching the key to a photo, against moto's S3."""
+
+    def setUp(self):
+        mock = mock_aws()
+        mock.start()
+        self.addCleanup(mock.stop)
+        self.s3 = boto3.client('s3', region_name='us-east-1')
+        self.s3.create_bucket(Bucket=BUCKET)
+
+        User = get_user_model()
+        self.owner = User.objects.create_user('owner', password='x', user_type='venue_owner')
+        self.other = User.objects.create_user('other', password='x', user_type='venue_owner')
+        self.venue = Venue.objects.create(
+            name='Hall', description='A hall.', location='Gulshan', city='Dhaka', address='Road 1',
+            capacity=100, hourly_price=Decimal(100), owner=self.owner, status='approved',
+        )
+
+    def presign(self):
+        self.client.force_login(self.owner)
+        response = self.client.post(
+            reverse('business:presign_photo_upload'), {'kind': 'venue', 'content_type': 'image/jpeg'},
+            HTTP_HOST='localhost',
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def upload(self, post, data):
+        """What the browser does with the presigned POST."""
+        return requests.post(post['url'], data=post['fields'], files={'file': ('photo', data)})
+
+    def photo_form(self, token, user=None):
+        return VenuePhotoForm(data={'upload_token': token, 'caption': ''}, user=user or self.owner)
+
+    def attach(self, token):
+        """What the submission view does with a valid photo form."""
+        form = self.photo_form(token)
+        self.assertTrue(form.is_valid(), form.errors)
+        photo = form.save(commit=False)
+        photo.venue = self.venue
+        self.assertEqual(upload_photo_files([photo]), [])  # already in the bucket
+        with self.captureOnCommitCallbacks():
+            bulk_create_photos(VenuePhoto, [photo])
+
+    def jpeg(self):
+        buffer = BytesIO()
+        Image.new('RGB', (40, 30), 'teal').save(buffer, 'JPEG')
+        return buffer.getvalue()
+
+    def test_upload_is_verified_and_attached(self):
+        post = self.presign()
+        self.assertEqual(post['fields']['Content-Type'], 'image/jpeg')
+        self.assertLess(self.upload(post, self.jpeg()).status_code, 300)
+
+        self.attach(post['token'])
+
+        name = VenuePhoto.objects.get().image.name
+        self.assertRegex(name, r'^venues/photos/[0-9a-f]{32}\.jpg$')
+        self.assertEqual(post['fields']['key'], f'media/{name}')
+        head = self.s3.head_object(Bucket=BUCKET, Key=f'media/{name}')
+        self.assertEqual(head['ContentType'], 'image/jpeg')
+        # Read from the bytes on the way, as for server-side uploads
+        photo = VenuePhoto.objects.get()
+        self.assertEqual((photo.image_width, photo.image_height, photo.image_mime_type), (40, 30, 'image/jpeg'))
+        self.assertEqual(photo.image_size, head['ContentLength'])
+
+    def test_replayed_token_is_refused(self):
+        post = self.presign()
+        self.upload(post, self.jpeg())
+        self.attach(post['token'])
+
+        form = self.photo_form(post['token'])
+        self.assertFalse(form.is_valid())
+        self.assertIn('already been submitted', str(form.errors['image']))
+
+    def test_token_used_twice_in_one_submission_is_refused(self):
+        post = self.presign()
+        self.upload(post, self.jpeg())
+        data = {
+            'form-TOTAL_FORMS': '2', 'form-INITIAL_FORMS': '0',
+            'form-0-upload_token': post['token'], 'form-1-upload_token': post['token'],
+        }
+        formset = VenuePhotoFormSet(data, queryset=VenuePhoto.objects.none(), form_kwargs={'user': self.owner})
+        self.assertFalse(formset.is_valid())
+        self.assertEqual(formset.forms[0].errors, {})
+        self.assertIn('already been submitted', str(formset.forms[1].errors['image']))
+
+    def test_object_must_be_an_image_of_its_type(self):
+        png = BytesIO()
+        Image.new('RGB', (4, 4)).save(png, 'PNG')
+        for body in (b'<script>alert(1)</script>', self.jpeg()[:200], png.getvalue()):
+            with self.subTest(body=body[:10]):
+                post = self.presign()
+                self.s3.put_object(Bucket=BUCKET, Key=post['fields']['key'], Body=body, ContentType='image/jpeg')
+                self.assertIn('JPEG, PNG or WebP', str(self.photo_form(post['token']).errors['image']))
+
+    def test_tampered_token_is_refused(self):
+        post = self.presign()
+        self.upload(post, self.jpeg())
+        payload = signing.loads(post['token'], salt='business.uploads')
+        forged = signing.dumps({**payload, 'name': 'venues/photos/someone-else.jpg'}, salt='other')
+        for token in (forged, post['token'][:-2] + 'xx'):
+            with self.subTest(token=token):
+                form = self.photo_form(token)
+                self.assertFalse(form.is_valid())
+                self.assertIn('expired', str(form.errors['image']))
+
+    def test_token_belongs_to_its_user(self):
+        post = self.presign()
+        self.upload(post, self.jpeg())
+        self.assertIn('Invalid upload', str(self.photo_form(post['token'], user=self.other).errors['image']))
+
+    def test_missing_or_mismatched_object_is_refused(self):
+        post = self.presign()
+        self.assertIn('did not complete', str(self.photo_form(post['token']).errors['image']))
+
+        # The policy pins the Content-Type, so only a direct PUT can mislabel the object
+        self.s3.put_object(Bucket=BUCKET, Key=post['fields']['key'], Body=b'x', ContentType='text/html')
+        self.assertIn('JPEG, PNG or WebP', str(self.photo_form(post['token']).errors['image']))
@@ -0,0 +1,148 @@
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+import boto3
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from moto import mock_aws
+
+from apps.venues.management.commands import gc_media_blobs
+from apps.venues.models import Venue, VenuePhoto
+from envents_project.storage_backends import MediaStorage
+
+SHA = 'ab' + '0' * 62
+ORIGINAL = f'venues/photos/ab/{SHA}.jpg'
+DERIVATIVE = f'venues/photos/ab/derivatives/{SHA}_card.webp'
+
+
+class GarbageCollectionTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings = override_settings(
+            MEDIA_ROOT=self.media_root,
+            STORAGES={
+                'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+                'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+            },
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        owner = get_user_model().objects.create_user('owner', password='x', user_type='venue_owner')
+        self.venue = Venue.objects.create(
+            name='Hall', description='A hall.', location='Gulshan', city='Dhaka', address='Road 1',
+            capacity=100, hourly_price=Decimal(100), owner=owner, status='approved',
+        )
+
+    def blob(self, name, age_hours=72):
+        default_storage.save(name, ContentFile(b'bytes'))
+        modified = time.time() - age_hours * 3600
+        os.utime(os.path.join(self.media_root, name), (modified, modified))
+
+    def attach(self, name, derivatives=None):
+        # bulk_create skips the photo signals, which would hash and re-save the file
+        VenuePhoto.objects.bulk_create([VenuePhoto(venue=self.venue, image=name, derivatives=derivatives or {})])
+
+    def collect(self):
+        call_command('gc_media_blobs', stdout=StringIO())
+
+    def test_only_old_unreferenced_blobs_are_deleted(self):
+        kept_derivative = 'venues/photos/cd/derivatives/kept_card.webp'
+        for name in (ORIGINAL, DERIVATIVE, 'venues/photos/cd/kept.jpg', kept_derivative):
+            self.blob(name)
+        self.blob('venues/photos/cd/fresh.jpg', age_hours=1)
+        self.attach('venues/photos/cd/kept.jpg', {'card': {'width': 600, 'height': 400, 'webp': kept_derivative}})
+
+        self.collect()
+        self.assertFalse(default_storage.exists(ORIGINAL))
+        self.assertFalse(default_storage.exists(DERIVATIVE))
+        for name in ('venues/photos/cd/kept.jpg', kept_derivative, 'venues/photos/cd/fresh.jpg'):
+            self.assertTrue(default_storage.exists(name), name)
+
+    def test_blob_picked_up_after_the_snapshot_is_kept(self):
+        self.blob(ORIGINAL)
+        self.blob(DERIVATIVE)
+        snapshot = gc_media_blobs._referenced_names
+
+        def snapshot_then_dedup():
+            # A duplicate upload lands on the orphan while the bucket is walked
+            names = snapshot()
+            self.attach(ORIGINAL)
+            return names
+
+        with mock.patch.object(gc_media_blobs, '_referenced_names', snapshot_then_dedup):
+            self.collect()
+        self.assertTrue(default_storage.exists(ORIGINAL))
+        self.assertTrue(default_storage.exists(DERIVATIVE))
+
+
+@override_settings(
+    AWS_ACCESS_KEY_ID='testing', AWS_SECRET_ACCESS_KEY='testing', AWS_S3_SESSION_PROFILE=None,
+    AWS_S3_REGION_NAME='us-east-1', AWS_S3_ENDPOINT_URL=None,
+)
+class DeduplicatedSaveTests(TestCase):
+    """A worker saving the same bytes while another process collects, against moto's S3."""
+
+    def setUp(self):
+        aws = mock_aws()
+        aws.start()
+        self.addCleanup(aws.stop)
+        boto3.client('s3', region_name='us-east-1').create_bucket(Bucket='envents-test-media')
+        # Separate instances, so separate metadata caches, as in two processes
+        self.worker = MediaStorage(bucket_name='envents-test-media')
+        self.collector = MediaStorage(bucket_name='envents-test-media')
+        patch = mock.patch.object(gc_media_blobs, 'default_storage', self.collector)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def save_days_ago(self, days):
+        then = datetime.utcnow() - timedelta(days=days)
+        with mock.patch('moto.s3.models.utcnow', return_value=then):
+            self.assertEqual(self.worker.save(ORIGINAL, ContentFile(b'bytes')), ORIGINAL)
+
+    def modified(self):
+        return self.collector.get_modified_time(ORIGINAL)
+
+    def collect(self):
+        call_command('gc_media_blobs', stdout=StringIO())
+
+    def test_save_after_collection_puts_the_blob_again(self):
+        self.save_days_ago(3)
+        self.assertTrue(self.worker.exists(ORIGINAL))  # cached in the worker
+        self.collect()
+        self.assertFalse(self.collector.exists(ORIGINAL))
+
+        self.worker.save(ORIGINAL, ContentFile(b'bytes'))
+        self.assertTrue(self.collector.exists(ORIGINAL))
+
+    def test_deduplicated_save_restarts_the_age(self):
+        self.save_days_ago(3)
+        listed = self.modified()
+        self.worker.save(ORIGINAL, ContentFile(b'bytes'))
+        self.assertGreater(self.modified(), listed + timedelta(days=2))
+        self.assertEqual(self.collector.connection.meta.client.head_object(
+            Bucket='envents-test-media', Key=f'media/{ORIGINAL}',
+        )['ContentType'], 'image/jpeg')
+
+    def test_blob_deduplicated_during_collection_is_kept(self):
+        self.save_days_ago(3)
+        still_referenced = gc_media_blobs._still_referenced
+
+        def dedup_then_check(name):
+            # Listed as old; an upload of the same bytes lands before its row commits
+            self.worker.save(name, ContentFile(b'bytes'))
+            return still_referenced(name)
+
+        with mock.patch.object(gc_media_blobs, '_still_referenced', dedup_then_check):
+            self.collect()
+        self.assertTrue(self.collector.exists(ORIGINAL))
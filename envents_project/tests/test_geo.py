@@ -0,0 +1,156 @@
+import math
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from apps.venues import geo
+from apps.venues.models import Venue
+
+# A corner shared by four geohash cells at every length from 2 up
+CORNER = (22.5, 90.0)
+
+
+def offset(point, north_km=0.0, east_km=0.0):
+    """The point ``north_km`` north or ``east_km`` east of ``point``, along a meridian or parallel."""
+    latitude, longitude = point
+    latitude += math.degrees(north_km / geo.EARTH_RADIUS_KM)
+    longitude += math.degrees(2 * math.asin(
+        math.sin(east_km / geo.EARTH_RADIUS_KM / 2) / math.cos(math.radians(latitude))
+    ))
+    return latitude, longitude
+
+
+class GeoTests(SimpleTestCase):
+    def test_haversine(self):
+        self.assertAlmostEqual(geo.haversine_km(0, 0, 1, 0), 2 * math.pi * geo.EARTH_RADIUS_KM / 360)
+        self.assertAlmostEqual(geo.haversine_km(*CORNER, *offset(CORNER, east_km=3)), 3)
+        self.assertEqual(geo.haversine_km(*CORNER, *CORNER), 0)
+
+    def test_encode_geohash(self):
+        self.assertEqual(geo.encode_geohash(57.64911, 10.40744), 'u4pruydqq')
+        self.assertEqual(geo.encode_geohash(57.64911, 10.40744, precision=5), 'u4pru')
+
+    def test_cells_cover_a_box_across_cell_edges(self):
+        box = geo.bounding_box(*CORNER, 5)
+        cells = geo.covering_cells(box)
+        self.assertLessEqual(len(cells), geo.MAX_CELLS)
+        self.assertGreaterEqual(len(cells), 4)
+        min_lat, max_lat, min_lng, max_lng = box
+        steps = 20
+        for row in range(steps + 1):
+            for col in range(steps + 1):
+                point = (min_lat + (max_lat - min_lat) * row / steps, min_lng + (max_lng - min_lng) * col / steps)
+                geohash = geo.encode_geohash(*point)
+                self.assertTrue(any(geohash.startswith(cell) for cell in cells), point)
+
+    def test_boxes_across_the_antimeridian_skip_the_cells(self):
+        self.assertEqual(geo.covering_cells(geo.bounding_box(0, 179.99, 5)), [])
+
+    def test_parse_point(self):
+        self.assertEqual(geo.parse_point(' 23.78, 90.41'), (23.78, 90.41))
+        for value in (None, '', 'dhaka', '23.78', '23.78,90.41,5', '91,0', '0,-181', 'nan,0', 'inf,0'):
+            with self.subTest(value=value):
+                self.assertIsNone(geo.parse_point(value))
+
+    def test_parse_radius(self):
+        for value, expected in ((None, 10), ('', 10), ('x', 10), ('0', 10), ('-3', 10), ('nan', 10),
+                                ('inf', 10), ('2.5', 2.5), ('500', geo.MAX_RADIUS_KM)):
+            with self.subTest(value=value):
+                self.assertEqual(geo.parse_radius(value), expected)
+
+
+class RadiusSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = get_user_model().objects.create_user('owner', password='x', user_type='venue_owner')
+        # One venue in each of the four cells around the corner, and two
+        # either side of the 5 km boundary
+        for name, point in (
+            ('Centre', CORNER),
+            ('North', offset(CORNER, north_km=3)),
+            ('South', offset(CORNER, north_km=-3)),
+            ('East', offset(CORNER, east_km=3)),
+            ('West', offset(CORNER, east_km=-4)),
+            ('Inside', offset(CORNER, north_km=-4.999)),
+            ('Outside', offset(CORNER, north_km=5.001)),
+        ):
+            cls.venue(name, *point)
+        cls.venue('Unplaced')
+
+    @classmethod
+    def venue(cls, name, latitude=None, longitude=None):
+        return Venue.objects.create(
+            name=name, description='-', location='-', city='Dhaka', address='-', capacity=100,
+            hourly_price=Decimal(100), owner=cls.owner, status='approved', latitude=latitude, longitude=longitude,
+        )
+
+    def test_filter_near(self):
+        found = {venue.name: venue.distance_km for venue in geo.filter_near(Venue.objects.all(), *CORNER, 5)}
+        self.assertEqual(set(found), {'Centre', 'North', 'South', 'East', 'West', 'Inside'})
+        for name, distance in (('Centre', 0), ('North', 3), ('East', 3), ('West', 4), ('Inside', 4.999)):
+            self.assertAlmostEqual(found[name], distance, places=6)
+
+    def test_venue_list_sorts_by_distance(self):
+        response = self.client.get(
+            reverse('venues:venue_list'), {'near': '%s,%s' % CORNER, 'radius': '3.5'}, HTTP_HOST='localhost',
+        )
+        self.assertEqual(response.context['sort'], 'distance')
+        self.assertEqual([venue.name for venue in response.context['page_obj']], ['Centre', 'North', 'South', 'East'])
+
+    def test_venue_list_ignores_an_invalid_point(self):
+        response = self.client.get(reverse('venues:venue_list'), {'near': 'here', 'radius': '5'}, HTTP_HOST='localhost')
+        self.assertIsNone(response.context['near'])
+        self.assertEqual(response.context['page_obj'].paginator.count, 8)
+
+
+class GeocodeVenuesTests(TestCase):
+    def setUp(self):
+        owner = get_user_model().objects.create_user('owner', password='x', user_type='venue_owner')
+        for name, city, location in (
+            ('Lakeside', 'Dhaka', 'North Gulshan'),
+            ('Corner', ' dhaka', 'Gulshan Avenue'),
+            ('Elsewhere', 'Dhaka', 'Motijheel'),
+            ('Unknown', 'Rajshahi', 'Centre'),
+        ):
+            Venue.objects.create(
+                name=name, description='-', location=location, city=city, address='-', capacity=100,
+                hourly_price=Decimal(100), owner=owner, status='approved',
+            )
+
+    def csv(self, content):
+        handle, path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w', encoding='utf-8') as file:
+            file.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_import_by_area_then_city(self):
+        path = self.csv(
+            'city,area,latitude,longitude\n'
+            'Dhaka,,23.8103,90.4125\n'
+            'Dhaka,Gulshan,23.7925,90.4078\n'
+            'Dhaka,North Gulshan,23.8001,90.4150\n'
+        )
+        out = StringIO()
+        call_command('geocode_venues', path, stdout=out)
+        self.assertIn('Geocoded 3 venues (2 by area, 1 by city), 1 unmatched', out.getvalue())
+        self.assertEqual(
+            dict((name, (lat, lng, geohash)) for name, lat, lng, geohash in
+                 Venue.objects.values_list('name', 'latitude', 'longitude', 'geohash')),
+            {
+                'Lakeside': (23.8001, 90.415, geo.encode_geohash(23.8001, 90.415)),
+                'Corner': (23.7925, 90.4078, geo.encode_geohash(23.7925, 90.4078)),
+                'Elsewhere': (23.8103, 90.4125, geo.encode_geohash(23.8103, 90.4125)),
+                'Unknown': (None, None, ''),
+            },
+        )
+
+    def test_rejects_a_bad_row(self):
+        with self.assertRaisesMessage(CommandError, ':3: expected numeric latitude and longitude'):
+            call_command('geocode_venues', self.csv('city,area,latitude,longitude\nDhaka,,23.8,90.4\nDhaka,,north,\n'))
@@ -0,0 +1,77 @@
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from envents_project import health_checks
+
+
+@override_settings(HEALTH_CHECK_TIMEOUT=0.1, HEALTH_CHECK_CACHE_SECONDS=60)
+class HealthCheckTests(SimpleTestCase):
+    def setUp(self):
+        self.calls = {'fast': 0, 'slow': 0}
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)  # don't leave the pool thread stuck
+        patches = (
+            mock.patch.dict(health_checks.CHECKS, {'fast': self.fast, 'slow': self.slow}, clear=True),
+            mock.patch.dict(health_checks._in_flight, clear=True),
+            mock.patch.object(health_checks, '_cached', None),
+        )
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def fast(self):
+        self.calls['fast'] += 1
+        return {'status': 'ok'}
+
+    def slow(self):
+        self.calls['slow'] += 1
+        self.release.wait(5)
+        return {'status': 'ok'}
+
+    def test_a_check_past_its_deadline_is_an_error(self):
+        with self.assertLogs(health_checks.logger, 'ERROR'):
+            results = health_checks.run_checks()
+        self.assertEqual(results['fast']['status'], 'ok')
+        self.assertEqual(results['slow'], {'status': 'error', 'message': 'Timed out after 0.1s', 'latency_ms': 100.0})
+
+    def test_a_stuck_check_is_not_started_again(self):
+        with self.assertLogs(health_checks.logger, 'ERROR'):
+            health_checks.run_checks()
+            health_checks.run_checks()
+        self.assertEqual(self.calls, {'fast': 2, 'slow': 1})
+
+        self.release.set()
+        health_checks._in_flight['slow'].result(timeout=5)
+        results = health_checks.run_checks()
+        self.assertEqual(results['slow']['status'], 'ok')
+        self.assertEqual(self.calls, {'fast': 3, 'slow': 2})
+
+    def get(self):
+        return self.client.get(reverse('full_health_check'), HTTP_HOST='localhost')
+
+    def test_results_are_cached(self):
+        self.release.set()
+        first, second = self.get(), self.get()
+        self.assertEqual(self.calls, {'fast': 1, 'slow': 1})
+        self.assertEqual((first.status_code, first.json()['cached']), (200, False))
+        self.assertEqual((second.status_code, second.json()['cached']), (200, True))
+        self.assertEqual(second.json()['fast'], first.json()['fast'])
+
+        with self.settings(HEALTH_CHECK_CACHE_SECONDS=0):
+            self.assertFalse(self.get().json()['cached'])
+        self.assertEqual(self.calls, {'fast': 2, 'slow': 2})
+
+    def test_a_failed_check_fails_the_probe(self):
+        def refused():
+            raise ConnectionError('refused')
+
+        self.release.set()
+        health_checks.CHECKS['fast'] = refused
+        with self.assertLogs(health_checks.logger, 'ERROR'):
+            response = self.get()
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json()['status'], 'error')
+        self.assertEqual(response.json()['fast']['message'], 'refused')
@@ -0,0 +1,69 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from apps.venues.models import Venue, VenuePhoto
+from envents_project.image_derivatives import VARIANTS
+
+
+def jpeg(width, height):
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), 'teal').save(buffer, 'JPEG')
+    return ContentFile(buffer.getvalue(), name='upload.jpg')
+
+
+class DerivativeTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(
+            MEDIA_ROOT=media_root, MEDIA_URL='/media/', IMAGE_DERIVATIVES_ASYNC=False,
+            IMAGE_DERIVATIVE_FORMATS=('webp', 'jpeg'),
+            STORAGES={
+                'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+                'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+            },
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        owner = get_user_model().objects.create_user('owner', password='x', user_type='venue_owner')
+        self.venue = Venue.objects.create(
+            name='Hall', description='A hall.', location='Gulshan', city='Dhaka', address='Road 1',
+            capacity=100, hourly_price=100, owner=owner, status='approved',
+        )
+
+    def test_saving_a_photo_renders_every_variant(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            photo = VenuePhoto.objects.create(venue=self.venue, image=jpeg(2000, 1500))
+        photo.refresh_from_db()
+
+        self.assertEqual(set(photo.derivatives), set(VARIANTS))
+        self.assertEqual((photo.derivatives['card']['width'], photo.derivatives['card']['height']), (600, 400))
+        self.assertEqual((photo.derivatives['hero']['width'], photo.derivatives['hero']['height']), (1200, 900))
+        for entry in photo.derivatives.values():
+            for fmt in ('webp', 'jpeg'):
+                self.assertTrue(default_storage.exists(entry[fmt]), entry[fmt])
+        with default_storage.open(photo.derivatives['thumb']['webp']) as thumb:
+            self.assertEqual(Image.open(thumb).format, 'WEBP')
+
+        # One srcset per shape: the crops together, the uncropped hero alone
+        srcset = Template("{% load venue_extras %}{{ photo|srcset:'webp' }}").render(Context({'photo': photo}))
+        self.assertEqual(srcset, ', '.join(
+            f"/media/{photo.derivatives[variant]['webp']} {width}w" for variant, width in (('thumb', 240), ('card', 600))
+        ))
+        html = Template("{% load venue_extras %}{% responsive_photo photo 'hero' %}").render(Context({'photo': photo}))
+        self.assertIn(f'srcset="/media/{photo.derivatives["hero"]["webp"]} 1200w"', html)
+        self.assertIn(f'srcset="/media/{photo.derivatives["hero"]["jpeg"]} 1200w"', html)
+
+    def test_photo_without_derivatives_falls_back_to_the_original(self):
+        photo = VenuePhoto.objects.create(venue=self.venue, image=jpeg(300, 200))
+        html = Template('{% load venue_extras %}{% responsive_photo photo %}').render(Context({'photo': photo}))
+        self.assertEqual(html, f'<img src="/media/{photo.image.name}" alt="" class="" loading="lazy">')
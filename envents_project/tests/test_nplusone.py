@@ -0,0 +1,121 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from apps.bookings.models import Booking, BookingService
+from apps.services.models import Service, ServiceCategory
+from apps.venues.models import Venue, VenueCategory, VenuePhoto
+from envents_project import nplusone
+
+
+@override_settings(NPLUSONE_RAISE=True, NPLUSONE_THRESHOLD=5)
+class NPlusOneDetectorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = get_user_model().objects.create_user('owner', password='x')
+        cls.venues = [
+            Venue.objects.create(
+                name=f'Hall {number}', description='-', location='-', city='Dhaka',
+                address='-', capacity=100, owner=owner, status='approved',
+            )
+            for number in range(8)
+        ]
+        VenuePhoto.objects.bulk_create(
+            VenuePhoto(venue=venue, image=f'venues/photos/{venue.pk}.jpg') for venue in cls.venues
+        )
+
+    def request(self, view):
+        return nplusone.NPlusOneMiddleware(view)(RequestFactory().get('/'))
+
+    def test_normalize_sql(self):
+        self.assertEqual(
+            nplusone.normalize_sql("SELECT *  FROM t WHERE id IN (%s, %s, %s) AND name = 'x' LIMIT 21"),
+            'SELECT * FROM t WHERE id IN (...) AND name = ? LIMIT ?',
+        )
+
+    def test_query_in_a_loop_raises(self):
+        def view(request):
+            for venue in Venue.objects.all():
+                list(venue.photos.all())
+            return HttpResponse()
+
+        with self.assertRaisesMessage(nplusone.NPlusOneError, 'test_nplusone.py'):
+            self.request(view)
+
+    def test_repeats_up_to_the_threshold_are_allowed(self):
+        def view(request):
+            for venue in self.venues[:5]:
+                list(venue.photos.all())
+            return HttpResponse()
+
+        self.assertEqual(self.request(view).status_code, 200)
+
+    def test_call_sites_are_counted_separately(self):
+        def view(request):
+            for venue in self.venues[:4]:
+                list(venue.photos.all())
+            for venue in self.venues[4:]:
+                list(venue.photos.all())
+            return HttpResponse()
+
+        self.assertEqual(self.request(view).status_code, 200)
+
+    @override_settings(NPLUSONE_RAISE=False, NPLUSONE_SAMPLE_RATE=1.0)
+    def test_warns_once_per_query_when_not_raising(self):
+        def view(request):
+            for venue in Venue.objects.all():
+                list(venue.photos.all())
+            return HttpResponse()
+
+        with self.assertLogs('envents_project.nplusone', 'WARNING') as logs:
+            self.request(view)
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn('ran 8 times', logs.output[0])
+
+    def test_main_photo_uses_prefetched_photos(self):
+        venues = list(Venue.objects.prefetch_related('photos'))
+        with self.assertNumQueries(0):
+            photos = [venue.main_photo for venue in venues]
+        self.assertEqual([photo.venue_id for photo in photos], [venue.pk for venue in venues])
+
+
+class AdminChangelistTests(TestCase):
+    """The admin lists that used to query once per row (the test runner raises on N+1)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = get_user_model().objects.create_superuser('admin', password='x')
+        categories = VenueCategory.objects.bulk_create(
+            VenueCategory(name=f'Category {number}', slug=f'category-{number}') for number in range(2)
+        )
+        service = Service.objects.create(
+            name='Catering', description='-', provider=cls.admin,
+            category=ServiceCategory.objects.create(name='Food', slug='food'),
+        )
+        for number in range(8):
+            venue = Venue.objects.create(
+                name=f'Hall {number}', description='-', location='-', city='Dhaka',
+                address='-', capacity=100, owner=cls.admin,
+            )
+            venue.category.set(categories)
+            booking = Booking.objects.create(
+                user=cls.admin, venue=venue, event_date=datetime.date(2030, 1, 1),
+                start_time=datetime.time(18), end_time=datetime.time(22),
+                guest_count=50, event_type='Wedding', total_cost=0,
+            )
+            BookingService.objects.create(booking=booking, service=service, price=100)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_changelists(self):
+        for name in ('venues_venue', 'bookings_booking', 'bookings_bookingservice'):
+            with self.subTest(name):
+                self.assertEqual(self.client.get(reverse(f'admin:{name}_changelist')).status_code, 200)
+
+    def test_booking_change_page(self):
+        booking = Booking.objects.first()
+        self.assertEqual(self.client.get(reverse('admin:bookings_booking_change', args=[booking.pk])).status_code, 200)
@@ -0,0 +1,93 @@
+import datetime
+from io import StringIO
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.analytics.models import HourlyPageView
+from apps.bookings import popularity
+from apps.bookings.models import Booking, BookingService
+from apps.services.models import Service, ServiceCategory
+from apps.venues.models import FavoriteVenue, Venue, VenueReview
+
+
+def days_ago(days):
+    """Local noon ``days`` days back, well clear of the day boundary TruncDate buckets on."""
+    day = timezone.localdate() - datetime.timedelta(days=days)
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time(12)))
+
+
+class PopularityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.owner = User.objects.create_user('owner', password='x', user_type='venue_owner')
+        cls.guest = User.objects.create_user('guest', password='x')
+        cls.quiet, cls.busy, cls.steady = (
+            Venue.objects.create(
+                name=name, description='-', location='-', city='Dhaka', address='-',
+                capacity=100, owner=cls.owner, status='approved',
+            )
+            for name in ('Quiet Hall', 'Busy Hall', 'Steady Hall')
+        )
+        cls.service = Service.objects.create(
+            name='Catering', description='-', provider=cls.owner, status='approved',
+            category=ServiceCategory.objects.create(name='Food', slug='food'),
+        )
+
+        # busy: a booking today (5), a favorite a half-life ago (3 x 0.5), a
+        # 4-star review two half-lives ago (4 x 0.25), 200 views today (0.05 x 200)
+        cls.book(cls.busy, days_ago(0), services=[cls.service])
+        cls.stamp(FavoriteVenue.objects.create(user=cls.guest, venue=cls.busy), days_ago(30))
+        cls.stamp(VenueReview.objects.create(venue=cls.busy, user=cls.guest, rating=4, comment='-'), days_ago(60))
+        HourlyPageView.objects.create(kind='venue', object_id=cls.busy.pk, hour=days_ago(0), views=200)
+        # steady: a booking a half-life ago (5 x 0.5) and a cancelled one; a
+        # favorite today (3)
+        cls.book(cls.steady, days_ago(30))
+        cls.book(cls.steady, days_ago(0), status='cancelled')
+        cls.stamp(FavoriteVenue.objects.create(user=cls.guest, venue=cls.steady), days_ago(0))
+
+    @classmethod
+    def book(cls, venue, created_at, status='confirmed', services=()):
+        booking = Booking.objects.create(
+            user=cls.guest, venue=venue, event_date=datetime.date(2030, 1, 1),
+            start_time=datetime.time(18), end_time=datetime.time(22),
+            guest_count=50, event_type='Wedding', status=status, total_cost=0,
+        )
+        for service in services:
+            BookingService.objects.create(booking=booking, service=service, price=100)
+        cls.stamp(booking, created_at)
+
+    @staticmethod
+    def stamp(obj, created_at):
+        # created_at is auto_now_add
+        type(obj).objects.filter(pk=obj.pk).update(created_at=created_at)
+
+    def test_decayed_weighted_scores(self):
+        ids = np.array(sorted([self.quiet.pk, self.busy.pk, self.steady.pk]), dtype=np.int64)
+        scores = dict(zip(ids.tolist(), popularity.compute_scores(ids, popularity.venue_signals()).tolist()))
+        self.assertEqual(scores, {self.quiet.pk: 0, self.busy.pk: 17.5, self.steady.pk: 5.5})
+
+        # A month on, everything has lost another half-life
+        later = timezone.localdate() + datetime.timedelta(days=30)
+        scores = popularity.compute_scores(ids, popularity.venue_signals(), today=later)
+        self.assertEqual(scores.tolist(), [0, 8.75, 2.75])
+
+    def test_command_writes_changed_scores_and_sorts_by_them(self):
+        call_command('update_popularity', stdout=StringIO())
+        self.assertEqual(
+            dict(Venue.objects.values_list('name', 'popularity_score')),
+            {'Quiet Hall': 0, 'Busy Hall': 17.5, 'Steady Hall': 5.5},
+        )
+        self.assertEqual(Service.objects.get().popularity_score, 5)
+        # Nothing changed since
+        self.assertEqual(popularity.update_popularity_scores(), {'venues': 0, 'services': 0})
+
+        response = self.client.get(reverse('venues:venue_list'), {'sort': 'popular'}, HTTP_HOST='localhost')
+        self.assertEqual(
+            [venue.name for venue in response.context['page_obj']], ['Busy Hall', 'Steady Hall', 'Quiet Hall'],
+        )
@@ -0,0 +1,79 @@
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from apps.venues.models import Venue
+from envents_project import profiling
+
+
+def busy_view(request):
+    """Spends ~50ms in Python and runs a couple of queries."""
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+    list(Venue.objects.all())
+    Venue.objects.filter(city='Dhaka').exists()
+    return HttpResponse('page')
+
+
+@override_settings(REQUEST_PROFILER_INTERVAL_MS=1)
+class ProfilerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.staff = User.objects.create_user('staff', password='x', is_staff=True)
+        cls.customer = User.objects.create_user('customer', password='x')
+
+    def request(self, user, path='/?_profile=1', **headers):
+        request = RequestFactory().get(path, headers=headers)
+        request.user = user
+        return profiling.ProfilerMiddleware(busy_view)(request)
+
+    def test_staff_get_a_speedscope_profile(self):
+        response = self.request(self.staff)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertIn('speedscope.json', response['Content-Disposition'])
+        profile = json.loads(response.content)
+        self.assertEqual(profile['$schema'], profiling.SPEEDSCOPE_SCHEMA)
+
+        cpu = profile['profiles'][0]
+        self.assertEqual((cpu['type'], cpu['name']), ('sampled', 'CPU: request thread'))
+        self.assertGreater(len(cpu['samples']), 5)
+        names = {profile['shared']['frames'][index]['name'] for stack in cpu['samples'] for index in stack}
+        self.assertIn('busy_view', names)
+
+        self.assertEqual(len(profile['sql']), 2)
+        self.assertIn('"venues_venue"', profile['sql'][0]['sql'])
+        self.assertIn('test_profiling.py', profile['sql'][0]['call_site'])
+        sql = [entry for entry in profile['profiles'] if entry['type'] == 'evented']
+        self.assertEqual(len(sql[0]['events']), 4)
+
+    def test_header_triggers_too(self):
+        response = self.request(self.staff, path='/', x_profile='1')
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+    def test_only_staff_can_profile(self):
+        for user in (AnonymousUser(), self.customer):
+            with self.subTest(user=user):
+                self.assertEqual(self.request(user).content, b'page')
+        self.staff.is_active = False
+        self.assertEqual(self.request(self.staff).content, b'page')
+
+    def test_one_profile_at_a_time(self):
+        with profiling._busy:
+            self.assertEqual(self.request(self.staff).content, b'page')
+
+    def test_through_the_stack(self):
+        url = reverse('venues:venue_list') + '?_profile=1'
+        self.assertTrue(self.client.get(url)['Content-Type'].startswith('text/html'))
+
+        self.client.force_login(self.staff)
+        response = self.client.get(url)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertIn('venues-venue_list.speedscope.json', response['Content-Disposition'])
+        self.assertTrue(json.loads(response.content)['sql'])
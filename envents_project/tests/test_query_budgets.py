@@ -0,0 +1,226 @@
+"""
+Query budgets: every page, requested against a seeded dataset, must stay
+within the query count, query time and response size recorded in
+query_budgets.json. A change that adds queries to a page fails here; if the
+new queries are intended, or a page got cheaper, regenerate the budgets:
+
+    QUERY_BUDGETS_UPDATE=1 python manage.py test envents_project.tests.test_query_budgets
+
+Query counts are exact numbers (compared with <=); size budgets carry
+headroom for random ordering. SQL time depends on the machine and on what
+else it is doing, so it is only checked with QUERY_BUDGETS_TIMING=1, on a
+quiet machine. Counts come from the request metrics
+(envents_project.instrumentation), so they include session/auth queries and
+the queries async views run.
+"""
+import datetime
+import json
+import logging
+import math
+import os
+from decimal import Decimal
+from pathlib import Path
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.bookings.models import Booking, BookingService
+from apps.services.models import FavoriteService, Service, ServiceCategory, ServicePackage, ServicePhoto, ServiceReview
+from apps.venues.models import (
+    Amenity, DisabledDate, FavoriteVenue, Venue, VenueCategory, VenueCateringPackage, VenuePhoto, VenueReview,
+)
+
+BUDGET_FILE = Path(__file__).with_name('query_budgets.json')
+UPDATE = os.environ.get('QUERY_BUDGETS_UPDATE') == '1'
+TIMING = os.environ.get('QUERY_BUDGETS_TIMING') == '1'
+
+VENUES = 24
+SERVICES = 12
+REVIEWERS = 5
+BOOKINGS = 6
+
+
+def seed():
+    """A small catalog with every relation the pages show, plus one customer's activity."""
+    User = get_user_model()
+    users = {
+        'owner': User.objects.create_user('owner', password='x', user_type='venue_owner'),
+        'provider': User.objects.create_user('provider', password='x', user_type='service_provider'),
+        'customer': User.objects.create_user('customer', password='x'),
+        'staff': User.objects.create_superuser('staff', password='x'),
+    }
+    reviewers = [User.objects.create_user(f'reviewer{number}', password='x') for number in range(REVIEWERS)]
+
+    # Migrations may have created some of the categories already
+    categories = [
+        VenueCategory.objects.get_or_create(slug=name.lower(), defaults={'name': name})[0]
+        for name in ('Halls', 'Rooftops', 'Gardens')
+    ]
+    amenities = Amenity.objects.bulk_create(Amenity(name=name) for name in ('Parking', 'Wi-Fi', 'Stage', 'AC'))
+    venues = []
+    for number in range(VENUES):
+        venue = Venue.objects.create(
+            name=f'Venue {number}', description='A venue.', location='Gulshan', city=('Dhaka', 'Chittagong')[number % 2],
+            address='Road 1', capacity=50 + number * 10, hourly_price=Decimal(100 + number), owner=users['owner'],
+            status='approved', is_featured=number < 3, latitude=23.78 + number / 100, longitude=90.41,
+        )
+        venue.category.set(categories[number % 3:number % 3 + 2])
+        venue.amenities.set(amenities[:3])
+        venues.append(venue)
+    VenuePhoto.objects.bulk_create(
+        VenuePhoto(venue=venue, image=f'venues/photos/{venue.pk}-{index}.jpg', is_primary=index == 0)
+        for venue in venues for index in range(2)
+    )
+    VenueCateringPackage.objects.bulk_create(
+        VenueCateringPackage(venue=venue, name='Standard', price=Decimal('12.50')) for venue in venues
+    )
+    VenueReview.objects.bulk_create(
+        VenueReview(venue=venue, user=user, rating=1 + (venue.pk + user.pk) % 5, comment='Nice.')
+        for venue in venues for user in reviewers
+    )
+    DisabledDate.objects.bulk_create(
+        DisabledDate(venue=venue, date=datetime.date(2030, 1, 1)) for venue in venues[:4]
+    )
+
+    service_categories = [
+        ServiceCategory.objects.get_or_create(slug=name.lower(), defaults={'name': name})[0]
+        for name in ('Catering', 'Decor', 'Photography')
+    ]
+    services = [
+        Service.objects.create(
+            name=f'Service {number}', description='A service.', category=service_categories[number % 3],
+            hourly_price=Decimal(50 + number), provider=users['provider'], status='approved', is_featured=number < 2,
+        )
+        for number in range(SERVICES)
+    ]
+    ServicePhoto.objects.bulk_create(
+        ServicePhoto(service=service, image=f'services/photos/{service.pk}-{index}.jpg', is_primary=index == 0)
+        for service in services for index in range(2)
+    )
+    ServicePackage.objects.bulk_create(
+        ServicePackage(service=service, name=name, price=Decimal(price), order=order)
+        for service in services for order, (name, price) in enumerate((('Basic', 200), ('Premium', 500)))
+    )
+    ServiceReview.objects.bulk_create(
+        ServiceReview(service=service, user=user, rating=1 + (service.pk + user.pk) % 5, comment='Good.')
+        for service in services for user in reviewers
+    )
+
+    customer = users['customer']
+    FavoriteVenue.objects.bulk_create(FavoriteVenue(user=customer, venue=venue) for venue in venues[:3])
+    FavoriteService.objects.bulk_create(FavoriteService(user=customer, service=service) for service in services[:3])
+    bookings = []
+    for number in range(BOOKINGS):
+        booking = Booking.objects.create(
+            user=customer, venue=venues[number], event_date=datetime.date(2030, 2, 1 + number),
+            start_time=datetime.time(18), end_time=datetime.time(22), guest_count=80,
+            event_type='Wedding', venue_cost=Decimal(400), total_cost=0,
+        )
+        BookingService.objects.bulk_create(
+            BookingService(booking=booking, service=service, package=service.packages.first(), price=Decimal(200))
+            for service in services[:2]
+        )
+        bookings.append(booking)
+    return users, venues, services, bookings
+
+
+def pages(venues, services, bookings):
+    """(budget name, url, user) for every page; None requests it anonymously."""
+    venue, service, booking = venues[0], services[0], bookings[0]
+    # venue_search/service_search are left out: their URLs resolve to the
+    # detail views (slug 'search') and their templates don't exist
+    public = [
+        ('home', reverse('home')),
+        ('about', reverse('about')),
+        ('venues:venue_list', reverse('venues:venue_list')),
+        ('venues:venue_detail', reverse('venues:venue_detail', args=[venue.slug])),
+        ('venues:venue_list_by_category', reverse('venues:venue_list_by_category', args=['halls'])),
+        ('services:service_list', reverse('services:service_list')),
+        ('services:service_detail', reverse('services:service_detail', args=[service.slug])),
+        ('services:service_list_by_category', reverse('services:service_list_by_category', args=['catering'])),
+        ('accounts:login', reverse('accounts:login')),
+        ('accounts:register', reverse('accounts:register')),
+    ]
+    customer = [
+        ('bookings:booking_list', reverse('bookings:booking_list')),
+        ('bookings:booking_detail', reverse('bookings:booking_detail', args=[booking.pk])),
+        ('bookings:create_booking', reverse('bookings:create_booking', args=[venue.slug])),
+        ('bookings:create_service_booking', reverse('bookings:create_service_booking')),
+        ('bookings:add_services', reverse('bookings:add_services', args=[booking.pk])),
+        ('bookings:confirm_booking', reverse('bookings:confirm_booking', args=[booking.pk])),
+        ('accounts:profile', reverse('accounts:profile')),
+        ('accounts:edit_profile', reverse('accounts:edit_profile')),
+        ('accounts:favorites', reverse('accounts:favorites')),
+        ('accounts:user_bookings', reverse('accounts:user_bookings')),
+        ('business:dashboard', reverse('business:dashboard')),
+        ('business:submit_venue', reverse('business:submit_venue')),
+        ('business:submit_service', reverse('business:submit_service')),
+    ]
+    staff = [('admin:index', reverse('admin:index'))] + [
+        (name, reverse(name))
+        for name in sorted(f'admin:{model._meta.app_label}_{model._meta.model_name}_changelist'
+                           for model in admin.site._registry)
+    ]
+    return (
+        [(name, url, None) for name, url in public]
+        + [(name, url, 'customer') for name, url in customer]
+        + [(name, url, 'staff') for name, url in staff]
+    )
+
+
+# Async views run their queries one after another on the test's connection,
+# which is the only one that sees the test transaction's rows
+@override_settings(ASYNC_CONCURRENT_QUERIES=False, REQUEST_METRICS_ENABLED=True)
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Not in setUpTestData, which gives each test its own copy
+        cls.budgets = json.loads(BUDGET_FILE.read_text()) if BUDGET_FILE.exists() else {}
+        cls.measured = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users, venues, services, bookings = seed()
+        cls.pages = pages(venues, services, bookings)
+
+    @classmethod
+    def tearDownClass(cls):
+        if UPDATE and cls.measured:
+            BUDGET_FILE.write_text(json.dumps({
+                name: {
+                    'queries': result['db_queries'],
+                    'query_ms': max(50, math.ceil(result['db_ms'] * 4 / 10) * 10),
+                    'response_kb': math.ceil(result['bytes'] * 1.25 / 1024),
+                }
+                for name, result in sorted(cls.measured.items())
+            }, indent=2) + '\n')
+        super().tearDownClass()
+
+    def measure(self, url, user):
+        self.client.logout()
+        if user is not None:
+            self.client.force_login(self.users[user])
+        with self.assertLogs('envents_project.requests', logging.INFO) as logs:
+            response = self.client.get(url)
+        self.assertLess(response.status_code, 400, url)  # user_bookings redirects
+        return {**json.loads(logs.records[-1].getMessage()), 'bytes': len(response.content)}
+
+    def test_pages_stay_within_budget(self):
+        for name, url, user in self.pages:
+            with self.subTest(name):
+                result = self.measured[name] = self.measure(url, user)
+                if UPDATE:
+                    continue
+                budget = self.budgets.get(name)
+                self.assertIsNotNone(budget, f"{name} has no budget; run with QUERY_BUDGETS_UPDATE=1")
+                self.assertLessEqual(result['db_queries'], budget['queries'], f"{url} runs more queries than budgeted")
+                if TIMING:
+                    self.assertLessEqual(result['db_ms'], budget['query_ms'], f"{url} spends longer in SQL than budgeted")
+                self.assertLessEqual(result['bytes'], budget['response_kb'] * 1024, f"{url} response outgrew its budget")
+
+    def test_every_budget_is_used(self):
+        names = {name for name, url, user in self.pages}
+        self.assertEqual(sorted(set(self.budgets) - names), [], "Budgets for pages that are no longer requested")
@@ -0,0 +1,46 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.bookings.models import Booking, BookingService
+from apps.venues.models import Venue, VenueReview
+
+VOLUMES = dict(
+    users=60, venues=20, services=8, venue_photos=40, service_photos=10, venue_reviews=100,
+    service_reviews=30, favorite_venues=40, favorite_services=10, bookings=200,
+)
+
+
+class SeedSyntheticTests(TestCase):
+    def seed(self, seed=7):
+        call_command('seed_synthetic', seed=seed, batch_size=64, force=True, stdout=StringIO(), **VOLUMES)
+
+    def snapshot(self):
+        # Ids (and the names and slugs built from them) continue from existing rows
+        return (
+            list(Venue.objects.order_by('pk').values_list('city', 'capacity', 'hourly_price', 'created_at')),
+            list(Booking.objects.order_by('pk').values_list('venue__capacity', 'event_date', 'total_cost', 'status')),
+        )
+
+    def test_volumes_and_consistency(self):
+        self.seed()
+        self.assertEqual(Venue.objects.count(), VOLUMES['venues'])
+        self.assertEqual(VenueReview.objects.count(), VOLUMES['venue_reviews'])
+        self.assertEqual(Booking.objects.count(), VOLUMES['bookings'])
+        for booking in Booking.objects.filter(booking_type='venue')[:20]:
+            self.assertEqual(booking.total_cost, booking.venue_cost + booking.services_cost)
+        self.assertFalse(BookingService.objects.exclude(booking__in=Booking.objects.all()).exists())
+        # Sequences continue after the synthetic ids
+        self.assertGreater(Booking.objects.create(**{
+            field: getattr(Booking.objects.first(), field)
+            for field in ('user_id', 'venue_id', 'event_date', 'start_time', 'end_time', 'guest_count', 'event_type')
+        }).pk, Booking.objects.order_by('-pk')[1].pk)
+
+    def test_same_seed_same_rows(self):
+        self.seed()
+        first = self.snapshot()
+        Booking.objects.all().delete()
+        Venue.objects.all().delete()
+        self.seed()
+        self.assertEqual(self.snapshot(), first)
@@ -0,0 +1,145 @@
+import math
+from decimal import Decimal
+from io import StringIO
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase
+
+from apps.services import recommendations as service_recommendations
+from apps.services.models import FavoriteService, RelatedService, Service, ServiceCategory
+from apps.venues import recommendations as venue_recommendations
+from apps.venues.models import FavoriteVenue, RelatedVenue, Venue, VenueCategory
+from envents_project.similarity import co_occurrence, sparse_top_k, top_k
+
+
+def triples(matrix):
+    return sorted(zip(*(part.tolist() for part in matrix)))
+
+
+class SimilarityTests(SimpleTestCase):
+    def test_co_occurrence_counts_shared_groups(self):
+        # user 1 has items 0, 1, 2; user 2 has 1 and 2, with 2 listed twice
+        groups = [1, 1, 1, 2, 2, 2]
+        items = [2, 0, 1, 1, 2, 2]
+        self.assertEqual(triples(co_occurrence(groups, items, 3)), [
+            (0, 1, 1), (0, 2, 1), (1, 0, 1), (1, 2, 2), (2, 0, 1), (2, 1, 2),
+        ])
+        # Capped groups keep their lowest item ids: user 1 is left with 0 and 1
+        self.assertEqual(triples(co_occurrence(groups, items, 3, max_group_size=2)), [
+            (0, 1, 1), (1, 0, 1), (1, 2, 1), (2, 1, 1),
+        ])
+        self.assertEqual(triples(co_occurrence([], [], 3)), [])
+
+    def test_top_k_is_best_first_with_ties_in_column_order(self):
+        scores = np.array([
+            [0.5, 0.9, 0.5, 0.5],
+            [0.1, 0.2, 0.3, 0.4],
+            [0.7, -np.inf, 0.7, 0.7],
+        ])
+        self.assertEqual(top_k(scores, 2).tolist(), [[1, 0], [3, 2], [0, 2]])
+        self.assertEqual(top_k(scores, 10).tolist(), [[1, 0, 2, 3], [3, 2, 1, 0], [0, 2, 3, 1]])
+        self.assertEqual(top_k(scores, 0).shape, (3, 0))
+        # The tie at the cut-off goes to the lowest column, however wide the row
+        row = np.zeros((1, 40))
+        row[0, 30] = 1
+        self.assertEqual(top_k(row, 3).tolist(), [[30, 0, 1]])
+
+    def test_sparse_top_k_ranks_each_row(self):
+        left = [1, 0, 1, 0, 1, 1]
+        right = [0, 1, 2, 2, 3, 4]
+        scores = [0.2, 0.5, 0.9, 0.7, 0.2, 0.1]
+        kept_left, kept_right, kept_scores, rank = sparse_top_k(left, right, scores, 2)
+        self.assertEqual(kept_left.tolist(), [0, 0, 1, 1])
+        self.assertEqual(kept_right.tolist(), [2, 1, 2, 0])  # 0 and 3 tie: input order
+        self.assertEqual(kept_scores.tolist(), [0.7, 0.5, 0.9, 0.2])
+        self.assertEqual(rank.tolist(), [0, 1, 0, 1])
+
+
+class BuildRelatedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        owner = User.objects.create_user('owner', password='x', user_type='venue_owner')
+        fan = User.objects.create_user('fan', password='x')
+        halls, gardens = (
+            VenueCategory.objects.create(name=name, slug=name.lower()) for name in ('Halls', 'Gardens')
+        )
+
+        def venue(name, city, category, capacity=100, price=1000, status='approved'):
+            venue = Venue.objects.create(
+                name=name, description='-', location='-', city=city, address='-', capacity=capacity,
+                hourly_price=Decimal(price), owner=owner, status=status,
+            )
+            venue.category.set([category])
+            return venue
+
+        cls.grand = venue('Grand Hall', 'Dhaka', halls)
+        cls.royal = venue('Royal Hall', 'dhaka ', halls)
+        cls.garden = venue('Lake Garden', 'Sylhet', gardens, capacity=1000)
+        cls.pending = venue('New Hall', 'Dhaka', halls, status='pending')
+        for liked in (cls.grand, cls.royal):
+            FavoriteVenue.objects.create(user=fan, venue=liked)
+
+        food, music = (ServiceCategory.objects.create(name=name, slug=name.lower()) for name in ('Food', 'Music'))
+        cls.catering, cls.buffet, cls.band = (
+            Service.objects.create(
+                name=name, description='-', provider=owner, category=category, status='approved',
+                hourly_price=Decimal(price),
+            )
+            for name, category, price in (('Catering', food, 500), ('Buffet', food, 500), ('Band', music, 500))
+        )
+        FavoriteService.objects.create(user=fan, service=cls.catering)
+        FavoriteService.objects.create(user=fan, service=cls.band)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_command_writes_ranked_similar_venues(self):
+        # Served from the category fallback and cached until a build bumps the version
+        self.assertEqual(venue_recommendations.get_related_venue_ids(self.grand.pk), [])
+        self.assertEqual(
+            {venue.pk for venue in venue_recommendations.get_related_venues(self.grand)}, {self.royal.pk},
+        )
+
+        call_command('build_related_venues', stdout=StringIO())
+
+        # Never the venue itself nor an unapproved one; the garden ties with
+        # both halls and ranks them in id order
+        rows = RelatedVenue.objects.filter(kind='similar').order_by('venue_id', 'rank')
+        self.assertEqual(
+            [(row.venue_id, row.related_id, row.rank) for row in rows],
+            [
+                (self.grand.pk, self.royal.pk, 0), (self.grand.pk, self.garden.pk, 1),
+                (self.royal.pk, self.grand.pk, 0), (self.royal.pk, self.garden.pk, 1),
+                (self.garden.pk, self.grand.pk, 0), (self.garden.pk, self.royal.pk, 1),
+            ],
+        )
+        scores = {(row.venue_id, row.related_id): row.score for row in rows}
+        # category 0.45 + city 0.2 + capacity 0.1 + price 0.1 + co-favorite 0.15
+        self.assertAlmostEqual(scores[self.grand.pk, self.royal.pk], 1.0, places=5)
+        # capacity only: exp(-|log 1001 - log 101|), plus the same price
+        self.assertAlmostEqual(
+            scores[self.grand.pk, self.garden.pk], 0.1 * math.exp(-math.log(1001 / 101)) + 0.1, places=5,
+        )
+
+        self.assertEqual(cache.get(venue_recommendations.RELATED_VERSION_KEY), 1)
+        self.assertEqual(
+            venue_recommendations.get_related_venue_ids(self.grand.pk), [self.royal.pk, self.garden.pk],
+        )
+        call_command('build_related_venues', stdout=StringIO())
+        self.assertEqual(cache.get(venue_recommendations.RELATED_VERSION_KEY), 2)
+
+    def test_related_services(self):
+        call_command('build_related_services', stdout=StringIO())
+        self.assertEqual(
+            service_recommendations.get_related_service_ids(self.catering.pk), [self.buffet.pk, self.band.pk],
+        )
+        scores = dict(RelatedService.objects.filter(service=self.catering).values_list('related_id', 'score'))
+        # category 0.6 + price 0.2, against price 0.2 + co-favorite 0.2
+        self.assertAlmostEqual(scores[self.buffet.pk], 0.8, places=5)
+        self.assertAlmostEqual(scores[self.band.pk], 0.4, places=5)
+        self.assertFalse(RelatedService.objects.filter(service=F('related')).exists())
@@ -0,0 +1,140 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.contrib.sessions.models import Session
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from apps.monitoring import slow_queries
+from apps.monitoring.models import QueryPlan, SlowQuery
+from apps.venues.models import Venue
+
+
+# Every query counts as slow, and every SELECT is explained
+@override_settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_EXPLAIN_RATE=1.0)
+class SlowQueryCaptureTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = get_user_model().objects.create_superuser('staff', password='x')
+        for number in range(3):
+            Venue.objects.create(
+                name=f'Hall {number}', description='-', location='-', city='Dhaka',
+                address='-', capacity=100, owner=cls.staff, status='approved',
+            )
+
+    def setUp(self):
+        # Flushed by the test, on its connection, instead of the background thread
+        self.log = slow_queries.SlowQueryLog(flush_interval=3600)
+        patches = (
+            mock.patch.object(slow_queries, 'slow_query_log', self.log),
+            mock.patch.object(self.log, '_ensure_worker'),
+        )
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def request(self, view):
+        return slow_queries.SlowQueryMiddleware(view)(RequestFactory().get('/'))
+
+    def test_records_view_call_site_and_plan(self):
+        self.client.get(reverse('venues:venue_list'))
+        self.assertGreater(self.log.flush(), 0)
+
+        query = SlowQuery.objects.filter(sql__contains='"venues_venue"', view='venues:venue_list').first()
+        self.assertIsNotNone(query)
+        self.assertIn('apps/venues/views.py', query.call_site)
+        plan = query.plans.get()
+        self.assertTrue(plan.analyzed)
+        self.assertIn('actual time', plan.plan)
+        self.assertIn('Buffers', plan.plan)
+
+    def test_totals_group_by_normalized_sql(self):
+        def view(request):
+            for venue in Venue.objects.all():
+                Venue.objects.filter(pk=venue.pk).exists()
+            return HttpResponse()
+
+        self.request(view)
+        self.request(view)
+        self.log.flush()
+        self.request(view)
+        self.log.flush()
+
+        query = SlowQuery.objects.get(sql__contains='LIMIT ?', view='<unresolved>')
+        self.assertEqual(query.calls, 9)
+        self.assertEqual(query.plans.count(), 2)  # one per flush
+
+    @override_settings(SLOW_QUERY_PLANS_KEPT=2)
+    def test_keeps_the_newest_plans(self):
+        def view(request):
+            list(Venue.objects.all())
+            return HttpResponse()
+
+        for _ in range(4):
+            self.request(view)
+            self.log.flush()
+        self.assertEqual(QueryPlan.objects.filter(query__sql__contains='"venues_venue"').count(), 2)
+
+    def test_writes_are_not_explained(self):
+        def view(request):
+            Venue.objects.filter(city='Dhaka').update(capacity=120)
+            return HttpResponse()
+
+        self.request(view)
+        self.log.flush()
+        query = SlowQuery.objects.get(sql__startswith='UPDATE')
+        self.assertFalse(query.plans.exists())
+        self.assertEqual(Venue.objects.filter(capacity=120).count(), 3)
+
+    @override_settings(SLOW_QUERY_EXPLAIN_TIMEOUT=0.05)
+    def test_analyze_past_the_timeout_stores_estimates(self):
+        plan, analyzed = slow_queries.explain_query('SELECT pg_sleep(%s)', [1], 'default')
+        self.assertFalse(analyzed)
+        self.assertNotIn('actual time', plan)
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=None)
+    def test_disabled(self):
+        self.client.get(reverse('venues:venue_list'))
+        self.assertEqual(self.log.flush(), 0)
+
+    def test_session_and_account_queries_are_not_explained(self):
+        session_key = 'a' * 32
+        user_model = get_user_model()
+
+        def view(request):
+            Session.objects.filter(session_key=session_key).exists()
+            list(user_model.objects.filter(email='staff@example.com'))
+            user_model.objects.get(pk=self.staff.pk).groups.exists()
+            list(Venue.objects.filter(owner__username='staff'))
+            return HttpResponse()
+
+        self.request(view)
+        self.assertEqual([capture.params for capture in self.log._captured if capture.explain], [])
+        self.log.flush()
+        self.assertTrue(SlowQuery.objects.filter(sql__contains='"django_session"').exists())
+        self.assertFalse(QueryPlan.objects.exists())
+        self.assertFalse(SlowQuery.objects.filter(sql__contains=session_key).exists())
+
+    def test_admin_is_superuser_only(self):
+        def view(request):
+            list(Venue.objects.all())
+            return HttpResponse()
+
+        self.request(view)
+        self.log.flush()
+        query = SlowQuery.objects.first()
+        changelist = reverse('admin:monitoring_slowquery_changelist')
+        self.assertEqual(self.client.get(changelist).status_code, 302)
+
+        staff = get_user_model().objects.create_user('viewer', password='x', is_staff=True)
+        staff.user_permissions.set(Permission.objects.filter(codename__in=['view_slowquery', 'view_queryplan']))
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get(changelist).status_code, 403)
+        self.assertNotContains(self.client.get(reverse('admin:index')), 'Slow queries')
+
+        self.client.force_login(self.staff)
+        self.assertContains(self.client.get(changelist), 'venues_venue')
+        response = self.client.get(reverse('admin:monitoring_slowquery_change', args=[query.pk]))
+        self.assertContains(response, 'actual time')
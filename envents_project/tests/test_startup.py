@@ -0,0 +1,39 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from benchmarks.startup import HEAVY_MODULES
+
+BENCHMARK = Path(__file__).resolve().parents[2] / 'benchmarks' / 'startup.py'
+
+
+class StartupTests(SimpleTestCase):
+    """
+    Worker boot must stay lean: see benchmarks/startup.py. What a boot
+    imports is checked rather than how long it takes, which depends on the
+    machine.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        result = subprocess.run(
+            [sys.executable, str(BENCHMARK), '--json', '--runs', '1'],
+            capture_output=True, text=True, check=True,
+        )
+        cls.report = json.loads(result.stdout)
+
+    def test_first_request_succeeds(self):
+        self.assertEqual(self.report['status_code'], 200)
+
+    def test_heavy_modules_load_lazily(self):
+        self.assertEqual(
+            self.report['heavy_modules'], [],
+            f"Imported during boot; import them inside the code that needs them: {HEAVY_MODULES}",
+        )
+
+    def test_settings_import_is_silent(self):
+        self.assertEqual(self.report['settings_output'], '')
@@ -0,0 +1,60 @@
+import boto3
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from moto import mock_aws
+
+from envents_project.static_encodings import PrecompressedStaticMiddleware
+from envents_project.storage_backends import StaticStorage
+
+BUCKET = 'envents-test-static'
+HASHED = 'css/app.0123456789ab.css'
+
+
+@override_settings(
+    AWS_ACCESS_KEY_ID='testing', AWS_SECRET_ACCESS_KEY='testing', AWS_S3_SESSION_PROFILE=None,
+    AWS_S3_REGION_NAME='us-east-1', AWS_S3_ENDPOINT_URL=None,
+    STATICFILES_PRECOMPRESSED_ENCODINGS=('br', 'gzip'),
+)
+class PrecompressedStaticTests(SimpleTestCase):
+    def setUp(self):
+        mock = mock_aws()
+        mock.start()
+        self.addCleanup(mock.stop)
+        boto3.client('s3', region_name='us-east-1').create_bucket(Bucket=BUCKET)
+
+        self.storage = StaticStorage(bucket_name=BUCKET)
+        self.storage.hashed_files = {'css/app.css': HASHED, 'js/tiny.js': 'js/tiny.0123456789ab.js'}
+        self.storage._published = {
+            name: {'sha256': '', 'modified': 0} for name in (HASHED, HASHED + '.gz', HASHED + '.br')
+        }
+
+    def link(self, accept_encoding, name='css/app.css'):
+        """The name {% static %} links in a page served to this client, and the response."""
+        linked = []
+
+        def view(request):
+            linked.append(self.storage.stored_name(name))
+            return HttpResponse()
+
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        response = PrecompressedStaticMiddleware(view)(request)
+        return linked[0], response
+
+    def test_preferred_accepted_variant_is_linked(self):
+        for header, expected in (
+            ('gzip, deflate, br', HASHED + '.br'),
+            ('gzip, deflate', HASHED + '.gz'),
+            ('', HASHED),
+        ):
+            with self.subTest(header=header):
+                name, response = self.link(header)
+                self.assertEqual(name, expected)
+                self.assertEqual(response.has_header('Vary'), expected != HASHED)
+
+    def test_uncompressed_without_a_variant_or_a_request(self):
+        self.assertEqual(self.link('br, gzip', name='js/tiny.js')[0], 'js/tiny.0123456789ab.js')
+        self.assertEqual(self.storage.stored_name('css/app.css'), HASHED)
+
+    def test_missing_manifest_entry_raises(self):
+        with self.assertRaises(ValueError):
+            self.storage.stored_name('css/missing.css')
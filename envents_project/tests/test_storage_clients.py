@@ -0,0 +1,35 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+
+from envents_project import storage_clients
+from envents_project.storage_backends import MediaStorage
+
+
+@override_settings(
+    AWS_ACCESS_KEY_ID='testing', AWS_SECRET_ACCESS_KEY='testing', AWS_S3_SESSION_PROFILE=None,
+    AWS_S3_REGION_NAME='us-east-1', AWS_S3_ENDPOINT_URL=None, AWS_STORAGE_BUCKET_NAME='envents-test',
+)
+class SharedClientTests(SimpleTestCase):
+    def test_storages_share_the_settings_client(self):
+        client = MediaStorage().connection.meta.client
+        self.assertIs(client, storage_clients.s3_client())
+        self.assertIs(MediaStorage(location='other').bucket.meta.client, client)
+
+    def test_connection_overrides_get_their_own_client(self):
+        local = MediaStorage(endpoint_url='http://localhost:9000', access_key='minio', secret_key='secret')
+        client = local.connection.meta.client
+        self.assertIsNot(client, storage_clients.s3_client())
+        self.assertEqual(client.meta.endpoint_url, 'http://localhost:9000')
+        session = storage_clients.get_session(access_key='minio', secret_key='secret')
+        self.assertEqual(session.get_credentials().access_key, 'minio')
+        # ... shared by storages with the same overrides
+        again = MediaStorage(endpoint_url='http://localhost:9000', access_key='minio', secret_key='secret')
+        self.assertIs(again.connection.meta.client, client)
+
+    def test_per_storage_client_config_is_refused(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, 'proxies'):
+            MediaStorage(proxies={'https': 'http://proxy:3128'})
+
+    def test_unknown_options_are_refused(self):
+        with self.assertRaises(TypeError):
+            storage_clients.s3_client(bucket_name='envents-test')
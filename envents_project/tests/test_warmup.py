@@ -0,0 +1,17 @@
+from django.test import TransactionTestCase
+
+from envents_project import warmup
+
+
+class WarmUpTests(TransactionTestCase):
+    # Like a worker boot, outside a test transaction: finishing each request
+    # runs close_old_connections
+
+    def test_pages_are_served_in_process(self):
+        with self.assertLogs(warmup.logger, 'INFO') as logs:
+            warmup.warm_up(paths=['/', '/venues/?sort=popular', '/missing/'])
+        self.assertEqual(
+            [record.getMessage() for record in logs.records if record.levelname == 'WARNING'],
+            ['Warm-up request to /missing/ returned 404'],
+        )
+        self.assertIn('Worker warmed up', logs.records[-1].getMessage())
@@ -20,6 +20,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from . import views
 from .health_checks import health_check, full_health_check
+from .instrumentation import request_metrics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -34,6 +35,9 @@ urlpatterns = [
     # Health check endpoints
     path('health/', health_check, name='health_check'),
     path('health/full/', full_health_check, name='full_health_check'),
+
+    # Per-view latency histograms of the serving worker (staff only)
+    path('metrics/requests/', request_metrics, name='request_metrics'),
 ]
 
 # Serve media and static files in development
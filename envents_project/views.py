@@ -1,15 +1,12 @@
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
 from django.shortcuts import render
 from django.db.models import Q
 from apps.venues.models import Venue, VenueCategory
+from .async_queries import gather_queries
 import random
 
-def home(request):
-    """
-    Home page view that passes context data for the venue search form
-    Optimized for performance with caching and efficient queries
-    """
-    from django.core.cache import cache
-    
+def _cities():
     # Cache cities list for 1 hour (recalculated only when cache expires)
     cities = cache.get('venue_cities_list')
     if cities is None:
@@ -25,44 +22,50 @@ def home(request):
         # Final list of unique cities with proper casing
         cities = sorted([cities_map[city_lower] for city_lower in cities_set])
         cache.set('venue_cities_list', cities, 3600)  # Cache for 1 hour
-    
+    return cities
+
+def _categories():
     # Cache categories for 1 hour
     categories = cache.get('venue_categories_list')
     if categories is None:
         categories = list(VenueCategory.objects.all())
         cache.set('venue_categories_list', categories, 3600)
-    
+    return categories
+
+def _top_venues():
     # Get featured venues efficiently with prefetch_related to avoid N+1 queries
-    featured_venues = list(
+    top_venues = list(
         Venue.objects.filter(status='approved', is_featured=True)
         .prefetch_related('photos', 'category')
         .select_related()[:4]
     )
-    
-    # If we have fewer than 4 featured venues, add random venues
-    if len(featured_venues) < 4:
-        featured_ids = [venue.id for venue in featured_venues]
-        needed_venues = 4 - len(featured_venues)
-        
-        # CRITICAL FIX: Use database-level random selection instead of loading all venues
-        # order_by('?') is handled by PostgreSQL RANDOM() - much faster than Python random.sample
-        additional_venues = list(
-            Venue.objects.filter(status='approved')
-            .exclude(id__in=featured_ids)
+    # If we have fewer than 4 featured venues, add random ones. Only then:
+    # order_by('?') is a PostgreSQL RANDOM() sort over every approved venue
+    if len(top_venues) < 4:
+        top_venues += list(
+            Venue.objects.filter(status='approved', is_featured=False)
             .prefetch_related('photos', 'category')
             .select_related()
-            .order_by('?')[:needed_venues]
+            .order_by('?')[:4 - len(top_venues)]
         )
-        featured_venues.extend(additional_venues)
-    
-    return render(request, 'home.html', {
+    return top_venues
+
+async def home(request):
+    """
+    Home page view that passes context data for the venue search form
+    Optimized for performance with caching and efficient queries; the
+    independent lookups run concurrently (see envents_project.async_queries)
+    """
+    cities, categories, top_venues = await gather_queries(_cities, _categories, _top_venues)
+
+    return await sync_to_async(render)(request, 'home.html', {
         'cities': cities,
         'categories': categories,
-        'top_venues': featured_venues,
+        'top_venues': top_venues,
     })
 
 def about(request):
     """
     About Us page view
     """
-    return render(request, 'about.html')
\ No newline at end of file
+    return render(request, 'about.html')
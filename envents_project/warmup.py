@@ -0,0 +1,66 @@
+"""
+Worker warm-up, run from gunicorn's ``post_worker_init`` hook before a new
+worker accepts traffic (see gunicorn.conf.py).
+
+Without it the first visitors to every fresh worker - after each deploy and
+each ``max_requests`` recycle - pay for template compilation, the lazily
+imported view dependencies, the S3 client and static manifest, and an empty
+per-process cache. ``warm_up()`` passes a few GET requests through Django's
+WSGI handler in-process so those costs are paid up front.
+"""
+import logging
+import sys
+import time
+from io import BytesIO
+
+logger = logging.getLogger(__name__)
+
+
+def _environ(path, host):
+    path, _, query = path.partition('?')
+    # No User-Agent: page view counters treat the request as a bot's
+    return {
+        'REQUEST_METHOD': 'GET', 'SCRIPT_NAME': '', 'PATH_INFO': path, 'QUERY_STRING': query,
+        'SERVER_NAME': host, 'SERVER_PORT': '443', 'SERVER_PROTOCOL': 'HTTP/1.1', 'HTTP_HOST': host,
+        'wsgi.version': (1, 0), 'wsgi.url_scheme': 'https', 'wsgi.input': BytesIO(), 'wsgi.errors': sys.stderr,
+        'wsgi.multithread': False, 'wsgi.multiprocess': True, 'wsgi.run_once': False,
+    }
+
+
+def _get(handler, path, host):
+    """Serve one GET through ``handler``; returns the status code."""
+    statuses = []
+    response = handler(_environ(path, host), lambda status, headers, exc_info=None: statuses.append(status))
+    try:
+        for _ in response:
+            pass
+    finally:
+        response.close()
+    return int(statuses[0].split()[0])
+
+
+def warm_up(paths=None, keep_connections=False):
+    from django.conf import settings
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.db import connections
+
+    from . import storage_clients
+
+    started = time.perf_counter()
+    if getattr(settings, 'AWS_STORAGE_BUCKET_NAME', None):
+        storage_clients.s3_client()
+
+    host = next((host.lstrip('.') for host in settings.ALLOWED_HOSTS if host != '*'), 'localhost')
+    handler = WSGIHandler()
+    for path in paths or getattr(settings, 'WARMUP_PATHS', ('/',)):
+        try:
+            status_code = _get(handler, path, host)
+        except Exception:
+            logger.exception("Warm-up request to %s failed", path)
+        else:
+            if status_code >= 400:
+                logger.warning("Warm-up request to %s returned %s", path, status_code)
+
+    if not keep_connections:
+        connections.close_all()
+    logger.info("Worker warmed up in %.0fms", (time.perf_counter() - started) * 1000)
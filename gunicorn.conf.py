@@ -0,0 +1,63 @@
+"""
+Gunicorn configuration, picked up automatically from the project root.
+
+Environment:
+    GUNICORN_WORKER_CLASS         sync | gthread (default) | gevent | uvicorn
+    WEB_CONCURRENCY               worker processes
+    GUNICORN_THREADS              threads per gthread worker
+    GUNICORN_WORKER_CONNECTIONS   concurrent requests per gevent worker
+    GUNICORN_MAX_REQUESTS         recycle a worker after this many requests
+    GUNICORN_MAX_REQUESTS_JITTER  random extra requests, so workers don't all restart together
+    GUNICORN_TIMEOUT              seconds before a silent worker is killed
+    GUNICORN_WARMUP               set to 0 to skip warming workers before they take traffic
+
+Requests spend most of their time waiting on Neon, S3 and SMTP. Sync
+workers hold a whole process for that wait; gthread and gevent workers
+keep serving other requests meanwhile. The uvicorn worker serves the ASGI
+app instead, where the async catalog views also run their independent
+queries concurrently. ``benchmarks/worker_classes.py`` compares the classes
+under injected database latency. Under gevent, psycopg 3 sees the
+monkey-patched ``select`` module and waits on Neon cooperatively by itself.
+"""
+import multiprocessing
+import os
+
+WORKER_CLASSES = {
+    'sync': 'sync',
+    'gthread': 'gthread',
+    'gevent': 'gevent',
+    'uvicorn': 'uvicorn.workers.UvicornWorker',
+}
+
+_kind = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+if _kind not in WORKER_CLASSES:
+    raise RuntimeError(f"GUNICORN_WORKER_CLASS must be one of {', '.join(WORKER_CLASSES)}, not {_kind!r}")
+worker_class = WORKER_CLASSES[_kind]
+wsgi_app = 'envents_project.asgi:application' if _kind == 'uvicorn' else 'envents_project.wsgi:application'
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+_cpus = multiprocessing.cpu_count()
+# Sync workers only serve one request each, so they need more processes
+workers = int(os.environ.get('WEB_CONCURRENCY', 2 * _cpus + 1 if worker_class == 'sync' else _cpus + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 8)) if worker_class == 'gthread' else 1
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 100))
+
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', max_requests // 10))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'
+
+
+def post_worker_init(worker):
+    if os.environ.get('GUNICORN_WARMUP', '1') == '0':
+        return
+    from envents_project.warmup import warm_up
+    # Only sync workers serve requests on the thread that runs this hook;
+    # elsewhere its DB connection would just sit idle
+    warm_up(keep_connections=worker_class == 'sync')
@@ -0,0 +1,75 @@
+// Direct-to-S3 photo uploads for the business submission forms.
+//
+// Forms marked with data-presign-url upload each chosen photo straight to the
+// bucket with a presigned POST, then submit only the returned token in the
+// photo form's hidden "upload_token" field instead of the file itself.
+
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('form[data-presign-url]').forEach(setupDirectUploads);
+});
+
+function setupDirectUploads(form) {
+    const presignUrl = form.dataset.presignUrl;
+    const kind = form.dataset.uploadKind;
+    const csrfToken = form.querySelector('input[name="csrfmiddlewaretoken"]').value;
+    let pending = 0;
+
+    form.querySelectorAll('input[type="file"][name$="-image"]').forEach(function(input) {
+        const container = input.closest('.photo-form');
+        const tokenInput = container.querySelector('input.upload-token');
+        const status = document.createElement('p');
+        status.className = 'mt-1 text-sm text-gray-500';
+        input.insertAdjacentElement('afterend', status);
+
+        input.addEventListener('change', async function() {
+            const file = input.files[0];
+            tokenInput.value = '';
+            if (!file) {
+                status.textContent = '';
+                return;
+            }
+
+            pending += 1;
+            status.textContent = 'Uploading…';
+            try {
+                const presignBody = new FormData();
+                presignBody.append('kind', kind);
+                presignBody.append('content_type', file.type);
+                const presignResponse = await fetch(presignUrl, {
+                    method: 'POST',
+                    body: presignBody,
+                    headers: {'X-CSRFToken': csrfToken},
+                    credentials: 'same-origin',
+                });
+                const upload = await presignResponse.json();
+                if (!presignResponse.ok) {
+                    throw new Error(upload.error || 'Upload failed');
+                }
+
+                const s3Body = new FormData();
+                Object.entries(upload.fields).forEach(([key, value]) => s3Body.append(key, value));
+                s3Body.append('file', file);  // must be the last field
+                const s3Response = await fetch(upload.url, {method: 'POST', body: s3Body});
+                if (!s3Response.ok) {
+                    throw new Error('Upload failed');
+                }
+
+                tokenInput.value = upload.token;
+                // The file is in the bucket now; don't send it through the server again
+                input.value = '';
+                status.textContent = 'Uploaded ' + file.name;
+            } catch (error) {
+                status.textContent = error.message + ' - the photo will be sent with the form instead.';
+            } finally {
+                pending -= 1;
+            }
+        });
+    });
+
+    form.addEventListener('submit', function(event) {
+        if (pending > 0) {
+            event.preventDefault();
+            alert('Please wait for your photos to finish uploading.');
+        }
+    });
+}